@@ -0,0 +1,205 @@
+"""
+WebDriver round trips per module, native commands against support.batch.
+
+Each module's multi-command steps are replayed against the stand-in back
+office twice: as the module writes them (WebDriverWait + execute_script +
+Select, one command at a time) and fused with Batch. Round trips are counted
+from SharedChrome.command_counts, so waits that polled more than once show
+up as well.
+
+    python -m benchmarks.bench_batching --repeat 5
+
+Results go to benchmarks/results/batching.json.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.select import Select
+from selenium.webdriver.support.ui import WebDriverWait
+
+from support import stand_in_cms
+from support.batch import Batch
+from support.driver import create_driver, login
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def wait(driver, condition):
+    return WebDriverWait(driver, 10).until(condition)
+
+
+def creator_menu(driver, base, item, batched):
+    """test_fill_in_form_fields and the two dropdown tests."""
+    driver.get(f"{base}/menu/add")
+    if batched:
+        batch = Batch(driver)
+        name = batch.find((By.XPATH, '//*[@name="name"]'), visible=True)
+        kn_name = batch.find((By.XPATH, '//*[@name="kn_name"]'), visible=True)
+        batch.scroll_into_view(name)
+        batch.send_keys(name, "Automation text")
+        batch.scroll_into_view(kn_name)
+        batch.send_keys(kn_name, "Automation text")
+        batch.select_by_index(batch.find((By.NAME, "page")), 1)
+        batch.select_by_index(batch.find((By.NAME, "menu_category")), 1)
+        batch.run()
+        return
+    for field in ("name", "kn_name"):
+        element = wait(driver, EC.visibility_of_element_located((By.XPATH, f'//*[@name="{field}"]')))
+        driver.execute_script("arguments[0].scrollIntoView(true);", element)
+        element.send_keys("Automation text")
+    for select in ("page", "menu_category"):
+        Select(wait(driver, EC.presence_of_element_located((By.NAME, select)))).select_by_index(1)
+
+
+def creator_pages(driver, base, item, batched):
+    """Title, Kannada title and category dropdown."""
+    driver.get(f"{base}/pages/add")
+    if batched:
+        batch = Batch(driver)
+        category = batch.find((By.XPATH, "//select[@name='data_page_category_id']"))
+        title = batch.find((By.XPATH, "//input[@placeholder='Title']"))
+        kannada = batch.find((By.XPATH, "//input[@placeholder='Kannada Title']"), visible=True)
+        batch.select_by_index(category, 0)
+        batch.send_keys(title, "Automation text")
+        value = batch.attribute(title, "value")
+        batch.click(kannada)
+        batch.send_keys(kannada, "ಉದಾಹರಣೆಯ ಶೀರ್ಷಿಕೆ")
+        batch.run()
+        assert not value.value.isdigit()
+        return
+    Select(wait(driver, EC.presence_of_element_located(
+        (By.XPATH, "//select[@name='data_page_category_id']")))).select_by_index(0)
+    title = wait(driver, EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Title']")))
+    title.send_keys("Automation text")
+    assert not title.get_attribute("value").isdigit()
+    kannada = wait(driver, EC.visibility_of_element_located((By.XPATH, "//input[@placeholder='Kannada Title']")))
+    kannada.click()
+    kannada.send_keys("ಉದಾಹರಣೆಯ ಶೀರ್ಷಿಕೆ")
+
+
+def moderator(kind, submit):
+    """Edit the first row, then save, as in test_click_edit_button and test_submit_form."""
+    path = "menu" if kind == "menu" else "pages"
+
+    def scenario(driver, base, item, batched):
+        driver.get(f"{base}/{path}")
+        # Both ways: the first visible row, its id, then the pencil inside that row
+        if batched:
+            batch = Batch(driver)
+            item_id = batch.attribute(batch.find((By.XPATH, "//tr[contains(@id, 'item-')]"), visible=True), "id")
+            batch.run()
+            batch.click(batch.find(
+                (By.XPATH, f"//tr[@id='{item_id.value}']//i[@class='glyphicon glyphicon-pencil']"), clickable=True))
+            batch.run()
+            batch.click(batch.find((By.XPATH, f"//input[@name='{submit}']"), clickable=True))
+            batch.run()
+            return
+        row = wait(driver, EC.visibility_of_element_located((By.XPATH, "//tr[contains(@id, 'item-')]")))
+        item_id = row.get_attribute("id")
+        wait(driver, EC.element_to_be_clickable(
+            (By.XPATH, f"//tr[@id='{item_id}']//i[@class='glyphicon glyphicon-pencil']"))).click()
+        wait(driver, EC.element_to_be_clickable((By.XPATH, f"//input[@name='{submit}']"))).click()
+    return scenario
+
+
+def approver(kind, approve_xpath, message_xpath):
+    """Approve from the edit/view page and wait for the flash, as in test_approve_request."""
+    path = "menu/edit" if kind == "menu" else "pages/view"
+
+    def scenario(driver, base, item, batched):
+        stand_in_cms.STORE.set_status(item[kind], "Moderated")
+        driver.get(f"{base}/{path}/{item[kind]}")
+        if batched:
+            batch = Batch(driver)
+            batch.click(batch.find((By.XPATH, approve_xpath), clickable=True))
+            batch.run()
+            batch.find((By.XPATH, message_xpath), visible=True)
+            batch.run()
+            return
+        wait(driver, EC.element_to_be_clickable((By.XPATH, approve_xpath))).click()
+        assert wait(driver, EC.visibility_of_element_located((By.XPATH, message_xpath))).is_displayed()
+    return scenario
+
+
+MODULES = {
+    "test_creator_menu": ("creator", creator_menu),
+    "test_creator_pages": ("creator", creator_pages),
+    "test_moderator_main_menu": ("moderator", moderator("menu", "add_menu_submit_button")),
+    "test_moderator_pages": ("moderator", moderator("page", "add_edit_page_button")),
+    "test_approver_main_menu": ("approver", approver(
+        "menu", "//a[@class='btn btn-success menu_approve_btn']",
+        "//body/div[@class='ch-container']/div[@class='row']/div[@id='content']/div[1]")),
+    "test_approver_pages": ("approver", approver(
+        "page", "//a[@class='btn btn-sm btn-success']",
+        "//div[@id='content']//div[@class='alert alert-success'][normalize-space()='Data Approved successfully!']")),
+}
+
+
+def measure(driver, scenario, base, item, batched, repeat):
+    round_trips, seconds = [], []
+    for _ in range(repeat):
+        # Page loads are the same either way; count only the step itself
+        before = sum(driver.command_counts.values()) + 1
+        start = time.perf_counter()
+        scenario(driver, base, item, batched)
+        seconds.append(time.perf_counter() - start)
+        round_trips.append(sum(driver.command_counts.values()) - before)
+    return {"round_trips": statistics.median(round_trips), "median_s": statistics.median(seconds)}
+
+
+def run(repeat):
+    server = stand_in_cms.start(port=0)
+    base = stand_in_cms.base_url(server)
+    item = {"menu": stand_in_cms.STORE.add("menu", "Automation text", "ಉದಾಹರಣೆಯ ಶೀರ್ಷಿಕೆ")["id"],
+            "page": stand_in_cms.STORE.add("page", "Automation text", "ಉದಾಹರಣೆಯ ಶೀರ್ಷಿಕೆ")["id"]}
+    drivers = {}
+    results = []
+    try:
+        for module, (role, scenario) in MODULES.items():
+            if role not in drivers:
+                drivers[role] = create_driver()
+                login(drivers[role], role, base)
+            driver = drivers[role]
+            native = measure(driver, scenario, base, item, False, repeat)
+            batched = measure(driver, scenario, base, item, True, repeat)
+            results.append({
+                "module": module,
+                "native": native,
+                "batched": batched,
+                "round_trip_reduction": round(1 - batched["round_trips"] / native["round_trips"], 3),
+            })
+            logging.info(f"{module}: {native['round_trips']} -> {batched['round_trips']} round trips")
+    finally:
+        for driver in drivers.values():
+            driver.quit()
+        server.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WebDriver round trips with and without batching")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    results = run(args.repeat)
+
+    print("module".ljust(28) + "native  batched  reduction  native_s  batched_s")
+    for result in results:
+        print(result["module"].ljust(28) + f"{result['native']['round_trips']:>6}  {result['batched']['round_trips']:>7}"
+              f"  {result['round_trip_reduction']:>9.0%}  {result['native']['median_s']:>8.3f}"
+              f"  {result['batched']['median_s']:>9.3f}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, "batching.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
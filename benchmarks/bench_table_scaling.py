@@ -0,0 +1,113 @@
+"""
+Row-finder latency against table size.
+
+Seeds the stand-in back office with 10, 1k and 10k menus and pages, then times
+the row lookups used by test_approver_main_menu.test_search_and_edit and
+test_approver_pages.test_click_edit_button_for_moderated_row. The target row
+is planted last, so every size measures the worst case.
+
+    python -m benchmarks.bench_table_scaling --sizes 10,1000,10000 --repeat 5
+
+Results go to benchmarks/results/table_scaling.json (and .png when matplotlib
+is installed).
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+
+from support import generate_data, stand_in_cms
+from support.driver import create_driver, login
+from support.tables import find_menu_row, find_page_row
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def time_lookup(driver, url, lookup, repeat):
+    samples = []
+    for _ in range(repeat):
+        driver.get(url)
+        start = time.perf_counter()
+        row = lookup()
+        samples.append(time.perf_counter() - start)
+        assert row is not None, f"Planted row not found on {url}"
+    return samples
+
+
+def require_datatables(driver, url):
+    # Without DataTables the stand-in renders one plain table and the lookups never page
+    driver.get(url)
+    if not driver.execute_script("return !!(window.jQuery && jQuery.fn.dataTable)"):
+        raise RuntimeError(f"DataTables did not load on {url}; run python -m support.stand_in_cms --fetch-assets "
+                           "or give the browser network access to the CDNs")
+
+
+def summarize(samples):
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "max_s": max(samples),
+            "samples": samples}
+
+
+def plot(results, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        logging.info("matplotlib not installed, skipping plot")
+        return None
+
+    sizes = [result["rows"] for result in results]
+    plt.figure(figsize=(7, 4))
+    for key, label in (("menu", "find_menu_row (test_search_and_edit)"),
+                       ("page", "find_page_row (test_click_edit_button_for_moderated_row)")):
+        plt.plot(sizes, [result[key]["median_s"] for result in results], marker="o", label=label)
+    plt.xscale("log")
+    plt.xlabel("rows in table")
+    plt.ylabel("median lookup latency (s)")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(path)
+    return path
+
+
+def run(sizes, repeat):
+    server = stand_in_cms.start()
+    target = stand_in_cms.base_url(server)
+    driver = create_driver()
+    results = []
+    try:
+        login(driver, "approver", target)
+        require_datatables(driver, f"{target}/menu")
+        for size in sizes:
+            generate_data.seed(target, menus=size, pages=size, reset=True, seed_value=size)
+            menu = time_lookup(driver, f"{target}/menu",
+                               lambda: find_menu_row(driver, generate_data.TARGET_NAME, "Moderated"), repeat)
+            page = time_lookup(driver, f"{target}/pages",
+                               lambda: find_page_row(driver, generate_data.TARGET_NAME, "Moderated"), repeat)
+            results.append({"rows": size, "menu": summarize(menu), "page": summarize(page)})
+            logging.info(f"{size} rows: menu {statistics.median(menu):.3f}s, page {statistics.median(page):.3f}s")
+    finally:
+        driver.quit()
+        server.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark row finders against table size")
+    parser.add_argument("--sizes", default="10,1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    results = run([int(size) for size in args.sizes.split(",")], args.repeat)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, "table_scaling.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    plot(results, os.path.join(RESULTS_DIR, "table_scaling.png"))
+
+
+if __name__ == "__main__":
+    main()
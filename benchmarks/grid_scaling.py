@@ -0,0 +1,92 @@
+"""
+Throughput of sharded Grid runs against node count.
+
+For every node count a fresh local Grid (hub plus that many single-session
+nodes) is started from the Selenium server jar, the same number of content
+items is pushed through the creator → moderator → approver flows, and the
+wall-clock time, items per minute, speedup over the smallest grid and
+per-node efficiency are recorded. With --grid-url an existing Grid is used
+instead and only the number of concurrent shards varies.
+
+    python -m benchmarks.grid_scaling --jar selenium-server-4.25.0.jar --nodes 1,2,4 --items 8
+
+Results go to benchmarks/results/grid_scaling.json (and .png when matplotlib
+is installed).
+"""
+import argparse
+import json
+import logging
+import os
+
+from support.grid import LocalGrid, run_sharded
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def run(node_counts, items, jar=None, grid_url=None):
+    results = []
+    for nodes in node_counts:
+        run_dir = os.path.join(RESULTS_DIR, "grid_scaling", f"{nodes}-nodes")
+        if jar:
+            with LocalGrid(jar, nodes) as grid:
+                summary = run_sharded(grid.url, items, nodes, run_dir)
+        else:
+            summary = run_sharded(grid_url, items, nodes, run_dir)
+        results.append({"nodes": nodes, "items": items, "wall_s": summary["wall_s"],
+                        "items_per_min": summary["items_per_min"], "failed_shards": summary["failed_shards"]})
+
+    base = results[0]
+    for result in results:
+        result["speedup"] = round(base["wall_s"] / result["wall_s"], 2)
+        # 1.0 means every added node contributed as much as the first ones
+        result["efficiency"] = round(result["speedup"] * base["nodes"] / result["nodes"], 2)
+    return results
+
+
+def plot(results, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        logging.info("matplotlib not installed, skipping plot")
+        return None
+
+    nodes = [result["nodes"] for result in results]
+    base = results[0]
+    plt.figure(figsize=(7, 4))
+    plt.plot(nodes, [result["items_per_min"] for result in results], marker="o", label="measured")
+    plt.plot(nodes, [base["items_per_min"] * n / base["nodes"] for n in nodes], linestyle="--", label="linear")
+    plt.xlabel("grid nodes")
+    plt.ylabel("items through all role flows per minute")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sharded Grid throughput against node count")
+    parser.add_argument("--nodes", default="1,2,4")
+    parser.add_argument("--items", type=int, default=8)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--jar", help="Selenium server jar; a local Grid is started per node count")
+    group.add_argument("--grid-url", help="Existing Grid; only the concurrency varies")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    results = run([int(nodes) for nodes in args.nodes.split(",")], args.items, args.jar, args.grid_url)
+
+    print("nodes  wall_s  items/min  speedup  efficiency")
+    for result in results:
+        print(f"{result['nodes']:>5}  {result['wall_s']:>6.1f}  {result['items_per_min']:>9.2f}"
+              f"  {result['speedup']:>7.2f}  {result['efficiency']:>10.2f}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, "grid_scaling.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    plot(results, os.path.join(RESULTS_DIR, "grid_scaling.png"))
+
+
+if __name__ == "__main__":
+    main()
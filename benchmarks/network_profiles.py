@@ -0,0 +1,109 @@
+"""
+Run the creator, moderator and approver flows under each network profile.
+
+Every profile gets its own pytest run with ZPS_NETWORK_PROFILE set and its
+own Allure results directory. Step durations are then compared side by side:
+steps that fail, or come within the margin of the fixed 10 s WebDriverWait
+timeout, are flagged, and each step lists the mildest profile it first
+breaks down under.
+
+    python -m benchmarks.network_profiles --profiles baseline,office-dsl,3g,high-latency
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from support.allure_results import duration_s, iter_results, iter_steps, module_name
+from support.config import FLOWS
+from support.network_profiles import PROFILES
+
+WAIT_TIMEOUT_S = 10
+# Steps taking more than this share of the wait timeout are flagged as at risk
+AT_RISK_SHARE = 0.7
+
+RUNS_DIR = os.path.join(os.path.dirname(__file__), "results", "network_profiles")
+
+
+def run_profile(profile, flows):
+    results_dir = os.path.join(RUNS_DIR, profile)
+    os.makedirs(results_dir, exist_ok=True)
+    env = dict(os.environ)
+    env["ZPS_NETWORK_PROFILE"] = "" if profile == "baseline" else profile
+    command = [sys.executable, "-m", "pytest", "-q", f"--alluredir={results_dir}", "--clean-alluredir", *flows]
+    logging.info(f"Running flows under '{profile}'")
+    subprocess.run(command, env=env, check=False)
+    return results_dir
+
+
+def collect_steps(results_dir):
+    """Map 'module::test::step' to (duration, status) for one profile run."""
+    steps = {}
+    for result in iter_results(results_dir):
+        prefix = f"{module_name(result)}::{result['name']}"
+        steps[prefix] = (duration_s(result), result.get("status"))
+        for path, step in iter_steps(result):
+            steps[f"{prefix}::{path}"] = (duration_s(step), step.get("status"))
+    return steps
+
+
+def compare(runs, profiles):
+    """Side-by-side durations plus the first profile each step breaks down under."""
+    rows = []
+    for key in sorted({key for steps in runs.values() for key in steps}):
+        row = {"step": key, "profiles": {}, "first_failure": None, "first_at_risk": None}
+        for profile in profiles:
+            duration, status = runs[profile].get(key, (None, "missing"))
+            row["profiles"][profile] = {"duration_s": duration, "status": status}
+            if row["first_failure"] is None and status in ("failed", "broken"):
+                row["first_failure"] = profile
+            if row["first_at_risk"] is None and duration is not None and duration >= WAIT_TIMEOUT_S * AT_RISK_SHARE:
+                row["first_at_risk"] = profile
+        rows.append(row)
+    return rows
+
+
+def print_table(rows, profiles):
+    print("step".ljust(70) + "".join(profile.rjust(14) for profile in profiles) + "  breaks under")
+    for row in rows:
+        cells = []
+        for profile in profiles:
+            entry = row["profiles"][profile]
+            if entry["status"] in ("failed", "broken"):
+                cells.append("FAIL".rjust(14))
+            elif entry["duration_s"] is None:
+                cells.append("-".rjust(14))
+            else:
+                cells.append(f"{entry['duration_s']:.2f}s".rjust(14))
+        verdict = row["first_failure"] or (f"{row['first_at_risk']} (near {WAIT_TIMEOUT_S}s)" if row["first_at_risk"] else "")
+        print(row["step"][:69].ljust(70) + "".join(cells) + f"  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare step durations across network profiles")
+    parser.add_argument("--profiles", default="baseline," + ",".join(PROFILES))
+    parser.add_argument("--flows", default=",".join(FLOWS), help="Test modules to run, in order")
+    parser.add_argument("--reuse", action="store_true", help="Compare existing results without re-running")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    profiles = args.profiles.split(",")
+    for profile in profiles:
+        if profile != "baseline" and profile not in PROFILES:
+            parser.error(f"Unknown profile '{profile}'")
+
+    runs = {}
+    for profile in profiles:
+        results_dir = os.path.join(RUNS_DIR, profile) if args.reuse else run_profile(profile, args.flows.split(","))
+        runs[profile] = collect_steps(results_dir)
+
+    rows = compare(runs, profiles)
+    print_table(rows, profiles)
+    with open(os.path.join(RUNS_DIR, "comparison.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
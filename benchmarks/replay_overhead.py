@@ -0,0 +1,89 @@
+"""
+The suite's own overhead, from WebDriver recordings and no browser.
+
+Runs the test modules under pytest against a ZPS_WEBDRIVER_RECORD
+directory (see support.webdriver_replay), --repeat times for each replay
+timing. With "zero" the wall time is everything the suite does between
+driver round trips: waits, logging, Allure, screenshot handling. With
+"original" it adds back the recorded driver latency, which is also summed
+from the recordings for comparison.
+
+    ZPS_WEBDRIVER_RECORD=recordings/full pytest
+    python -m benchmarks.replay_overhead recordings/full --repeat 5
+
+Results go to benchmarks/results/replay_overhead.json.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from support.webdriver_replay import read_recording
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def recorded_driver_s(directory):
+    """Total recorded round-trip time and command count over the directory's recordings."""
+    total, commands = 0.0, 0
+    for path in glob.glob(os.path.join(directory, "browser-*.jsonl")):
+        _, records = read_recording(path)
+        total += sum(record["elapsed_s"] for record in records)
+        commands += len(records)
+    return round(total, 3), commands
+
+
+def run_once(directory, timing, modules):
+    env = dict(os.environ, ZPS_WEBDRIVER_REPLAY=directory, ZPS_REPLAY_TIMING=timing)
+    env.pop("ZPS_WEBDRIVER_RECORD", None)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-m", "pytest", "-q", *modules], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    wall_s = time.perf_counter() - started
+    return wall_s, result.returncode, result.stdout.strip().splitlines()[-1:] or [""]
+
+
+def run(directory, modules, timings, repeat):
+    driver_s, commands = recorded_driver_s(directory)
+    results = {"recording": directory, "commands": commands, "recorded_driver_s": driver_s, "timings": {}}
+    for timing in timings:
+        walls, outcomes = [], []
+        for _ in range(repeat):
+            wall_s, returncode, last_line = run_once(directory, timing, modules)
+            walls.append(wall_s)
+            outcomes.append({"returncode": returncode, "summary": last_line[0]})
+        results["timings"][timing] = {
+            "wall_s": [round(wall, 3) for wall in walls],
+            "median_s": round(statistics.median(walls), 3),
+            "stdev_s": round(statistics.stdev(walls), 3) if len(walls) > 1 else 0.0,
+            "runs": outcomes,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the suite's overhead by replaying WebDriver recordings")
+    parser.add_argument("recording", help="Directory written with ZPS_WEBDRIVER_RECORD")
+    parser.add_argument("modules", nargs="*", help="Test modules to run (default: the whole suite)")
+    parser.add_argument("--timing", action="append", help="Replay timing (repeatable, default zero and original)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.recording, args.modules, args.timing or ["zero", "original"], args.repeat)
+
+    print(f"{results['commands']} recorded commands, {results['recorded_driver_s']}s in the driver")
+    print("timing      median_s  stdev_s")
+    for timing, result in results["timings"].items():
+        print(f"{timing:<10}  {result['median_s']:>8.2f}  {result['stdev_s']:>7.2f}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, "replay_overhead.json"), "w") as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
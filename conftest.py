@@ -0,0 +1,152 @@
+import json
+import os
+from collections import Counter
+
+import allure
+import allure_commons
+import pytest
+
+from support import allure_archive, har, locators, page_metrics, pipeline, profiling, resources, sessions, slo, tracing
+from support.config import (ALLURE_ARCHIVE, HAR_CAPTURE, PAGE_METRICS, PARALLEL_LOGIN, PERF_DIR, RECYCLE_AFTER_STEPS,
+                            RECYCLE_RSS_MB, RESOURCE_SAMPLER, TRACE_FILE, run_variant)
+from support.driver import current_driver
+
+PLUGINS = []
+
+# Blocked requests, cache hits and bytes saved by the Fetch interceptor over the session
+INTERCEPTION_TOTALS = Counter()
+
+SAMPLER = None
+
+PROFILER = None
+
+
+def pytest_addoption(parser):
+    parser.addoption("--profile-tests", nargs="?", const="sample", default=None, choices=profiling.MODES,
+                     help="Profile each test (sampling by default, or cprofile) into perf_history/profiles")
+
+
+def pytest_configure(config):
+    global SAMPLER, PROFILER
+    if config.getoption("--profile-tests"):
+        PROFILER = profiling.PerTestProfiler(config.getoption("--profile-tests"))
+    if (RESOURCE_SAMPLER or RECYCLE_RSS_MB) and resources.ResourceSampler.available():
+        SAMPLER = resources.ResourceSampler(current_driver)
+        SAMPLER.start()
+    if RECYCLE_AFTER_STEPS or RECYCLE_RSS_MB:
+        PLUGINS.append(resources.RecyclePolicy(sampler=SAMPLER))
+    if PAGE_METRICS:
+        PLUGINS.append(page_metrics.PageMetrics())
+    if HAR_CAPTURE:
+        PLUGINS.append(har.HarRecorder(HAR_CAPTURE))
+    if TRACE_FILE:
+        PLUGINS.append(tracing.install(TRACE_FILE))
+    for plugin in PLUGINS:
+        allure_commons.plugin_manager.register(plugin)
+
+
+def pytest_unconfigure(config):
+    global SAMPLER, PROFILER
+    if SAMPLER is not None:
+        SAMPLER.stop()
+        SAMPLER = None
+    if PROFILER is not None:
+        PROFILER.write_summary()
+        PROFILER = None
+    for plugin in PLUGINS:
+        allure_commons.plugin_manager.unregister(plugin)
+        if hasattr(plugin, "write_summary"):
+            plugin.write_summary()
+    recycles = [event for plugin in PLUGINS if isinstance(plugin, resources.RecyclePolicy)
+                for event in plugin.recycles]
+    PLUGINS.clear()
+    tracing.uninstall()
+    locators.HISTORY.save()
+    pipeline.write_summary()
+    slo.write_summary()
+
+    if recycles:
+        os.makedirs(PERF_DIR, exist_ok=True)
+        with open(os.path.join(PERF_DIR, "browser_recycles.json"), "w") as f:
+            json.dump(recycles, f, indent=2)
+
+    if INTERCEPTION_TOTALS:
+        os.makedirs(PERF_DIR, exist_ok=True)
+        with open(os.path.join(PERF_DIR, "network_interception.json"), "w") as f:
+            json.dump({"variant": run_variant(), **INTERCEPTION_TOTALS}, f, indent=2)
+
+
+def pytest_sessionstart(session):
+    # After allure-pytest's own pytest_configure has registered the file writer this replaces
+    if ALLURE_ARCHIVE:
+        PLUGINS.append(allure_archive.use_archive(ALLURE_ARCHIVE))
+
+
+@pytest.fixture(scope="session")
+def role_sessions(request):
+    """Hands each module's setup fixture its driver; logs all roles in up front with ZPS_PARALLEL_LOGIN."""
+    pool = sessions.SessionPool()
+    if PARALLEL_LOGIN:
+        pool.bootstrap(sessions.role_of(item.module.__name__) for item in request.session.items
+                       if sessions.role_of(item.module.__name__))
+    yield pool
+    pool.close()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # One trace per test, spanning its setup (where module fixtures start browsers), call and teardown
+    with tracing.span(item.nodeid, **{"code.filepath": item.location[0], "code.function": item.name}):
+        yield
+
+
+def pytest_runtest_logreport(report):
+    span = tracing.TRACER.current() if tracing.TRACER is not None else None
+    if span is None:
+        return
+    if report.when == "call":
+        span.attributes["test.outcome"] = report.outcome
+    if report.failed:
+        span.status = (tracing.STATUS_ERROR, f"{report.when} failed")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    # Recycle between tests, before anything below picks up the current browser
+    for plugin in PLUGINS:
+        if isinstance(plugin, resources.RecyclePolicy):
+            plugin.maybe_recycle(current_driver())
+    mark = SAMPLER.mark() if SAMPLER is not None else None
+
+    recorders = [plugin for plugin in PLUGINS if isinstance(plugin, har.HarRecorder)]
+    for recorder in recorders:
+        recorder.current_test = f"{item.module.__name__}-{item.name}"
+        if recorder.mode == "test":
+            recorder.begin(item.nodeid)
+    driver = current_driver()
+    interceptor = getattr(driver, "interceptor", None)
+    before = dict(interceptor.stats) if interceptor is not None else None
+    if PROFILER is not None:
+        PROFILER.begin()
+
+    yield
+
+    if PROFILER is not None:
+        profile = PROFILER.end(item.nodeid)
+        allure.attach(json.dumps(profile, indent=2), name="python profile", attachment_type=allure.attachment_type.JSON)
+    for recorder in recorders:
+        if recorder.mode == "test":
+            recorder.end(item.nodeid, recorder.current_test)
+    if interceptor is not None:
+        delta = Counter(interceptor.stats)
+        delta.subtract(before)
+        delta = +delta
+        if delta:
+            INTERCEPTION_TOTALS.update(delta)
+            allure.attach(json.dumps(dict(delta), indent=2), name="network interception",
+                          attachment_type=allure.attachment_type.JSON)
+    if SAMPLER is not None and RESOURCE_SAMPLER:
+        timeline = SAMPLER.timeline(mark)
+        if timeline is not None:
+            allure.attach(json.dumps(timeline, indent=2), name="resource timeline",
+                          attachment_type=allure.attachment_type.JSON)
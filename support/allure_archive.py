@@ -0,0 +1,321 @@
+"""
+Pack a run's Allure output into three files instead of one file per item.
+
+With ZPS_ALLURE_ARCHIVE=<dir> (and pytest's usual --alluredir) allure-pytest's
+file writer is swapped for ArchiveLogger. The archive directory then holds:
+
+- results.jsonl: every result and container, one JSON line each, appended
+  as the tests finish
+- attachments.blob: every attachment's bytes, back to back
+- attachments.index.jsonl: name, offset and length of each attachment
+
+Everything is append-only, so a run can be picked up again after an
+interruption. RunArchive reads an archive, with attachments sliced from a
+memory map of the blob. `export` writes the standard loose-file layout
+back out for tools that need it (allure generate, support.allure_report):
+
+    ZPS_ALLURE_ARCHIVE=archives/run1 pytest --alluredir=allure-results
+    python -m support.allure_archive export archives/run1 allure-results-run1
+    python -m support.allure_archive pack allure-results archives/old-runs
+
+support.allure_results reads archives directly. `check` runs a one-test
+pytest session in archive mode through the suite's conftest and fails
+unless pytest exits cleanly with the result archived:
+
+    python -m support.allure_archive check
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+
+import allure_commons
+from allure_commons import hookimpl
+from allure_commons.logger import AllureFileLogger
+from attr import asdict
+
+ITEMS = "results.jsonl"
+BLOB = "attachments.blob"
+INDEX = "attachments.index.jsonl"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK_TEST = """import allure
+
+
+def test_archived():
+    allure.attach("archived", name="check", attachment_type=allure.attachment_type.TEXT)
+"""
+
+
+def is_archive(directory):
+    return os.path.exists(os.path.join(directory, ITEMS))
+
+
+class ArchiveWriter:
+    """Appends items and attachments to an archive directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.items = open(os.path.join(directory, ITEMS), "a", encoding="utf-8")
+        self.blob = open(os.path.join(directory, BLOB), "ab")
+        self.index = open(os.path.join(directory, INDEX), "a", encoding="utf-8")
+        self.counts = {"result": 0, "container": 0, "attachment": 0, "attachment_bytes": 0}
+
+    def add_item(self, kind, file_name, data):
+        line = json.dumps({"kind": kind, "file": file_name, "data": data}, ensure_ascii=False)
+        with self.lock:
+            self.items.write(line + "\n")
+            self.items.flush()
+            self.counts[kind] += 1
+
+    def add_attachment(self, file_name, body):
+        with self.lock:
+            offset = self.blob.tell()
+            self.blob.write(body)
+            self.blob.flush()
+            # The index line goes after the bytes, so an index entry always points at complete data
+            self.index.write(json.dumps({"name": file_name, "offset": offset, "length": len(body)}) + "\n")
+            self.index.flush()
+            self.counts["attachment"] += 1
+            self.counts["attachment_bytes"] += len(body)
+
+    def close(self):
+        with self.lock:
+            for f in (self.items, self.blob, self.index):
+                f.close()
+
+
+class ArchiveLogger(ArchiveWriter):
+    """allure_commons reporter writing what AllureFileLogger would, into an archive."""
+
+    @hookimpl
+    def report_result(self, result):
+        self.add_item("result", f"{uuid.uuid4()}-result.json", item_data(result))
+
+    @hookimpl
+    def report_container(self, container):
+        self.add_item("container", f"{uuid.uuid4()}-container.json", item_data(container))
+
+    @hookimpl
+    def report_attached_file(self, source, file_name):
+        with open(source, "rb") as f:
+            self.add_attachment(file_name, f.read())
+
+    @hookimpl
+    def report_attached_data(self, body, file_name):
+        self.add_attachment(file_name, body.encode("utf-8") if isinstance(body, str) else body)
+
+    def write_summary(self):
+        self.close()
+        logging.info(f"Allure archive {self.directory}: {self.counts['result']} results, "
+                     f"{self.counts['attachment']} attachments ({self.counts['attachment_bytes']} bytes)")
+
+
+def item_data(item):
+    # What AllureFileLogger writes: the attrs fields, without empty ones
+    return asdict(item, filter=lambda _, value: value or value is False)
+
+
+@hookimpl
+def skip_result(result):
+    pass
+
+
+@hookimpl
+def skip_container(container):
+    pass
+
+
+@hookimpl
+def skip_attached_file(source, file_name):
+    pass
+
+
+@hookimpl
+def skip_attached_data(body, file_name):
+    pass
+
+
+SILENT_HOOKS = {"report_result": skip_result, "report_container": skip_container,
+                "report_attached_file": skip_attached_file, "report_attached_data": skip_attached_data}
+
+
+def silence(file_logger):
+    # allure-pytest's cleanup unregisters the file writer by its name, so it stays registered, writing nothing
+    name = allure_commons.plugin_manager.get_name(file_logger)
+    allure_commons.plugin_manager.unregister(file_logger)
+    for hook, skip in SILENT_HOOKS.items():
+        setattr(file_logger, hook, skip)
+    allure_commons.plugin_manager.register(file_logger, name)
+
+
+def use_archive(directory):
+    """Register an ArchiveLogger in place of allure-pytest's file writer; returns it."""
+    file_loggers = [plugin for plugin in allure_commons.plugin_manager.get_plugins()
+                    if isinstance(plugin, AllureFileLogger)]
+    if not file_loggers:
+        logging.warning("ZPS_ALLURE_ARCHIVE is set but Allure is not writing results; run pytest with --alluredir")
+    for plugin in file_loggers:
+        silence(plugin)
+    logger = ArchiveLogger(directory)
+    allure_commons.plugin_manager.register(logger)
+    return logger
+
+
+class RunArchive:
+    """Read access to an archive; attachments come from a memory map of the blob."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.offsets = {}
+        try:
+            with open(os.path.join(directory, INDEX), encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.offsets[entry["name"]] = (entry["offset"], entry["length"])
+        except OSError:
+            pass
+        self.blob = None
+        blob_path = os.path.join(directory, BLOB)
+        if os.path.exists(blob_path) and os.path.getsize(blob_path):
+            with open(blob_path, "rb") as f:
+                self.blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def items(self, kind=None):
+        """(file name, data) of the archived results and containers, in the order they were written."""
+        with open(os.path.join(self.directory, ITEMS), encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    # The last line of a run that was killed mid-write
+                    logging.warning(f"Skipping a truncated item in {self.directory}")
+                    continue
+                if kind is None or item["kind"] == kind:
+                    yield item["file"], item["data"]
+
+    def results(self):
+        for _, data in self.items("result"):
+            yield data
+
+    def attachment(self, name):
+        """The bytes of an attachment, by the source name its result refers to."""
+        offset, length = self.offsets[name]
+        return self.blob[offset:offset + length]
+
+    def close(self):
+        if self.blob is not None:
+            self.blob.close()
+            self.blob = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export(directory, results_dir):
+    """Write the archive out as a standard Allure results directory; returns the number of files written."""
+    os.makedirs(results_dir, exist_ok=True)
+    written = 0
+    with RunArchive(directory) as archive:
+        for file_name, data in archive.items():
+            with open(os.path.join(results_dir, file_name), "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            written += 1
+        for name in archive.offsets:
+            with open(os.path.join(results_dir, name), "wb") as f:
+                f.write(archive.attachment(name))
+            written += 1
+    return written
+
+
+def pack(results_dir, directory):
+    """Append a loose Allure results directory to an archive; returns the writer's counts."""
+    writer = ArchiveWriter(directory)
+    try:
+        for name in sorted(os.listdir(results_dir)):
+            path = os.path.join(results_dir, name)
+            kind = "result" if name.endswith("-result.json") else "container" if name.endswith("-container.json") else None
+            if kind:
+                with open(path, encoding="utf-8") as f:
+                    writer.add_item(kind, name, json.load(f))
+            elif "-attachment" in name:
+                with open(path, "rb") as f:
+                    writer.add_attachment(name, f.read())
+    finally:
+        writer.close()
+    return writer.counts
+
+
+def check():
+    """Run a one-test pytest session in archive mode; returns a list of problems, empty when it archived cleanly."""
+    with tempfile.TemporaryDirectory() as tmp:
+        test_file = os.path.join(tmp, "test_archive_check.py")
+        with open(test_file, "w", encoding="utf-8") as f:
+            f.write(CHECK_TEST)
+        archive_dir = os.path.join(tmp, "archive")
+        results_dir = os.path.join(tmp, "results")
+        # -p conftest loads the suite's conftest, which swaps in the ArchiveLogger, without its test modules
+        result = subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "conftest", "-p", "no:cacheprovider",
+                                 "--rootdir", tmp, f"--alluredir={results_dir}", test_file],
+                                cwd=ROOT, env=dict(os.environ, ZPS_ALLURE_ARCHIVE=archive_dir),
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        problems = []
+        if result.returncode != 0:
+            problems.append(f"pytest exited with {result.returncode}:\n{result.stdout.strip()}")
+        if not is_archive(archive_dir):
+            problems.append("no archive was written")
+        else:
+            with RunArchive(archive_dir) as archive:
+                if len(list(archive.results())) != 1 or len(archive.offsets) != 1:
+                    problems.append(f"expected 1 result and 1 attachment in the archive, "
+                                    f"got {len(list(archive.results()))} and {len(archive.offsets)}")
+        loose = [name for name in os.listdir(results_dir) if name.endswith("-result.json")] \
+            if os.path.isdir(results_dir) else []
+        if loose:
+            problems.append(f"the file writer still wrote {len(loose)} loose results")
+        return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack Allure results into a run archive, or export one back")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write an archive out as an Allure results directory")
+    export_parser.add_argument("archive")
+    export_parser.add_argument("results_dir")
+    pack_parser = commands.add_parser("pack", help="Append a results directory to an archive")
+    pack_parser.add_argument("results_dir")
+    pack_parser.add_argument("archive")
+    commands.add_parser("check", help="Run a one-test pytest session in archive mode and check it exits cleanly")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        problems = check()
+        for problem in problems:
+            print(problem)
+        print("archive mode: ok" if not problems else "archive mode: FAILED")
+        sys.exit(1 if problems else 0)
+    elif args.command == "export":
+        print(f"{export(args.archive, args.results_dir)} files written to {args.results_dir}")
+    else:
+        counts = pack(args.results_dir, args.archive)
+        print(f"{counts['result']} results, {counts['container']} containers and {counts['attachment']} attachments "
+              f"({counts['attachment_bytes']} bytes) packed into {args.archive}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+HTML report over a growing Allure results history, built incrementally.
+
+Every *-result.json file is parsed once. The report directory keeps:
+
+- processed.txt: the result files already taken in
+- state.json: the run trend and each test's last HISTORY_DEPTH outcomes
+- runs/<n>.html: one page per generation, with the results that were new
+  in it and their attachments (copied to data/attachments/)
+- index.html: the latest run, the trend and every test's recent history,
+  rebuilt from state.json alone
+- history/history.json, history/history-trend.json and widgets/summary.json
+  in Allure's own formats. Copy history/ into a results directory to carry
+  the trend into an `allure generate` report.
+
+A generation lists the results directories, parses only the files not in
+processed.txt and adds them to the report as one run. Its cost follows
+the size of that run, not of the history:
+
+    python -m support.allure_report allure-results allure_results allure-resultspytest --report allure-report
+"""
+import argparse
+import html
+import json
+import logging
+import os
+import shutil
+import time
+
+from support.allure_results import duration_s, iter_steps, module_name, read_result
+
+STATUSES = ("failed", "broken", "skipped", "passed", "unknown")
+HISTORY_DEPTH = 20
+TREND_ROWS = 20
+
+STATUS_MARKS = {"passed": "✓", "failed": "✗", "broken": "!", "skipped": "-", "unknown": "?"}
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 2em; }}
+td, th {{ border: 1px solid #ccc; padding: 4px 8px; text-align: left; }}
+.passed {{ color: #2e7d32; }} .failed {{ color: #c62828; }} .broken {{ color: #ef6c00; }}
+.skipped, .unknown {{ color: #757575; }}
+</style></head>
+<body>
+<h1>{title}</h1>
+{body}
+</body></html>
+"""
+
+
+def statistic(results):
+    counts = dict.fromkeys(STATUSES, 0)
+    for result in results:
+        counts[result.get("status") if result.get("status") in counts else "unknown"] += 1
+    counts["total"] = len(results)
+    return counts
+
+
+def attachment_sources(result):
+    """Attachment files of a result and of all its steps."""
+    sources = [attachment["source"] for attachment in result.get("attachments", [])]
+    for _, step in iter_steps(result):
+        sources += [attachment["source"] for attachment in step.get("attachments", [])]
+    return sources
+
+
+class ReportState:
+    """What the report has taken in so far, loaded and saved around each generation."""
+
+    def __init__(self, report_dir):
+        self.report_dir = report_dir
+        self.processed_path = os.path.join(report_dir, "processed.txt")
+        self.state_path = os.path.join(report_dir, "state.json")
+        try:
+            with open(self.processed_path, encoding="utf-8") as f:
+                self.processed = set(f.read().split())
+        except OSError:
+            self.processed = set()
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {"runs": [], "history": {}}
+        self.runs = state["runs"]
+        self.history = state["history"]
+
+    def new_files(self, directories):
+        """(directory, file name) of every result file not taken in yet."""
+        found = []
+        for directory in directories:
+            with os.scandir(directory) as entries:
+                found += [(directory, entry.name) for entry in entries
+                          if entry.name.endswith("-result.json") and entry.name not in self.processed]
+        return sorted(found)
+
+    def add_run(self, results, files):
+        results = sorted(results, key=lambda result: result.get("start") or 0)
+        run = {
+            "order": len(self.runs) + 1,
+            "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "statistic": statistic(results),
+            "start": min((result["start"] for result in results if result.get("start")), default=None),
+            "stop": max((result["stop"] for result in results if result.get("stop")), default=None),
+        }
+        self.runs.append(run)
+        for result in results:
+            history_id = result.get("historyId") or result.get("fullName") or result["uuid"]
+            entry = self.history.setdefault(history_id, {"items": []})
+            entry.update(name=result.get("name"), fullName=result.get("fullName"), module=module_name(result))
+            entry["items"] = ([{"uid": result["uuid"], "status": result.get("status", "unknown"), "run": run["order"],
+                                "time": {"start": result.get("start"), "stop": result.get("stop"),
+                                         "duration": (result["stop"] - result["start"])
+                                         if result.get("start") and result.get("stop") else None}}]
+                              + entry["items"])[:HISTORY_DEPTH]
+            entry["statistic"] = statistic(entry["items"])
+        self.processed.update(name for _, name in files)
+        return run
+
+    def save(self, new_files):
+        with open(self.processed_path, "a", encoding="utf-8") as f:
+            f.writelines(f"{name}\n" for _, name in new_files)
+        write_json(self.state_path, {"runs": self.runs, "history": self.history})
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def write_page(path, title, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(PAGE.format(title=html.escape(title), body=body))
+    os.replace(f"{path}.tmp", path)
+
+
+def status_cell(status):
+    return f'<td class="{html.escape(status)}">{html.escape(status)}</td>'
+
+
+def statistic_row(counts):
+    return "".join(f"<td>{counts[status]}</td>" for status in STATUSES + ("total",))
+
+
+def write_run_page(report_dir, run, results, sources):
+    """The run's page, with its results' attachments copied next to the report."""
+    attachments_dir = os.path.join(report_dir, "data", "attachments")
+    os.makedirs(attachments_dir, exist_ok=True)
+    rows = []
+    for result in sorted(results, key=lambda result: (module_name(result), result.get("start") or 0)):
+        links = []
+        for source in attachment_sources(result):
+            if os.path.exists(os.path.join(sources[result["uuid"]], source)):
+                shutil.copy2(os.path.join(sources[result["uuid"]], source), attachments_dir)
+                links.append(f'<a href="../data/attachments/{html.escape(source)}">{html.escape(source.split("-")[-1])}</a>')
+        steps = "".join(f"<li>{html.escape(path)}: {html.escape(step.get('status', ''))}</li>"
+                        for path, step in iter_steps(result))
+        message = (result.get("statusDetails") or {}).get("message", "")
+        duration = duration_s(result)
+        rows.append(
+            f"<tr><td>{html.escape(module_name(result))}</td>"
+            f"<td><details><summary>{html.escape(result.get('name', ''))}</summary><ul>{steps}</ul></details></td>"
+            f"{status_cell(result.get('status', 'unknown'))}"
+            f"<td>{'' if duration is None else f'{duration:.1f}s'}</td>"
+            f"<td>{html.escape(message[:300])}</td><td>{' '.join(links)}</td></tr>")
+    body = (f"<table><tr>{''.join(f'<th>{status}</th>' for status in STATUSES + ('total',))}</tr>"
+            f"<tr>{statistic_row(run['statistic'])}</tr></table>"
+            "<table><tr><th>module</th><th>test</th><th>status</th><th>duration</th><th>message</th>"
+            f"<th>attachments</th></tr>{''.join(rows)}</table>"
+            '<p><a href="../index.html">all runs</a></p>')
+    write_page(os.path.join(report_dir, "runs", f"{run['order']}.html"), f"Run {run['order']} ({run['generated']})", body)
+
+
+def write_index(report_dir, state):
+    """index.html from the state alone: latest run, trend and each test's recent outcomes."""
+    latest = state.runs[-1]
+    trend = "".join(f'<tr><td><a href="runs/{run["order"]}.html">{run["order"]}</a></td>'
+                    f"<td>{run['generated']}</td>{statistic_row(run['statistic'])}</tr>"
+                    for run in reversed(state.runs[-TREND_ROWS:]))
+    tests = []
+    for entry in sorted(state.history.values(), key=lambda entry: (entry.get("module") or "", entry.get("name") or "")):
+        last = entry["items"][0]
+        passed = entry["statistic"]["passed"] / entry["statistic"]["total"]
+        duration = last["time"]["duration"]
+        tests.append(f"<tr><td>{html.escape(entry.get('module') or '')}</td><td>{html.escape(entry.get('name') or '')}</td>"
+                     f"{status_cell(last['status'])}<td>{passed:.0%}</td>"
+                     f"<td>{''.join(STATUS_MARKS.get(item['status'], '?') for item in reversed(entry['items']))}</td>"
+                     f"<td>{'' if duration is None else f'{duration / 1000:.1f}s'}</td>"
+                     f'<td><a href="runs/{last["run"]}.html">{last["run"]}</a></td></tr>')
+    headers = "".join(f"<th>{status}</th>" for status in STATUSES + ("total",))
+    body = (f'<h2>Latest run: <a href="runs/{latest["order"]}.html">{latest["order"]}</a> ({latest["generated"]})</h2>'
+            f"<table><tr>{headers}</tr><tr>{statistic_row(latest['statistic'])}</tr></table>"
+            f"<h2>Trend</h2><table><tr><th>run</th><th>generated</th>{headers}</tr>{trend}</table>"
+            f"<h2>Tests</h2><table><tr><th>module</th><th>test</th><th>last status</th><th>passed</th>"
+            f"<th>last {HISTORY_DEPTH} (oldest first)</th><th>last duration</th><th>last run</th></tr>{''.join(tests)}</table>")
+    write_page(os.path.join(report_dir, "index.html"), "Allure results", body)
+
+
+def write_allure_history(report_dir, state):
+    """history.json, history-trend.json and summary.json as Allure's own report writes them."""
+    write_json(os.path.join(report_dir, "history", "history.json"),
+               {history_id: {"statistic": entry["statistic"],
+                             "items": [{key: item[key] for key in ("uid", "status", "time")} for item in entry["items"]]}
+                for history_id, entry in state.history.items()})
+    write_json(os.path.join(report_dir, "history", "history-trend.json"),
+               [{"buildOrder": run["order"], "reportName": "Allure results",
+                 "data": {key: run["statistic"][key] for key in STATUSES + ("total",)}}
+                for run in reversed(state.runs)])
+    latest = state.runs[-1]
+    write_json(os.path.join(report_dir, "widgets", "summary.json"),
+               {"reportName": "Allure results", "statistic": latest["statistic"],
+                "time": {"start": latest["start"], "stop": latest["stop"],
+                         "duration": latest["stop"] - latest["start"] if latest["start"] and latest["stop"] else None}})
+
+
+def generate(directories, report_dir="allure-report"):
+    """Add the results new since the last generation as a run; returns its timing, or None when none are new."""
+    started = time.perf_counter()
+    os.makedirs(report_dir, exist_ok=True)
+    state = ReportState(report_dir)
+    files = state.new_files(directories)
+    if not files:
+        return None
+
+    results, sources = [], {}
+    for directory, name in files:
+        result = read_result(os.path.join(directory, name))
+        if result is not None and "uuid" in result:
+            results.append(result)
+            sources[result["uuid"]] = directory
+    run = state.add_run(results, files)
+    write_run_page(report_dir, run, results, sources)
+    write_index(report_dir, state)
+    write_allure_history(report_dir, state)
+    state.save(files)
+    return {"run": run["order"], "new_results": len(results), "processed_total": len(state.processed),
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add new Allure results to an incrementally built HTML report")
+    parser.add_argument("results", nargs="+", help="Allure results directories")
+    parser.add_argument("--report", default="allure-report", help="Report directory, kept between generations")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    summary = generate(args.results, args.report)
+    if summary is None:
+        print("No new results, report is up to date")
+        return
+    print(f"Run {summary['run']}: {summary['new_results']} new results "
+          f"({summary['processed_total']} in the report) in {summary['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
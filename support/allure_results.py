@@ -0,0 +1,49 @@
+"""Readers for the *-result.json files allure-pytest writes."""
+import glob
+import json
+import logging
+import os
+
+
+def read_result(path):
+    """One *-result.json file, or None (with a warning) when it cannot be read."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Skipping unreadable Allure result {path}: {str(e)}")
+        return None
+
+
+def iter_results(directory):
+    """Yield every test result in an Allure results directory or run archive (support.allure_archive)."""
+    if os.path.exists(os.path.join(directory, "results.jsonl")):
+        from support.allure_archive import RunArchive
+        with RunArchive(directory) as archive:
+            yield from archive.results()
+        return
+    for path in sorted(glob.glob(os.path.join(directory, "*-result.json"))):
+        result = read_result(path)
+        if result is not None:
+            yield result
+
+
+def module_name(result):
+    """Test module of a result, from its fullName ('test_creator_pages#test_open_application')."""
+    return result.get("fullName", "").split("#")[0].rsplit(".", 1)[-1]
+
+
+def duration_s(entry):
+    """Duration of a test or step in seconds, or None when it has no timing."""
+    if entry.get("start") is None or entry.get("stop") is None:
+        return None
+    return (entry["stop"] - entry["start"]) / 1000
+
+
+def iter_steps(result):
+    """Yield (path, step) for every step of a result, depth first; path joins nested names with ' > '."""
+    stack = [(step["name"], step) for step in reversed(result.get("steps", []))]
+    while stack:
+        path, step = stack.pop()
+        yield path, step
+        stack.extend((f"{path} > {child['name']}", child) for child in reversed(step.get("steps", [])))
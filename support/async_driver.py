@@ -0,0 +1,407 @@
+"""
+asyncio WebDriver client for running many browser sessions from one thread.
+
+Speaks the W3C WebDriver protocol to chromedriver (or a Selenium Grid) over
+keep-alive HTTP connections opened with asyncio, so a session waiting on the
+browser costs a suspended coroutine instead of a blocked thread. It covers
+the commands the test modules use: get, find, click, send_keys, clear,
+execute_script, screenshots and frame switching. The matching waits are in
+support.async_ec.
+
+    async with AsyncChromedriver() as server:
+        driver = await AsyncDriver.start(server.url)
+        await driver.get(f"{BASE_URL}/index")
+        field = await AsyncWait(driver, 10).until(AEC.presence_of_element_located((By.NAME, "username")))
+        await field.send_keys("creator@site.com")
+        await driver.quit()
+
+    python -m support.async_driver --sessions 30   # log 30 sessions in from one event loop
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import shutil
+import socket
+import ssl
+import time
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import (ElementClickInterceptedException, ElementNotInteractableException,
+                                        InvalidSelectorException, JavascriptException, NoSuchElementException,
+                                        NoSuchFrameException, StaleElementReferenceException, TimeoutException,
+                                        WebDriverException)
+from selenium.webdriver.common.by import By
+
+from support.config import BASE_URL, GRID_URL, PASSWORD, USERS
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+ERRORS = {
+    "no such element": NoSuchElementException,
+    "stale element reference": StaleElementReferenceException,
+    "element not interactable": ElementNotInteractableException,
+    "element click intercepted": ElementClickInterceptedException,
+    "invalid selector": InvalidSelectorException,
+    "javascript error": JavascriptException,
+    "no such frame": NoSuchFrameException,
+    "timeout": TimeoutException,
+    "script timeout": TimeoutException,
+}
+
+
+def locator(by, value):
+    """W3C locator for a Selenium By strategy (id, name and class name become CSS, as Selenium does)."""
+    if by == By.ID:
+        return "css selector", f'[id="{value}"]'
+    if by == By.NAME:
+        return "css selector", f'[name="{value}"]'
+    if by == By.CLASS_NAME:
+        return "css selector", f".{value}"
+    return by, value
+
+
+class HttpConnection:
+    """One keep-alive HTTP/1.1 connection; requests on it are serialised."""
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported WebDriver URL scheme in {url!r}; expected http or https")
+        self.host = parsed.hostname
+        # A Grid behind TLS is reached over https; chromedriver itself only speaks plain http
+        self.ssl = ssl.create_default_context() if parsed.scheme == "https" else None
+        self.port = parsed.port or (443 if self.ssl else 80)
+        self.prefix = parsed.path.rstrip("/")
+        self.reader = self.writer = None
+        self.lock = asyncio.Lock()
+
+    async def request(self, method, path, payload=None):
+        async with self.lock:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            head = (f"{method} {self.prefix}{path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(body)}\r\n"
+                    "Connection: keep-alive\r\n\r\n")
+            while True:
+                reused = self.writer is not None
+                if not reused:
+                    self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+                try:
+                    self.writer.write(head.encode("ascii") + body)
+                    await self.writer.drain()
+                    return await self.read_response()
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    self.close()
+                    # Only an idle keep-alive connection closed by the server is retried, on a new one
+                    if not reused:
+                        raise
+
+    async def read_response(self):
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            data = b"".join(chunks)
+        else:
+            data = await self.reader.readexactly(int(headers.get("content-length", "0")))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class AsyncElement:
+    def __init__(self, driver, element_id):
+        self.driver = driver
+        self.id = element_id
+
+    def command(self, method, suffix="", payload=None):
+        return self.driver.command(method, f"/element/{self.id}{suffix}", payload)
+
+    async def click(self):
+        await self.command("POST", "/click", {})
+
+    async def send_keys(self, *values):
+        text = "".join(str(value) for value in values)
+        await self.command("POST", "/value", {"text": text, "value": list(text)})
+
+    async def clear(self):
+        await self.command("POST", "/clear", {})
+
+    async def text(self):
+        return await self.command("GET", "/text")
+
+    async def get_attribute(self, name):
+        # Selenium's get_attribute falls back from property to attribute; this does the same in-page
+        return await self.driver.execute_script(
+            "var e = arguments[0], n = arguments[1];"
+            "var v = e[n]; return (v === undefined || v === null || typeof v === 'object') ? e.getAttribute(n) : v;",
+            self, name)
+
+    async def is_displayed(self):
+        return await self.command("GET", "/displayed")
+
+    async def is_enabled(self):
+        return await self.command("GET", "/enabled")
+
+    async def find_element(self, by, value):
+        using, value = locator(by, value)
+        return self.driver.wrap(await self.command("POST", "/element", {"using": using, "value": value}))
+
+    async def find_elements(self, by, value):
+        using, value = locator(by, value)
+        return self.driver.wrap(await self.command("POST", "/elements", {"using": using, "value": value}))
+
+    async def screenshot_as_png(self):
+        return base64.b64decode(await self.command("GET", "/screenshot"))
+
+
+class AsyncDriver:
+    """One WebDriver session driven from asyncio."""
+
+    def __init__(self, connection, session_id):
+        self.connection = connection
+        self.session_id = session_id
+
+    @classmethod
+    async def start(cls, server_url=None, headless=True, arguments=()):
+        """Open a Chrome session on chromedriver or a Grid at server_url."""
+        connection = HttpConnection(server_url or GRID_URL)
+        chrome_args = (["--headless=new"] if headless else []) + list(arguments)
+        payload = {"capabilities": {"alwaysMatch": {"browserName": "chrome",
+                                                     "goog:chromeOptions": {"args": chrome_args}}}}
+        driver = cls(connection, None)
+        value = await driver.send("POST", "/session", payload)
+        driver.session_id = value["sessionId"]
+        return driver
+
+    async def send(self, method, path, payload=None):
+        status, data = await self.connection.request(method, path, payload)
+        value = json.loads(data or b"{}").get("value")
+        if status >= 400 or (isinstance(value, dict) and "error" in value):
+            error = value.get("error", "unknown error") if isinstance(value, dict) else "unknown error"
+            message = value.get("message", "") if isinstance(value, dict) else ""
+            raise ERRORS.get(error, WebDriverException)(f"{error}: {message}")
+        return value
+
+    def command(self, method, path, payload=None):
+        return self.send(method, f"/session/{self.session_id}{path}", payload)
+
+    def wrap(self, value):
+        """Turn element references in a response into AsyncElements."""
+        if isinstance(value, list):
+            return [self.wrap(item) for item in value]
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return AsyncElement(self, value[ELEMENT_KEY])
+            return {key: self.wrap(item) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def unwrap(value):
+        if isinstance(value, AsyncElement):
+            return {ELEMENT_KEY: value.id}
+        if isinstance(value, (list, tuple)):
+            return [AsyncDriver.unwrap(item) for item in value]
+        return value
+
+    async def get(self, url):
+        await self.command("POST", "/url", {"url": url})
+
+    async def current_url(self):
+        return await self.command("GET", "/url")
+
+    async def title(self):
+        return await self.command("GET", "/title")
+
+    async def find_element(self, by, value):
+        using, value = locator(by, value)
+        return self.wrap(await self.command("POST", "/element", {"using": using, "value": value}))
+
+    async def find_elements(self, by, value):
+        using, value = locator(by, value)
+        return self.wrap(await self.command("POST", "/elements", {"using": using, "value": value}))
+
+    async def execute_script(self, script, *args):
+        return self.wrap(await self.command("POST", "/execute/sync",
+                                            {"script": script, "args": self.unwrap(args)}))
+
+    async def execute_async_script(self, script, *args):
+        return self.wrap(await self.command("POST", "/execute/async",
+                                            {"script": script, "args": self.unwrap(args)}))
+
+    async def set_script_timeout(self, seconds):
+        await self.command("POST", "/timeouts", {"script": int(seconds * 1000)})
+
+    async def get_screenshot_as_png(self):
+        return base64.b64decode(await self.command("GET", "/screenshot"))
+
+    async def save_screenshot(self, path):
+        png = await self.get_screenshot_as_png()
+        with open(path, "wb") as f:
+            f.write(png)
+        return path
+
+    async def switch_to_frame(self, frame):
+        """Switch into a frame given as an AsyncElement or index; None goes back to the top document."""
+        await self.command("POST", "/frame", {"id": self.unwrap(frame)})
+
+    async def switch_to_default_content(self):
+        await self.switch_to_frame(None)
+
+    async def switch_to_parent_frame(self):
+        await self.command("POST", "/frame/parent", {})
+
+    async def get_cookies(self):
+        return await self.command("GET", "/cookie")
+
+    async def add_cookie(self, cookie):
+        await self.command("POST", "/cookie", {"cookie": cookie})
+
+    async def quit(self):
+        try:
+            await self.command("DELETE", "")
+        finally:
+            self.connection.close()
+
+
+class AsyncWait:
+    """Async counterpart of WebDriverWait for the conditions in support.async_ec."""
+
+    def __init__(self, driver, timeout, poll_frequency=0.5,
+                 ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.ignored_exceptions = ignored_exceptions
+
+    async def until(self, condition, message=""):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                value = await condition(self.driver)
+                if value:
+                    return value
+            except self.ignored_exceptions:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutException(message)
+            await asyncio.sleep(self.poll_frequency)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AsyncChromedriver:
+    """A local chromedriver process; one of them serves any number of sessions."""
+
+    def __init__(self, path=None, port=None):
+        self.path = path or os.environ.get("ZPS_CHROMEDRIVER") or shutil.which("chromedriver")
+        self.port = port or free_port()
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def __aenter__(self):
+        if not self.path:
+            raise WebDriverException("chromedriver not found; put it on PATH or set ZPS_CHROMEDRIVER")
+        self.process = await asyncio.create_subprocess_exec(
+            self.path, f"--port={self.port}", stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        connection = HttpConnection(self.url)
+        for _ in range(100):
+            try:
+                status, _ = await connection.request("GET", "/status")
+                if status == 200:
+                    break
+            except OSError:
+                # Not listening yet
+                pass
+            await asyncio.sleep(0.1)
+        connection.close()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.process.terminate()
+        await self.process.wait()
+
+
+async def login(driver, role, base_url=BASE_URL):
+    """Async version of support.driver.login."""
+    from support import async_ec as AEC
+
+    await driver.get(f"{base_url}/index")
+    username_field = await AsyncWait(driver, 10).until(
+        AEC.presence_of_element_located((By.XPATH, "//input[@placeholder='Username']")))
+    await username_field.send_keys(USERS[role])
+    await (await driver.find_element(By.XPATH, "//input[@placeholder='Password']")).send_keys(PASSWORD)
+    await (await AsyncWait(driver, 10).until(
+        AEC.element_to_be_clickable((By.XPATH, "//input[@name='login_button']")))).click()
+    await AsyncWait(driver, 10).until(AEC.invisibility_of_element_located((By.NAME, "login_button")))
+
+
+async def login_sessions(server_url, sessions, role, base_url=BASE_URL):
+    """Open sessions browsers and log each one in, all from this event loop; returns per-session seconds."""
+
+    async def one():
+        started = time.perf_counter()
+        driver = await AsyncDriver.start(server_url)
+        try:
+            await login(driver, role, base_url)
+        finally:
+            await driver.quit()
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(one() for _ in range(sessions)))
+
+
+async def run_logins(sessions, role, base_url):
+    if GRID_URL:
+        return await login_sessions(GRID_URL, sessions, role, base_url)
+    async with AsyncChromedriver() as server:
+        return await login_sessions(server.url, sessions, role, base_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log many browser sessions in from one asyncio event loop")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--role", default="creator", choices=sorted(USERS))
+    parser.add_argument("--base-url", default=BASE_URL)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    durations = asyncio.run(run_logins(args.sessions, args.role, args.base_url))
+    wall_s = time.perf_counter() - started
+    print(json.dumps({"sessions": args.sessions, "wall_s": round(wall_s, 2),
+                      "slowest_session_s": round(max(durations), 2),
+                      "sum_of_sessions_s": round(sum(durations), 2)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Async versions of the expected_conditions the test modules wait on.
+
+Each factory takes the same arguments as its selenium counterpart and
+returns a coroutine function of the driver, for use with
+support.async_driver.AsyncWait:
+
+    from support import async_ec as AEC
+    button = await AsyncWait(driver, 10).until(AEC.element_to_be_clickable((By.XPATH, xpath)))
+"""
+from selenium.common.exceptions import NoSuchElementException, NoSuchFrameException, StaleElementReferenceException
+
+
+def presence_of_element_located(locator):
+    async def condition(driver):
+        return await driver.find_element(*locator)
+    return condition
+
+
+def visibility_of_element_located(locator):
+    async def condition(driver):
+        element = await driver.find_element(*locator)
+        return element if await element.is_displayed() else False
+    return condition
+
+
+def invisibility_of_element_located(locator):
+    async def condition(driver):
+        try:
+            element = await driver.find_element(*locator)
+            return not await element.is_displayed()
+        except (NoSuchElementException, StaleElementReferenceException):
+            return True
+    return condition
+
+
+def element_to_be_clickable(mark):
+    """mark is a locator tuple or an AsyncElement, as with EC.element_to_be_clickable."""
+    async def condition(driver):
+        element = await driver.find_element(*mark) if isinstance(mark, tuple) else mark
+        return element if await element.is_displayed() and await element.is_enabled() else False
+    return condition
+
+
+def staleness_of(element):
+    async def condition(driver):
+        try:
+            await element.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return True
+    return condition
+
+
+def title_contains(title):
+    async def condition(driver):
+        return title in await driver.title()
+    return condition
+
+
+def frame_to_be_available_and_switch_to_it(frame):
+    """frame is a locator tuple, an AsyncElement or an index."""
+    async def condition(driver):
+        try:
+            target = await driver.find_element(*frame) if isinstance(frame, tuple) else frame
+            await driver.switch_to_frame(target)
+            return True
+        except NoSuchFrameException:
+            return False
+    return condition
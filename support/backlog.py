@@ -0,0 +1,92 @@
+"""
+Work through a queue of content items one at a time and report on it.
+
+Shared by batch moderation and batch approval: each item is handed to an
+action that opens, acts on and verifies it and raises when that fails.
+Transient failures (timeouts, stale elements, a dropped page) are retried;
+anything else fails the item and the run moves on to the next one.
+"""
+import logging
+import math
+import statistics
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+from urllib3.exceptions import MaxRetryError, ProtocolError
+
+# Failures worth another attempt; any other WebDriverException (an invalid selector, an element that
+# cannot be clicked) would fail the same way again
+TRANSIENT = (TimeoutException, StaleElementReferenceException)
+
+# Connection to the browser or the page lost mid-action: the driver's HTTP connection, or chromedriver's
+# own link to the tab
+CONNECTION_ERRORS = (ConnectionError, MaxRetryError, ProtocolError)
+CONNECTION_LOST = ("chrome not reachable", "disconnected", "not connected to devtools", "target frame detached",
+                   "page crash")
+
+
+def transient(error):
+    """Whether a failed attempt is worth retrying."""
+    if isinstance(error, TRANSIENT + CONNECTION_ERRORS):
+        return True
+    return isinstance(error, WebDriverException) and any(lost in str(error.msg).lower() for lost in CONNECTION_LOST)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values (0 < fraction <= 1)."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)] if ordered else None
+
+
+def latency_summary(latencies):
+    if not latencies:
+        return None
+    return {"median": round(statistics.median(latencies), 3), "p95": round(percentile(latencies, 0.95), 3),
+            "max": round(max(latencies), 3)}
+
+
+def work_through(queue, action, retries=0, backoff=1.0):
+    """Run action(item) for every item; returns one result dict per item.
+
+    latency_s is the successful attempt's time; attempts counts the tries.
+    """
+    results = []
+    for item in queue:
+        for attempt in range(1, retries + 2):
+            started = time.perf_counter()
+            try:
+                action(item)
+                results.append({**item, "ok": True, "attempts": attempt,
+                                "latency_s": round(time.perf_counter() - started, 3)})
+                break
+            except Exception as e:
+                if transient(e) and attempt <= retries:
+                    logging.info(f"{item['kind']} '{item['title']}' attempt {attempt} failed, retrying: {str(e)}")
+                    time.sleep(backoff * attempt)
+                    continue
+                error = e
+            logging.warning(f"{item['kind']} '{item['title']}' failed: {str(error)}")
+            results.append({**item, "ok": False, "attempts": attempt,
+                            "latency_s": round(time.perf_counter() - started, 3), "error": str(error)})
+            break
+    return results
+
+
+def report(queue, results, read_s, wall_s, kinds):
+    """Throughput and latency of a run over queue."""
+    done = [result["latency_s"] for result in results if result["ok"]]
+    return {
+        "pending": len(queue),
+        "attempted": len(results),
+        "succeeded": len(done),
+        "failed": len(results) - len(done),
+        "retried": sum(1 for result in results if result["attempts"] > 1),
+        "queue_read_s": round(read_s, 2),
+        "wall_s": round(wall_s, 2),
+        "items_per_minute": round(len(done) / wall_s * 60, 1) if wall_s else None,
+        "latency_s": latency_summary(done),
+        "latency_s_by_kind": {kind: latency_summary([result["latency_s"] for result in results
+                                                     if result["ok"] and result["kind"] == kind])
+                              for kind in kinds},
+        "items": results,
+    }
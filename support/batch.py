@@ -0,0 +1,174 @@
+"""
+Fuse a step's DOM lookups and DOM-only actions into single script calls.
+
+A Batch records what a step does to the page. Consecutive lookups (with
+their visibility waits, and <select> options by index), scrollIntoView,
+attribute and text reads are sent as one execute_async_script round trip
+that polls in the page for the elements. Typing, clicking and choosing an
+option stay native WebDriver commands, since only those produce trusted
+input events; the batch breaks around them and hands the elements it
+already found to the native command.
+
+    batch = Batch(driver)
+    name = batch.find((By.XPATH, '//*[@name="name"]'), visible=True)
+    batch.scroll_into_view(name)
+    batch.send_keys(name, ITEM_TITLE)
+    batch.run()
+"""
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+# Runs one segment of DOM operations. Lookups poll until their element is
+# there (and visible, when asked) or the timeout passes.
+SEGMENT_SCRIPT = """
+var ops = arguments[0], known = arguments[1], timeout = arguments[2], done = arguments[arguments.length - 1];
+var els = known || {}, values = {}, deadline = Date.now() + timeout;
+
+function locate(by, value) {
+  if (by === 'xpath') {
+    return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+  }
+  if (by === 'id') { return document.getElementById(value); }
+  if (by === 'name') { return document.getElementsByName(value)[0] || null; }
+  if (by === 'class name') { return document.getElementsByClassName(value)[0] || null; }
+  if (by === 'tag name') { return document.getElementsByTagName(value)[0] || null; }
+  return document.querySelector(value);
+}
+
+function visible(e) {
+  return !!(e.offsetWidth || e.offsetHeight || e.getClientRects().length) &&
+    window.getComputedStyle(e).visibility !== 'hidden';
+}
+
+function step(i) {
+  for (; i < ops.length; i++) {
+    var op = ops[i], e = els[op.ref];
+    if (op.kind === 'find') {
+      var found = locate(op.by, op.value);
+      if (!found || ((op.visible || op.clickable) && !visible(found)) || (op.clickable && found.disabled)) {
+        if (Date.now() > deadline) { done({error: op.by + '=' + op.value}); return; }
+        setTimeout(function () { step(i); }, 100);
+        return;
+      }
+      els[op.id] = found;
+    } else if (op.kind === 'scroll') {
+      e.scrollIntoView(true);
+    } else if (op.kind === 'option') {
+      if (!e.options[op.index]) { done({missing: 'option ' + op.index + ' of <select name=' + e.name + '>'}); return; }
+      els[op.id] = e.options[op.index];
+      values[op.id] = e.options[op.index].selected;
+    } else if (op.kind === 'attribute') {
+      var v = e[op.name];
+      values[op.id] = (v === undefined || v === null || typeof v === 'object') ? e.getAttribute(op.name) : v;
+    } else if (op.kind === 'text') {
+      values[op.id] = e.innerText;
+    }
+  }
+  done({elements: els, values: values});
+}
+step(0);
+"""
+
+SCRIPT_OPS = ("find", "scroll", "option", "attribute", "text")
+
+
+class Handle:
+    """Result of one recorded operation: an element for find, a value for reads, after run()."""
+
+    def __init__(self, op_id):
+        self.id = op_id
+        self.value = None
+        # For options: whether it was already selected when looked up
+        self.selected = False
+
+
+class Batch:
+    """Records a step's page operations and runs them with as few round trips as is safe."""
+
+    def __init__(self, driver, timeout=10):
+        self.driver = driver
+        self.timeout = timeout
+        self.ops = []
+        self.handles = []
+
+    def record(self, kind, ref=None, **fields):
+        handle = Handle(len(self.handles))
+        self.handles.append(handle)
+        self.ops.append({"kind": kind, "id": handle.id, "ref": ref.id if ref is not None else None, **fields})
+        return handle
+
+    def find(self, locator, visible=False, clickable=False):
+        """Wait for the element at a (By, value) locator.
+
+        Plain, visible and clickable lookups match presence_of_element_located,
+        visibility_of_element_located and element_to_be_clickable.
+        """
+        by, value = locator
+        return self.record("find", by=by, value=value, visible=visible, clickable=clickable)
+
+    def scroll_into_view(self, element):
+        return self.record("scroll", element)
+
+    def option(self, element, index):
+        """The <select>'s option at index, looked up with the rest of the segment."""
+        return self.record("option", element, index=index)
+
+    def select_by_index(self, element, index):
+        """Native: clicks the option unless it is already selected, as Select.select_by_index does."""
+        return self.record("select", self.option(element, index))
+
+    def attribute(self, element, name):
+        return self.record("attribute", element, name=name)
+
+    def text(self, element):
+        return self.record("text", element)
+
+    def send_keys(self, element, *keys):
+        """Native: typing needs trusted key events."""
+        return self.record("send_keys", element, keys=keys)
+
+    def click(self, element):
+        """Native: clicks need trusted pointer events."""
+        return self.record("click", element)
+
+    def run_segment(self, ops):
+        known = {str(handle.id): handle.value for handle in self.handles if handle.value is not None
+                 and any(op["ref"] == handle.id for op in ops)}
+        script_ops = [{**op, "id": str(op["id"]), "ref": None if op["ref"] is None else str(op["ref"])} for op in ops]
+        # The page gives up half a second before the script timeout, to report which lookup failed
+        self.driver.set_script_timeout(self.timeout)
+        result = self.driver.execute_async_script(SEGMENT_SCRIPT, script_ops, known, self.timeout * 1000 - 500)
+        if "error" in result:
+            raise TimeoutException(f"Batched lookup timed out after {self.timeout}s: {result['error']}")
+        if "missing" in result:
+            raise NoSuchElementException(f"Batched lookup found no {result['missing']}")
+        for op in ops:
+            handle = self.handles[op["id"]]
+            if op["kind"] == "find":
+                handle.value = result["elements"][str(op["id"])]
+            elif op["kind"] == "option":
+                handle.value = result["elements"][str(op["id"])]
+                handle.selected = result["values"][str(op["id"])]
+            elif op["kind"] in ("attribute", "text"):
+                handle.value = result["values"].get(str(op["id"]))
+
+    def run(self):
+        """Send the recorded operations; returns the handles in recording order."""
+        segment = []
+        for op in self.ops:
+            if op["kind"] in SCRIPT_OPS:
+                segment.append(op)
+                continue
+            if segment:
+                self.run_segment(segment)
+                segment = []
+            element = self.handles[op["ref"]].value
+            if op["kind"] == "send_keys":
+                element.send_keys(*op["keys"])
+            elif op["kind"] == "click":
+                element.click()
+            elif op["kind"] == "select" and not self.handles[op["ref"]].selected:
+                element.click()
+        if segment:
+            self.run_segment(segment)
+        self.ops = []
+        return self.handles
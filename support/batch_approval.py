@@ -0,0 +1,101 @@
+"""
+Approve every moderated item in one authenticated session.
+
+The approver modules approve one 'Automation text' row per run. This
+collects every Moderated row across all pages of the Main Menu and Pages
+tables, then for each opens the row's edit (menu) or view (page) URL,
+clicks the approve button (menu_approve_btn, or the page's btn-success)
+and checks the success flash. Timeouts, stale elements and dropped pages
+are retried with the item reopened from its URL; approving is idempotent,
+so an attempt that did go through before failing is harmless to repeat.
+
+    python -m support.batch_approval --retries 2
+
+Throughput and p95 approval latency go to perf_history/batch_approval.json.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from support.backlog import report, work_through
+from support.config import BASE_URL, PERF_DIR
+from support.flash import wait_for_flash
+from support.locators import find
+from support.page_objects import MenuForm, MenuList, PageForm, PageList
+from support.sessions import logged_in_driver
+from support.tables import MENU_COLUMNS, PAGE_COLUMNS, find_row, read_queue
+
+PENDING_STATUS = "Moderated"
+
+# The Main Menu module accepts any success alert after approving; Pages checks the text
+KINDS = {
+    "menu": {"list": "/menu", "columns": MENU_COLUMNS, "link": "/edit/", "open": MenuList.EDIT_BUTTON,
+             "approve": MenuForm.APPROVE, "message": None},
+    "page": {"list": "/pages", "columns": PAGE_COLUMNS, "link": "/view/", "open": PageList.VIEW_BUTTON,
+             "approve": PageForm.APPROVE, "message": "Data Approved successfully!"},
+}
+
+
+def read_moderated(driver, base_url, kinds):
+    """The approval queue: every Moderated row of each kind's list, across all its pages."""
+    queue = []
+    for kind in kinds:
+        spec = KINDS[kind]
+        driver.get(f"{base_url}{spec['list']}")
+        queue += [dict(item, kind=kind) for item in read_queue(driver, PENDING_STATUS, spec["columns"], spec["link"])]
+    return queue
+
+
+def approve_item(driver, base_url, item):
+    """Open, approve and verify one item."""
+    spec = KINDS[item["kind"]]
+    if item["href"]:
+        driver.get(item["href"])
+    else:
+        # No link in the row (a scripted button): go through the list
+        driver.get(f"{base_url}{spec['list']}")
+        row = find_row(driver, item["title"], PENDING_STATUS, spec["columns"])
+        if row is None:
+            raise Exception(f"Row '{item['title']}' is no longer {PENDING_STATUS}")
+        find(driver, spec["open"], clickable=True, root=row).click()
+    find(driver, spec["approve"], clickable=True).click()
+    wait_for_flash(driver, spec["message"])
+
+
+def approve_queue(driver, base_url=BASE_URL, kinds=tuple(KINDS), limit=None, retries=2):
+    """Approve the moderated items of kinds with driver (logged in as approver) and return the report."""
+    started = time.perf_counter()
+    queue = read_moderated(driver, base_url, kinds)
+    read_s = time.perf_counter() - started
+    logging.info(f"{len(queue)} items awaiting approval (queue read in {read_s:.1f}s)")
+
+    results = work_through(queue[:limit], lambda item: approve_item(driver, base_url, item), retries=retries)
+    return report(queue, results, read_s, time.perf_counter() - started, kinds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Approve every moderated menu and page in one session")
+    parser.add_argument("--kind", action="append", choices=sorted(KINDS),
+                        help="List to work through (repeatable, default both)")
+    parser.add_argument("--limit", type=int, help="Stop after this many items")
+    parser.add_argument("--retries", type=int, default=2, help="Extra attempts for an item after a transient failure")
+    parser.add_argument("--base-url", default=BASE_URL)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    driver, _, _ = logged_in_driver("approver", args.base_url)
+    try:
+        result = approve_queue(driver, args.base_url, tuple(args.kind or KINDS), args.limit, args.retries)
+    finally:
+        driver.quit()
+
+    os.makedirs(PERF_DIR, exist_ok=True)
+    with open(os.path.join(PERF_DIR, "batch_approval.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(json.dumps({key: value for key, value in result.items() if key != "items"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
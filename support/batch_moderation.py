@@ -0,0 +1,103 @@
+"""
+Moderate every pending item in one authenticated session.
+
+The test modules moderate one row per run. This reads the moderator's queue
+(Main Menu and Pages rows in the Created status) once per list, then for
+each item opens its edit URL straight from the row's link, saves and checks
+the success flash. An item whose row has no link is opened from the list
+instead. The report gives throughput and per-item latency, to size how long
+a real backlog takes to clear:
+
+    python -m support.batch_moderation --kind menu --kind page --limit 50
+
+It is written to perf_history/batch_moderation.json.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from support.backlog import report, work_through
+from support.config import BASE_URL, PERF_DIR
+from support.flash import wait_for_flash
+from support.locators import find
+from support.page_objects import MenuForm, MenuList, PageForm, PageList
+from support.sessions import logged_in_driver
+from support.tables import MENU_COLUMNS, PAGE_COLUMNS, find_row, read_queue
+
+PENDING_STATUS = "Created"
+
+# The Main Menu module accepts any success alert after saving; Pages checks the text
+KINDS = {
+    "menu": {"list": "/menu", "columns": MENU_COLUMNS, "edit": MenuList.EDIT_BUTTON, "submit": MenuForm.SUBMIT,
+             "message": None},
+    "page": {"list": "/pages", "columns": PAGE_COLUMNS, "edit": PageList.EDIT_BUTTON, "submit": PageForm.SUBMIT,
+             "message": "Data Saved successfully!"},
+}
+
+
+def read_pending(driver, base_url, kinds):
+    """The moderation queue: every Created row of each kind's list, read once."""
+    queue = []
+    for kind in kinds:
+        driver.get(f"{base_url}{KINDS[kind]['list']}")
+        queue += [dict(item, kind=kind) for item in read_queue(driver, PENDING_STATUS, KINDS[kind]["columns"])]
+    return queue
+
+
+def open_from_list(driver, base_url, item):
+    spec = KINDS[item["kind"]]
+    driver.get(f"{base_url}{spec['list']}")
+    row = find_row(driver, item["title"], PENDING_STATUS, spec["columns"])
+    if row is None:
+        raise Exception(f"Row '{item['title']}' is no longer {PENDING_STATUS}")
+    find(driver, spec["edit"], clickable=True, root=row).click()
+
+
+def moderate_item(driver, base_url, item):
+    """Open, save and verify one item."""
+    if item["href"]:
+        driver.get(item["href"])
+    else:
+        # No link in the row (a scripted button): go through the list
+        open_from_list(driver, base_url, item)
+    spec = KINDS[item["kind"]]
+    find(driver, spec["submit"], clickable=True).click()
+    wait_for_flash(driver, spec["message"])
+
+
+def moderate_queue(driver, base_url=BASE_URL, kinds=tuple(KINDS), limit=None):
+    """Moderate the pending items of kinds with driver (logged in as moderator) and return the report."""
+    started = time.perf_counter()
+    queue = read_pending(driver, base_url, kinds)
+    read_s = time.perf_counter() - started
+    logging.info(f"{len(queue)} items pending moderation (queue read in {read_s:.1f}s)")
+
+    results = work_through(queue[:limit], lambda item: moderate_item(driver, base_url, item))
+    return report(queue, results, read_s, time.perf_counter() - started, kinds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moderate every pending menu and page in one session")
+    parser.add_argument("--kind", action="append", choices=sorted(KINDS),
+                        help="List to work through (repeatable, default both)")
+    parser.add_argument("--limit", type=int, help="Stop after this many items")
+    parser.add_argument("--base-url", default=BASE_URL)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    driver, _, _ = logged_in_driver("moderator", args.base_url)
+    try:
+        result = moderate_queue(driver, args.base_url, tuple(args.kind or KINDS), args.limit)
+    finally:
+        driver.quit()
+
+    os.makedirs(PERF_DIR, exist_ok=True)
+    with open(os.path.join(PERF_DIR, "batch_moderation.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(json.dumps({key: value for key, value in result.items() if key != "items"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
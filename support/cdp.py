@@ -0,0 +1,44 @@
+import json
+import logging
+
+
+class CdpEvents:
+    """Pump Chrome DevTools events out of chromedriver's performance log.
+
+    chromedriver hands out each performance log entry once, so every CDP
+    consumer on a driver subscribes here instead of reading the log itself.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.listeners = []
+
+    def subscribe(self, listener):
+        """Call listener(method, params) for every CDP event from now on."""
+        self.listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def poll(self):
+        """Dispatch all events buffered since the previous poll."""
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            for listener in list(self.listeners):
+                try:
+                    listener(message["method"], message.get("params", {}))
+                except Exception as e:
+                    logging.warning(f"CDP listener {listener!r} failed on {message['method']}: {str(e)}")
+
+
+def events(driver):
+    """Return the CdpEvents pump attached to driver by create_driver, or None."""
+    return getattr(driver, "cdp_events", None)
+
+
+def enable_performance_log(options):
+    """Ask chromedriver to record CDP Network/Page events in the performance log."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
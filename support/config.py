@@ -0,0 +1,120 @@
+import os
+
+# Root of the back office under test. Point this at the local stand-in
+# (python -m support.stand_in_cms) with ZPS_BASE_URL=http://127.0.0.1:8000
+BASE_URL = os.environ.get(
+    "ZPS_BASE_URL", "https://demo.karnataka.gov.in/zpshivamogga.karnataka.gov.in/public/back"
+).rstrip("/")
+
+# Shared password of the creator / moderator / approver demo accounts
+PASSWORD = os.environ.get("ZPS_PASSWORD", "01123")
+
+USERS = {
+    "creator": "creator@site.com",
+    "moderator": "moderator@site.com",
+    "approver": "approver@site.com",
+}
+
+
+def flag(name, default=False):
+    """True when the environment variable name is set to 1/true/yes."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+# Capture DataTables ajax responses over CDP and cross-check them with the DOM
+CDP_TABLE_CAPTURE = flag("ZPS_CDP_TABLE_CAPTURE")
+
+# Navigation Timing and CDP Performance.getMetrics for every step that navigates
+PAGE_METRICS = flag("ZPS_PAGE_METRICS", default=True)
+
+# Where run-over-run performance history and summaries are written
+PERF_DIR = os.environ.get("ZPS_PERF_DIR", "perf_history")
+
+# Per-test ("test") or per-step ("step") HAR files from CDP Network events; off when empty
+HAR_MODES = ("test", "step")
+HAR_CAPTURE = os.environ.get("ZPS_HAR", "").lower()
+if HAR_CAPTURE and HAR_CAPTURE not in HAR_MODES:
+    raise ValueError(f"ZPS_HAR={HAR_CAPTURE!r} is not a HAR mode; use one of {', '.join(HAR_MODES)}")
+HAR_DIR = os.environ.get("ZPS_HAR_DIR", "har")
+
+# CDP Fetch interception: fail requests to these domains (and subdomains)
+BLOCKED_DOMAINS = [domain.strip() for domain in os.environ.get("ZPS_BLOCK_DOMAINS", "").split(",") if domain.strip()]
+
+# Serve static assets from a persistent, ETag-validated local cache
+ASSET_CACHE = flag("ZPS_ASSET_CACHE")
+ASSET_CACHE_DIR = os.environ.get("ZPS_ASSET_CACHE_DIR", ".asset_cache")
+ASSET_CACHE_MB = int(os.environ.get("ZPS_ASSET_CACHE_MB", "200"))
+
+
+# Named throttling profile from support.network_profiles applied to every driver
+NETWORK_PROFILE = os.environ.get("ZPS_NETWORK_PROFILE", "")
+
+
+def run_variant():
+    """Label of the network setup of this run, used to compare page-load times between runs."""
+    labels = [NETWORK_PROFILE] if NETWORK_PROFILE else []
+    if BLOCKED_DOMAINS:
+        labels.append("blocking")
+    if ASSET_CACHE:
+        labels.append("asset-cache")
+    return "+".join(labels) or "baseline"
+
+
+# Sample CPU and RSS of chromedriver and its browser processes during each test (needs psutil)
+RESOURCE_SAMPLER = flag("ZPS_RESOURCE_SAMPLER")
+RESOURCE_SAMPLE_INTERVAL = float(os.environ.get("ZPS_RESOURCE_SAMPLE_INTERVAL", "0.5"))
+
+# Start a fresh browser between tests after this many steps / above this RSS; 0 disables
+RECYCLE_AFTER_STEPS = int(os.environ.get("ZPS_RECYCLE_AFTER_STEPS", "0"))
+RECYCLE_RSS_MB = int(os.environ.get("ZPS_RECYCLE_RSS_MB", "0"))
+
+
+# Creator → moderator → approver, so each role finds the item it needs. The menu
+# and page chains do not depend on each other and may run on different workers.
+FLOW_CHAINS = {
+    "menus": ["test_creator_menu.py", "test_moderator_main_menu.py", "test_approver_main_menu.py"],
+    "pages": ["test_creator_pages.py", "test_moderator_pages.py", "test_approver_pages.py"],
+}
+FLOWS = FLOW_CHAINS["menus"] + FLOW_CHAINS["pages"]
+
+# English title of the content item the role flows create, moderate and approve.
+# Grid shards each get their own item so they never touch each other's rows.
+ITEM_TITLE = os.environ.get("ZPS_ITEM_TITLE", "Automation text")
+SHARD = os.environ.get("ZPS_SHARD", "")
+SCREENSHOT_DIR = os.environ.get("ZPS_SCREENSHOT_DIR", "screenshots")
+
+# Record every flash alert from page load on, so success checks read a buffer instead of waiting
+FLASH_WATCHER = flag("ZPS_FLASH_WATCHER", default=True)
+
+# Which fallback of each page-object locator matched last, per page, kept across runs
+LOCATOR_HISTORY = os.environ.get("ZPS_LOCATOR_HISTORY", ".locator_history.json")
+
+# Latency budgets on steps: "warn" or "fail" when a step's rolling percentile is over budget, "off" to only record
+SLO_MODE = os.environ.get("ZPS_SLO_MODE", "warn").lower()
+SLO_WINDOW = int(os.environ.get("ZPS_SLO_WINDOW", "20"))
+SLO_MIN_SAMPLES = int(os.environ.get("ZPS_SLO_MIN_SAMPLES", "5"))
+
+# Record every browser's WebDriver commands and responses into this directory
+WEBDRIVER_RECORD = os.environ.get("ZPS_WEBDRIVER_RECORD", "")
+# Replay the recordings in this directory instead of starting Chrome; "original", "zero" or a latency multiplier
+WEBDRIVER_REPLAY = os.environ.get("ZPS_WEBDRIVER_REPLAY", "")
+REPLAY_TIMING = os.environ.get("ZPS_REPLAY_TIMING", "original").lower()
+
+# OTLP/JSON trace of tests, steps, waits and driver commands, appended to this file; off when empty
+TRACE_FILE = os.environ.get("ZPS_TRACE_FILE", "")
+
+# Pack the run's Allure results and attachments into this archive directory instead of loose files
+ALLURE_ARCHIVE = os.environ.get("ZPS_ALLURE_ARCHIVE", "")
+
+# Launch and log in every role's browser concurrently at session start
+PARALLEL_LOGIN = flag("ZPS_PARALLEL_LOGIN")
+
+# Remote WebDriver endpoint of a Selenium Grid (e.g. http://127.0.0.1:4444); local Chrome when empty
+GRID_URL = os.environ.get("ZPS_GRID_URL", "").rstrip("/")
+
+# The stand-in serves jQuery, DataTables and TinyMCE from this directory when they have been
+# fetched into it (python -m support.stand_in_cms --fetch-assets), and from their CDNs otherwise
+STAND_IN_ASSETS = os.environ.get("ZPS_STAND_IN_ASSETS", ".stand_in_assets")
@@ -0,0 +1,256 @@
+import abc
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from support import cdp, fetch_cache, flash, network_profiles, table_json, tracing, webdriver_replay
+from support.config import (ASSET_CACHE, BASE_URL, BLOCKED_DOMAINS, CDP_TABLE_CAPTURE, FLASH_WATCHER, GRID_URL,
+                            HAR_CAPTURE, NETWORK_PROFILE, PAGE_METRICS, PASSWORD, USERS, WEBDRIVER_RECORD,
+                            WEBDRIVER_REPLAY)
+
+
+# Drivers that have not been quit yet, most recent last
+ACTIVE_DRIVERS = []
+
+# True when the page holds input that a browser restart would throw away
+DIRTY_PAGE_SCRIPT = """
+if (window.tinymce && tinymce.editors && tinymce.editors.some(function (ed) { return ed.isDirty(); })) {
+  return true;
+}
+return Array.prototype.some.call(document.querySelectorAll('input, textarea, select'), function (e) {
+  if (e.type === 'checkbox' || e.type === 'radio') { return e.checked !== e.defaultChecked; }
+  if (e.tagName === 'SELECT') {
+    return Array.prototype.some.call(e.options, function (o) { return o.selected !== o.defaultSelected; });
+  }
+  if (e.type === 'file') { return e.files && e.files.length > 0; }
+  return e.type !== 'hidden' && e.type !== 'submit' && e.value !== e.defaultValue;
+});
+"""
+
+
+class ManagedBrowser(abc.ABC):
+    """Registry, instrumentation and restart shared by the local and Grid drivers."""
+
+    interceptor = None
+    # Role the session bootstrapper already logged this browser in as
+    logged_in_as = None
+    # False once restart() has quit the old browser and failed to launch its replacement
+    alive = True
+
+    @abc.abstractmethod
+    def launch(self):
+        """Start a new browser session for this driver object."""
+
+    def start_client(self):
+        # Runs before every new session, so a restarted browser goes on recording into the same file
+        if WEBDRIVER_RECORD and not isinstance(self.command_executor, webdriver_replay.ReplayConnection):
+            if "recorder" not in self.__dict__:
+                self.recorder = webdriver_replay.new_recorder(WEBDRIVER_RECORD, self)
+            self.command_executor = webdriver_replay.RecordingConnection(self.command_executor, self.recorder)
+
+    def set_script_timeout(self, time_to_wait):
+        # Table searches and batches set this before every async script; skip the round trip when unchanged
+        if getattr(self, "script_timeout", None) != time_to_wait:
+            super().set_script_timeout(time_to_wait)
+            self.script_timeout = time_to_wait
+
+    def execute(self, driver_command, params=None):
+        # One entry per round trip to the driver, read by the batching benchmark
+        self.__dict__.setdefault("command_counts", Counter())[driver_command] += 1
+        # Time spent waiting on the driver, kept apart from local work by --profile-tests
+        started = time.perf_counter()
+        # The calling thread's CPU inside the round trip (JSON, HTTP client); it is part of the wait
+        # above, so --profile-tests takes it out of that thread's CPU time
+        cpu_started = time.thread_time()
+        try:
+            with tracing.span(driver_command, tracing.CLIENT, **tracing.command_attributes(driver_command, params)):
+                return super().execute(driver_command, params)
+        finally:
+            self.driver_wait_s = self.__dict__.get("driver_wait_s", 0.0) + time.perf_counter() - started
+            cpu = self.__dict__.setdefault("driver_cpu_s", Counter())
+            cpu[threading.get_ident()] += time.thread_time() - cpu_started
+
+    def close_instrumentation(self):
+        if self.interceptor is not None:
+            self.interceptor.close()
+            self.interceptor = None
+
+    def quit(self):
+        if self in ACTIVE_DRIVERS:
+            ACTIVE_DRIVERS.remove(self)
+        self.close_instrumentation()
+        if self.alive:
+            super().quit()
+        if "recorder" in self.__dict__:
+            self.recorder.close()
+
+    def has_unsaved_input(self):
+        return bool(self.execute_script(DIRTY_PAGE_SCRIPT))
+
+    def shows_flash(self):
+        # A restart reloads the page in a new document, and wait_for_flash only reads the current one's alerts
+        return bool(flash.flash_messages(self))
+
+    def restart(self):
+        """Swap in a fresh browser under this same driver object.
+
+        Cookies, localStorage and the current URL are carried over, so the
+        new browser continues the authenticated session where the old one was.
+        """
+        url = self.current_url
+        cookies = self.get_cookies()
+        storage = self.execute_script("return JSON.stringify(Object.assign({}, window.localStorage));")
+
+        self.close_instrumentation()
+        super().quit()
+        self.alive = False
+        try:
+            self.launch()
+        except Exception:
+            # No browser behind this driver any more: take it out of use before the caller sees the error
+            if self in ACTIVE_DRIVERS:
+                ACTIVE_DRIVERS.remove(self)
+            raise
+        self.alive = True
+        # The new session starts with default timeouts
+        self.__dict__.pop("script_timeout", None)
+        self.maximize_window()
+        instrument(self)
+
+        # Cookies can only be set for the domain of the page currently loaded
+        parsed = urlparse(url)
+        self.get(f"{parsed.scheme}://{parsed.netloc}/")
+        for cookie in cookies:
+            self.add_cookie(cookie)
+        self.execute_script(
+            "var items = JSON.parse(arguments[0]);"
+            "Object.keys(items).forEach(function (k) { window.localStorage.setItem(k, items[k]); });",
+            storage or json.dumps({}),
+        )
+        self.get(url)
+
+
+class SharedChrome(ManagedBrowser, webdriver.Chrome):
+    """Chrome that registers itself so report plugins can reach the live browser."""
+
+    def __init__(self, options=None, **kwargs):
+        # Kept so restart() can launch an identical browser
+        self.launch_options = options
+        super().__init__(options=options, **kwargs)
+
+    def launch(self):
+        webdriver.Chrome.__init__(self, options=self.launch_options)
+
+
+class SharedRemote(ManagedBrowser, webdriver.Remote):
+    """Chrome on a Selenium Grid node, registered like SharedChrome."""
+
+    def __init__(self, command_executor, options=None):
+        self.launch_options = options
+        self.command_executor_url = command_executor
+        super().__init__(command_executor=command_executor, options=options)
+
+    def launch(self):
+        webdriver.Remote.__init__(self, command_executor=self.command_executor_url, options=self.launch_options)
+
+
+class ReplayBrowser(ManagedBrowser, webdriver.Remote):
+    """Answers from a WebDriver recording (support.webdriver_replay) in place of a browser."""
+
+    def __init__(self, connection):
+        self.replay_connection = connection
+        if connection.cdp:
+            # Recorded from Chrome: keep the CDP paths of instrument() and the plugins that were taken then
+            self.execute_cdp_cmd = self.replay_cdp_cmd
+        super().__init__(command_executor=connection, options=webdriver.ChromeOptions())
+
+    def launch(self):
+        webdriver.Remote.__init__(self, command_executor=self.replay_connection, options=webdriver.ChromeOptions())
+
+    def quit(self):
+        super().quit()
+        self.replay_connection.report()
+
+    def replay_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+
+def current_driver():
+    """The most recently started driver that is still running, or None."""
+    return ACTIVE_DRIVERS[-1] if ACTIVE_DRIVERS else None
+
+
+def make_current(driver):
+    """Mark driver as the one under test, e.g. when a pre-started browser is handed to a module."""
+    if driver in ACTIVE_DRIVERS:
+        ACTIVE_DRIVERS.remove(driver)
+        ACTIVE_DRIVERS.append(driver)
+
+
+def chrome_options():
+    options = webdriver.ChromeOptions()
+    if CDP_TABLE_CAPTURE or HAR_CAPTURE:
+        cdp.enable_performance_log(options)
+    return options
+
+
+def instrument(driver):
+    """Switch on the CDP features enabled in support.config for a freshly started browser."""
+    if FLASH_WATCHER:
+        flash.install(driver)
+    if not hasattr(driver, "execute_cdp_cmd"):
+        # Grid sessions have no chromedriver CDP endpoint to talk to
+        if CDP_TABLE_CAPTURE or HAR_CAPTURE or BLOCKED_DOMAINS or ASSET_CACHE or NETWORK_PROFILE:
+            logging.warning("CDP instrumentation is not available on Selenium Grid sessions and is skipped")
+        return
+    if PAGE_METRICS:
+        driver.execute_cdp_cmd("Performance.enable", {})
+    network_profiles.apply_profile(driver)
+
+    if CDP_TABLE_CAPTURE or HAR_CAPTURE:
+        driver.cdp_events = cdp.CdpEvents(driver)
+    if CDP_TABLE_CAPTURE:
+        table_json.attach(driver)
+    if BLOCKED_DOMAINS or ASSET_CACHE:
+        cache = fetch_cache.AssetCache() if ASSET_CACHE else None
+        driver.interceptor = fetch_cache.FetchInterceptor(driver, BLOCKED_DOMAINS, cache)
+
+
+def create_driver():
+    """Start the Chrome instance shared by a module's tests.
+
+    Optional CDP instrumentation is switched on from support.config; with
+    ZPS_GRID_URL set the browser is started on a Selenium Grid node instead,
+    and with ZPS_WEBDRIVER_REPLAY it is replayed from a recording.
+    """
+    if WEBDRIVER_REPLAY:
+        driver = ReplayBrowser(webdriver_replay.next_connection())
+    elif GRID_URL:
+        driver = SharedRemote(GRID_URL, options=chrome_options())
+    else:
+        driver = SharedChrome(options=chrome_options())
+    driver.maximize_window()
+    ACTIVE_DRIVERS.append(driver)
+    instrument(driver)
+    return driver
+
+
+def login(driver, role, base_url=BASE_URL):
+    """Log driver in as the creator, moderator or approver account."""
+    driver.get(f"{base_url}/index")
+    username_field = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Username']"))
+    )
+    username_field.send_keys(USERS[role])
+    driver.find_element(By.XPATH, "//input[@placeholder='Password']").send_keys(PASSWORD)
+    WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, "//input[@name='login_button']"))
+    ).click()
@@ -0,0 +1,243 @@
+"""
+Request blocking and a persistent static-asset cache through CDP Fetch.
+
+Paused requests must be answered while the page is loading, so FetchInterceptor
+talks to the browser's DevTools websocket on a background thread instead of
+going through chromedriver's performance log:
+
+* requests to a deny-listed domain (and its subdomains) are failed as
+  BlockedByClient;
+* stylesheets, scripts, fonts and images are revalidated with If-None-Match /
+  If-Modified-Since against AssetCache, and a 304 is fulfilled from the cached
+  body so it never crosses the network again.
+
+    ZPS_BLOCK_DOMAINS=google-analytics.com,fonts.googleapis.com ZPS_ASSET_CACHE=1 pytest
+"""
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from urllib.parse import urlparse
+
+import websocket
+
+from support.config import ASSET_CACHE_DIR, ASSET_CACHE_MB
+
+STATIC_TYPES = ("Stylesheet", "Script", "Font", "Image")
+
+# Fetch.getResponseBody hands back the decoded body, so these no longer describe what is stored
+BODY_ENCODING_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+# Cache-Control directives that forbid keeping the response around
+UNCACHEABLE = ("no-store", "private")
+
+
+def domain_blocked(url, domains):
+    host = urlparse(url).hostname or ""
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+def cacheable(headers):
+    directives = {directive.split("=")[0].strip().lower() for directive in headers.get("cache-control", "").split(",")}
+    return not directives & set(UNCACHEABLE)
+
+
+class AssetCache:
+    """On-disk cache of static responses keyed by URL and validated by ETag, with LRU eviction."""
+
+    def __init__(self, directory=ASSET_CACHE_DIR, max_bytes=ASSET_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(directory, "index.json")
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        """Cached entry for url (refreshing its LRU position), or None."""
+        with self.lock:
+            entry = self.index.get(self.key(url))
+            if entry is not None:
+                entry["last_used"] = time.time()
+            return entry
+
+    def body(self, entry):
+        with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+            return f.read()
+
+    def put(self, url, body, headers):
+        """Store a decoded response body; returns whether it was cacheable."""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            # Nothing to revalidate against; serving it later could be stale
+            return False
+        if not cacheable(headers):
+            return False
+        headers = {name: value for name, value in headers.items() if name not in BODY_ENCODING_HEADERS}
+        key = self.key(url)
+        with self.lock:
+            with open(os.path.join(self.directory, key), "wb") as f:
+                f.write(body)
+            self.index[key] = {"url": url, "file": key, "etag": etag, "last_modified": last_modified,
+                               "size": len(body), "headers": headers, "last_used": time.time()}
+            self.evict()
+        return True
+
+    def evict(self):
+        total = sum(entry["size"] for entry in self.index.values())
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            del self.index[key]
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except OSError:
+                pass
+
+    def save(self):
+        with self.lock:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f)
+
+
+def page_websocket_url(driver):
+    """DevTools websocket of the page target driven by driver."""
+    address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+    with urllib.request.urlopen(f"http://{address}/json", timeout=10) as response:
+        targets = json.loads(response.read())
+    pages = [target for target in targets if target["type"] == "page"]
+    # chromedriver window handles are the DevTools target ids
+    handle = driver.current_window_handle
+    page = next((target for target in pages if target["id"] == handle), pages[0])
+    return page["webSocketDebuggerUrl"]
+
+
+class FetchInterceptor:
+    """Answer Fetch.requestPaused events for one browser on a background thread."""
+
+    def __init__(self, driver, blocked_domains=(), cache=None):
+        self.blocked_domains = list(blocked_domains)
+        self.cache = cache
+        self.ids = itertools.count(1)
+        self.events = deque()
+        self.stats = {"blocked": 0, "revalidated": 0, "served_from_cache": 0, "bytes_saved": 0, "stored": 0}
+        self.ws = websocket.create_connection(page_websocket_url(driver), suppress_origin=True)
+        self.running = True
+
+        # Only pause what needs answering: every request for the deny-list, static assets for the cache
+        patterns = []
+        if self.blocked_domains:
+            patterns.append({"urlPattern": "*", "requestStage": "Request"})
+        if cache is not None:
+            if not self.blocked_domains:
+                patterns += [{"urlPattern": "*", "resourceType": resource_type, "requestStage": "Request"}
+                             for resource_type in STATIC_TYPES]
+            patterns += [{"urlPattern": "*", "resourceType": resource_type, "requestStage": "Response"}
+                         for resource_type in STATIC_TYPES]
+        self.call("Fetch.enable", {"patterns": patterns})
+        self.thread = threading.Thread(target=self.run, name="fetch-interceptor", daemon=True)
+        self.thread.start()
+
+    def send(self, method, params):
+        message_id = next(self.ids)
+        self.ws.send(json.dumps({"id": message_id, "method": method, "params": params}))
+        return message_id
+
+    def call(self, method, params):
+        """Send a command and wait for its result, queueing events that arrive meanwhile."""
+        message_id = self.send(method, params)
+        while True:
+            message = json.loads(self.ws.recv())
+            if message.get("id") == message_id:
+                if "error" in message:
+                    raise RuntimeError(f"{method} failed: {message['error'].get('message')}")
+                return message.get("result", {})
+            if "method" in message:
+                self.events.append(message)
+
+    def run(self):
+        while self.running:
+            try:
+                message = self.events.popleft() if self.events else json.loads(self.ws.recv())
+            except (websocket.WebSocketException, OSError, ValueError):
+                break
+            if message.get("method") == "Fetch.requestPaused":
+                try:
+                    self.on_paused(message["params"])
+                except Exception as e:
+                    logging.warning(f"Fetch interception failed for {message['params']['request']['url']}: {str(e)}")
+                    self.send("Fetch.continueRequest", {"requestId": message["params"]["requestId"]})
+
+    def on_paused(self, params):
+        request_id = params["requestId"]
+        url = params["request"]["url"]
+        if "responseStatusCode" not in params:
+            self.on_request(request_id, url, params)
+        else:
+            self.on_response(request_id, url, params)
+
+    def on_request(self, request_id, url, params):
+        if domain_blocked(url, self.blocked_domains):
+            self.stats["blocked"] += 1
+            self.send("Fetch.failRequest", {"requestId": request_id, "errorReason": "BlockedByClient"})
+            return
+
+        entry = self.cache.get(url) if self.cache is not None and params.get("resourceType") in STATIC_TYPES else None
+        if entry is None:
+            self.send("Fetch.continueRequest", {"requestId": request_id})
+            return
+
+        # Ask the server whether our copy is still current
+        headers = [{"name": name, "value": value} for name, value in params["request"]["headers"].items()]
+        if entry["etag"]:
+            headers.append({"name": "If-None-Match", "value": entry["etag"]})
+        if entry["last_modified"]:
+            headers.append({"name": "If-Modified-Since", "value": entry["last_modified"]})
+        self.stats["revalidated"] += 1
+        self.send("Fetch.continueRequest", {"requestId": request_id, "headers": headers})
+
+    def on_response(self, request_id, url, params):
+        status = params["responseStatusCode"]
+        headers = {header["name"].lower(): header["value"] for header in params.get("responseHeaders", [])}
+        if status == 304 and self.cache is not None:
+            entry = self.cache.get(url)
+            if entry is not None:
+                self.stats["served_from_cache"] += 1
+                self.stats["bytes_saved"] += entry["size"]
+                response_headers = [{"name": name, "value": value} for name, value in entry["headers"].items()]
+                self.send("Fetch.fulfillRequest", {
+                    "requestId": request_id, "responseCode": 200, "responseHeaders": response_headers,
+                    "body": base64.b64encode(self.cache.body(entry)).decode("ascii"),
+                })
+                return
+        if status == 200 and self.cache is not None:
+            result = self.call("Fetch.getResponseBody", {"requestId": request_id})
+            body = base64.b64decode(result["body"]) if result.get("base64Encoded") else result["body"].encode("utf-8")
+            if self.cache.put(url, body, headers):
+                self.stats["stored"] += 1
+        self.send("Fetch.continueRequest", {"requestId": request_id})
+
+    def close(self):
+        self.running = False
+        try:
+            self.ws.close()
+        except websocket.WebSocketException:
+            pass
+        if self.cache is not None:
+            self.cache.save()
@@ -0,0 +1,135 @@
+"""
+Record every flash alert the back office shows, as it appears.
+
+WATCHER_SCRIPT is registered with Page.addScriptToEvaluateOnNewDocument so
+it runs before the page's own scripts on every load. A MutationObserver
+notes each .alert element that is added (or gains the class) with its
+class, text, URL and time, in window.__zpsFlash and in sessionStorage, so an
+alert that fades out, or a page that redirects on, does not lose it.
+Checking for a message is then one read of the buffer instead of a 10 s
+XPath wait.
+
+    message = wait_for_flash(driver, "Data Approved successfully!")
+"""
+import json
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from support import tracing
+
+WATCHER_SCRIPT = """
+(function () {
+  if (window.__zpsFlash) { return; }
+  var buffer = window.__zpsFlash = [];
+  var entries = new WeakMap();
+
+  function persist() {
+    try {
+      var stored = JSON.parse(sessionStorage.getItem('zpsFlash') || '[]').filter(function (entry) {
+        return entry.document !== performance.timeOrigin;
+      });
+      sessionStorage.setItem('zpsFlash', JSON.stringify(stored.concat(buffer).slice(-50)));
+    } catch (err) { /* storage disabled or full: the in-page buffer still has it */ }
+  }
+
+  function text(e) {
+    return (e.textContent || '').replace(/\\s+/g, ' ').trim();
+  }
+
+  function record(e) {
+    if (!e.classList || !e.classList.contains('alert')) { return; }
+    var entry = entries.get(e);
+    if (entry) {
+      // Text parsed or filled in after the element was added
+      entry.text = text(e);
+      entry.className = e.className;
+    } else {
+      entry = {
+        kind: (e.className.match(/alert-(success|danger|warning|info)/) || [null, 'info'])[1],
+        className: e.className,
+        text: text(e),
+        url: location.href,
+        document: performance.timeOrigin,
+        time: performance.timeOrigin + performance.now()
+      };
+      entries.set(e, entry);
+      buffer.push(entry);
+    }
+    persist();
+  }
+
+  function scan(node) {
+    if (node.nodeType !== 1) { return; }
+    record(node);
+    var inner = node.querySelectorAll('.alert');
+    for (var i = 0; i < inner.length; i++) { record(inner[i]); }
+  }
+
+  new MutationObserver(function (mutations) {
+    mutations.forEach(function (m) {
+      var target = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+      var alert = target && target.closest ? target.closest('.alert') : null;
+      if (alert) { record(alert); }
+      for (var i = 0; i < m.addedNodes.length; i++) { scan(m.addedNodes[i]); }
+    });
+  }).observe(document, {childList: true, subtree: true, characterData: true,
+                        attributes: true, attributeFilter: ['class']});
+
+  if (document.documentElement) { scan(document.documentElement); }
+})();
+"""
+
+READ_SCRIPT = """
+var stored = [];
+try { stored = JSON.parse(sessionStorage.getItem('zpsFlash') || '[]'); } catch (err) {}
+return {messages: stored.length ? stored : (window.__zpsFlash || []), document: performance.timeOrigin};
+"""
+
+
+def install(driver):
+    """Inject the watcher into every page driver loads from now on."""
+    if hasattr(driver, "execute_cdp_cmd"):
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": WATCHER_SCRIPT})
+        driver.flash_watcher = True
+
+
+def flash_messages(driver, current_document=True):
+    """Alerts recorded so far; by default only those shown on the page now loaded."""
+    script = READ_SCRIPT
+    if not getattr(driver, "flash_watcher", False):
+        # Not injected at load (no CDP on Grid sessions): start watching now, picking up alerts on the page
+        script = WATCHER_SCRIPT + script
+    data = driver.execute_script(script)
+    messages = data["messages"]
+    if current_document:
+        messages = [message for message in messages if message["document"] == data["document"]]
+    return messages
+
+
+def matches(message, text, kind):
+    return (kind is None or message["kind"] == kind) and (text is None or text in message["text"])
+
+
+def wait_for_flash(driver, text=None, kind="success", timeout=10, current_document=True):
+    """Return the first recorded alert of kind containing text.
+
+    The buffer is read once; only when the alert has not been shown yet does
+    this keep polling it, for at most timeout seconds.
+    """
+    with tracing.span(f"wait flash {kind or 'any'}", **{"flash.text": text, "wait.timeout_s": float(timeout)}):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                messages = flash_messages(driver, current_document)
+            except WebDriverException:
+                # Mid-navigation; the next page has its own buffer
+                messages = []
+            for message in messages:
+                if matches(message, text, kind):
+                    return message
+            if time.time() > deadline:
+                wanted = f"{kind or 'flash'} message" + (f" containing {text!r}" if text else "")
+                seen = json.dumps([(message["kind"], message["text"]) for message in messages], ensure_ascii=False)
+                raise TimeoutException(f"No {wanted} within {timeout}s; recorded: {seen}")
+            time.sleep(0.1)
@@ -0,0 +1,104 @@
+"""
+Fill a back office with N synthetic menus and pages.
+
+Items are spread over the Created / Moderated / Approved / Trashed states with
+mixed English and Kannada titles and are posted in batches to the seeding API
+of the target (the local stand-in, or a staging instance running it).
+
+    python -m support.generate_data --target http://127.0.0.1:8000 --menus 1000 --pages 1000 --reset
+"""
+import argparse
+import json
+import logging
+import random
+import urllib.request
+
+from support.stand_in_cms import STATES
+
+ENGLISH_WORDS = ["Notice", "Tender", "Scheme", "Circular", "Report", "Budget", "Meeting", "Office",
+                 "District", "Taluk", "Gram Panchayat", "Water Supply", "Education", "Health"]
+KANNADA_WORDS = ["ಸೂಚನೆ", "ಟೆಂಡರ್", "ಯೋಜನೆ", "ಸುತ್ತೋಲೆ", "ವರದಿ", "ಆಯವ್ಯಯ", "ಸಭೆ", "ಕಚೇರಿ",
+                 "ಜಿಲ್ಲೆ", "ತಾಲ್ಲೂಕು", "ಗ್ರಾಮ ಪಂಚಾಯತಿ", "ನೀರು ಸರಬರಾಜು", "ಶಿಕ್ಷಣ", "ಆರೋಗ್ಯ"]
+
+# The row the test modules look for; planted last so finders hit their worst case
+TARGET_NAME = "Automation text"
+TARGET_KN_NAME = "ಉದಾಹರಣೆಯ ಶೀರ್ಷಿಕೆ"
+
+BATCH_SIZE = 500
+
+
+def parse_states(spec):
+    """Parse 'Created=4,Moderated=3,Approved=2,Trashed=1' into a weight per state."""
+    weights = {}
+    for part in spec.split(","):
+        state, _, weight = part.partition("=")
+        state = state.strip().capitalize()
+        if state not in STATES:
+            raise ValueError(f"Unknown state '{state}', expected one of {', '.join(STATES)}")
+        weights[state] = float(weight or 1)
+    return weights
+
+
+def make_items(kind, count, weights, rng):
+    states, state_weights = zip(*weights.items())
+    items = []
+    for index in range(count):
+        english = f"{rng.choice(ENGLISH_WORDS)} {kind} {index + 1:05d}"
+        kannada = f"{rng.choice(KANNADA_WORDS)} {index + 1}"
+        # Roughly one in three titles is Kannada-first, as in production
+        if rng.random() < 0.33:
+            name, kn_name = kannada, english
+        else:
+            name, kn_name = english, kannada
+        items.append({"kind": kind, "name": name, "kn_name": kn_name,
+                      "status": rng.choices(states, state_weights)[0]})
+    return items
+
+
+def request(target, method, path, payload=None):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(f"{target}{path}", data=data, method=method,
+                                 headers={"Content-Type": "application/json; charset=utf-8"})
+    with urllib.request.urlopen(req, timeout=60) as response:
+        return json.loads(response.read() or b"null")
+
+
+def seed(target, menus=0, pages=0, states="Created,Moderated,Approved,Trashed", reset=False,
+         plant_target=True, seed_value=None):
+    """Populate target with synthetic items and return how many were created."""
+    weights = parse_states(states) if isinstance(states, str) else states
+    rng = random.Random(seed_value)
+    if reset:
+        request(target, "DELETE", "/api/items")
+
+    items = make_items("menu", menus, weights, rng) + make_items("page", pages, weights, rng)
+    if plant_target:
+        for kind, count in (("menu", menus), ("page", pages)):
+            if count:
+                items.append({"kind": kind, "name": TARGET_NAME, "kn_name": TARGET_KN_NAME, "status": "Moderated"})
+
+    for start in range(0, len(items), BATCH_SIZE):
+        request(target, "POST", "/api/items", items[start:start + BATCH_SIZE])
+    return len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic menus and pages")
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="Base URL of the back office")
+    parser.add_argument("--menus", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--states", default="Created,Moderated,Approved,Trashed",
+                        help="Comma separated states with optional weights, e.g. Created=4,Moderated=1")
+    parser.add_argument("--reset", action="store_true", help="Delete existing items first")
+    parser.add_argument("--no-target", action="store_true", help="Do not plant the 'Automation text' rows")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    created = seed(args.target.rstrip("/"), args.menus, args.pages, args.states, args.reset,
+                   not args.no_target, args.seed)
+    logging.info(f"Created {created} items on {args.target}")
+
+
+if __name__ == "__main__":
+    main()
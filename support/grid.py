@@ -0,0 +1,330 @@
+"""
+Sharded runs of the role flows on a Selenium Grid.
+
+Every content item is pushed through the creator → moderator → approver
+flows for its own title, one chain (menus or pages) per pytest process,
+against a Grid session. Chains are balanced over the workers (one per node)
+by their historical run time, see support.schedule. Afterwards the shards'
+Allure results and screenshots are merged into a single run directory:
+result, container and attachment files are renamed when they clash, every
+test is labelled and suffixed with its shard so the report lists them
+separately, and screenshots are prefixed with the shard. The predicted and
+actual makespan appear in the report's Environment section.
+
+    # Hub and two nodes on this machine from the Selenium server jar
+    python -m support.grid --start-grid --jar selenium-server-4.25.0.jar --nodes 2 --items 4
+    # An existing Grid
+    python -m support.grid --grid-url http://grid.local:4444 --items 8
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from support import pipeline
+from support.config import FLOW_CHAINS, FLOWS, ITEM_TITLE
+from support.schedule import HISTORY_DIRS, chain_jobs, lpt, module_durations
+
+HUB_PORT = 4444
+FIRST_NODE_PORT = 5555
+RUNS_DIR = "grid_runs"
+
+
+class LocalGrid:
+    """A hub plus single-session nodes started from the Selenium server jar."""
+
+    def __init__(self, jar, nodes, host="127.0.0.1", port=HUB_PORT):
+        self.jar = jar
+        self.nodes = nodes
+        self.host = host
+        self.port = port
+        self.processes = []
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout=60):
+        self.processes.append(subprocess.Popen(
+            ["java", "-jar", self.jar, "hub", "--host", self.host, "--port", str(self.port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        ))
+        for index in range(self.nodes):
+            self.processes.append(subprocess.Popen(
+                ["java", "-jar", self.jar, "node", "--host", self.host, "--port", str(FIRST_NODE_PORT + index),
+                 "--publish-events", f"tcp://{self.host}:4442", "--subscribe-events", f"tcp://{self.host}:4443",
+                 "--max-sessions", "1"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            ))
+        wait_for_nodes(self.url, self.nodes, timeout)
+        return self
+
+    def stop(self):
+        for process in reversed(self.processes):
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def grid_status(grid_url):
+    with urllib.request.urlopen(f"{grid_url}/status", timeout=5) as response:
+        return json.loads(response.read())["value"]
+
+
+def node_count(grid_url):
+    """Nodes registered with the hub and up."""
+    return sum(1 for node in grid_status(grid_url).get("nodes", []) if node.get("availability") == "UP")
+
+
+def wait_for_nodes(grid_url, nodes, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if node_count(grid_url) >= nodes:
+                return
+        except OSError:
+            # Hub not listening yet
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"Selenium Grid at {grid_url} did not report {nodes} nodes within {timeout}s")
+
+
+def shard_items(count, title=ITEM_TITLE):
+    """(shard, item title) pairs; the run tag keeps titles unique across runs against the same site."""
+    tag = time.strftime("%H%M%S")
+    return [(f"shard-{index:02d}", f"{title} {tag}-{index:02d}") for index in range(1, count + 1)]
+
+
+def run_shard(shard, title, grid_url, run_dir, flows):
+    """Run every flow for one item in its own pytest process."""
+    shard_dir = os.path.join(run_dir, "shards", shard)
+    env = dict(os.environ)
+    env.update({
+        "ZPS_GRID_URL": grid_url,
+        "ZPS_SHARD": shard,
+        "ZPS_ITEM_TITLE": title,
+        "ZPS_SCREENSHOT_DIR": os.path.join(shard_dir, "screenshots"),
+        # Run-history files are per process; keep shards from writing the same ones
+        "ZPS_PERF_DIR": os.path.join(shard_dir, "perf_history"),
+        "ZPS_HAR_DIR": os.path.join(shard_dir, "har"),
+    })
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+               f"--alluredir={os.path.join(shard_dir, 'allure-results')}", "--clean-alluredir", *flows]
+    logging.info(f"{shard}: running flows for '{title}'")
+    started = time.time()
+    completed = subprocess.run(command, env=env, check=False, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    stopped = time.time()
+    with open(os.path.join(shard_dir, "pytest.log"), "wb") as f:
+        f.write(completed.stdout)
+    logging.info(f"{shard}: finished in {stopped - started:.1f}s with exit code {completed.returncode}")
+    return {"shard": shard, "item": title, "exit_code": completed.returncode,
+            "start": started, "stop": stopped, "duration_s": round(stopped - started, 2)}
+
+
+def free_name(directory, name, make_name):
+    """name if it is free in directory, otherwise the first free make_name()."""
+    while os.path.exists(os.path.join(directory, name)):
+        name = make_name()
+    return name
+
+
+def rewrite_attachments(entry, renamed):
+    for attachment in entry.get("attachments", []):
+        attachment["source"] = renamed.get(attachment["source"], attachment["source"])
+    for step in entry.get("steps", []):
+        rewrite_attachments(step, renamed)
+
+
+def merge_shard(shard, title, shard_dir, out_dir, screenshot_dir):
+    """Copy one shard's Allure results and screenshots into the merged run; returns files copied."""
+    results_dir = os.path.join(shard_dir, "allure-results")
+    renamed = {}
+    copied = 0
+
+    # Attachments first, so results can point at their new names
+    for path in sorted(glob.glob(os.path.join(results_dir, "*"))):
+        name = os.path.basename(path)
+        if name.endswith("-result.json") or name.endswith("-container.json"):
+            continue
+        extension = os.path.splitext(name)[1]
+        target = free_name(out_dir, name, lambda: f"{uuid.uuid4()}-attachment{extension}")
+        shutil.copyfile(path, os.path.join(out_dir, target))
+        if target != name:
+            renamed[name] = target
+        copied += 1
+
+    result_uuids = {}
+    for path in sorted(glob.glob(os.path.join(results_dir, "*-result.json"))):
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+        new_uuid = result["uuid"]
+        if os.path.exists(os.path.join(out_dir, f"{new_uuid}-result.json")):
+            new_uuid = str(uuid.uuid4())
+        result_uuids[result["uuid"]] = new_uuid
+        result["uuid"] = new_uuid
+        result["name"] = f"{result['name']} [{shard}]"
+        # The same test from several shards must not be folded into one history entry
+        result["historyId"] = hashlib.md5(f"{result.get('historyId', '')}:{title}".encode("utf-8")).hexdigest()
+        result.setdefault("labels", []).append({"name": "shard", "value": shard})
+        result.setdefault("parameters", []).append({"name": "item", "value": title})
+        rewrite_attachments(result, renamed)
+        with open(os.path.join(out_dir, f"{new_uuid}-result.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        copied += 1
+
+    for path in sorted(glob.glob(os.path.join(results_dir, "*-container.json"))):
+        with open(path, encoding="utf-8") as f:
+            container = json.load(f)
+        if os.path.exists(os.path.join(out_dir, f"{container['uuid']}-container.json")):
+            container["uuid"] = str(uuid.uuid4())
+        container["children"] = [result_uuids.get(child, child) for child in container.get("children", [])]
+        for fixture in container.get("befores", []) + container.get("afters", []):
+            rewrite_attachments(fixture, renamed)
+        with open(os.path.join(out_dir, f"{container['uuid']}-container.json"), "w", encoding="utf-8") as f:
+            json.dump(container, f, ensure_ascii=False)
+        copied += 1
+
+    for path in sorted(glob.glob(os.path.join(shard_dir, "screenshots", "*"))):
+        shutil.copyfile(path, os.path.join(screenshot_dir, f"{shard}-{os.path.basename(path)}"))
+        copied += 1
+    return copied
+
+
+def merge(run_dir, shards):
+    """Merge every shard of run_dir into run_dir/allure-results and run_dir/screenshots."""
+    out_dir = os.path.join(run_dir, "allure-results")
+    screenshot_dir = os.path.join(run_dir, "screenshots")
+    os.makedirs(out_dir, exist_ok=True)
+    os.makedirs(screenshot_dir, exist_ok=True)
+    for entry in shards:
+        shard_dir = os.path.join(run_dir, "shards", entry["shard"])
+        entry["merged_files"] = merge_shard(entry["shard"], entry["item"], shard_dir, out_dir, screenshot_dir)
+    return out_dir
+
+
+def run_queue(worker, queue, grid_url, run_dir):
+    """Run one worker's jobs back to back."""
+    shards = []
+    for job in queue:
+        entry = run_shard(job["shard"], job["item"], grid_url, run_dir, job["flows"])
+        shards.append({**entry, "worker": worker, "chain": job["chain"], "predicted_s": job["predicted_s"]})
+    return shards
+
+
+def write_environment(results_dir, summary):
+    """Show the run's shape and makespans in the Environment widget of the Allure report."""
+    keys = ("grid_url", "workers", "items", "predicted_makespan_s", "actual_makespan_s", "items_per_min")
+    with open(os.path.join(results_dir, "environment.properties"), "w", encoding="utf-8") as f:
+        for key in keys:
+            f.write(f"{key}={summary[key]}\n")
+
+
+def run_sharded(grid_url, items, workers=None, run_dir=None, flows=FLOWS, history=HISTORY_DIRS):
+    """Run items shards on the Grid, merge them and return the run summary.
+
+    With the default flows every item is split into its menu and page
+    chains, which are balanced over the workers by their historical run
+    time; a custom flow list runs as a single chain per item.
+    """
+    workers = workers or max(node_count(grid_url), 1)
+    run_dir = run_dir or os.path.join(RUNS_DIR, time.strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(run_dir, exist_ok=True)
+
+    chains = FLOW_CHAINS if list(flows) == FLOWS else {"flows": list(flows)}
+    jobs = chain_jobs(shard_items(items), module_durations(history), chains)
+    queues, predicted = lpt(jobs, workers)
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_queue, worker, queue, grid_url, run_dir) for worker, queue in enumerate(queues)]
+        shards = [entry for future in futures for entry in future.result()]
+    wall_s = time.time() - started
+
+    workers_summary = []
+    for worker, queue in enumerate(queues):
+        done = [entry for entry in shards if entry["worker"] == worker]
+        workers_summary.append({
+            "worker": worker,
+            "jobs": [job["shard"] for job in queue],
+            "predicted_s": round(sum(job["predicted_s"] for job in queue), 2),
+            "actual_s": round(max((entry["stop"] for entry in done), default=started) - started, 2),
+        })
+
+    results_dir = merge(run_dir, shards)
+    events = [event for path in sorted(glob.glob(os.path.join(run_dir, "shards", "**", pipeline.EVENTS_FILE),
+                                                 recursive=True))
+              for event in pipeline.read_events(path)]
+    flow = pipeline.summarize(events)
+    with open(os.path.join(run_dir, "pipeline.json"), "w", encoding="utf-8") as f:
+        json.dump(flow, f, indent=2, ensure_ascii=False)
+    summary = {
+        "grid_url": grid_url,
+        "workers": workers,
+        "items": items,
+        "wall_s": round(wall_s, 2),
+        "predicted_makespan_s": round(predicted, 2),
+        "actual_makespan_s": max(worker["actual_s"] for worker in workers_summary),
+        "items_per_min": round(items / wall_s * 60, 2),
+        "failed_shards": [entry["shard"] for entry in shards if entry["exit_code"] != 0],
+        # Created-to-approved throughput and stage latencies of the items, from their correlation IDs
+        "pipeline": {key: value for key, value in flow.items() if key != "timelines"},
+        "allure_results": results_dir,
+        "per_worker": workers_summary,
+        "shards": shards,
+    }
+    write_environment(results_dir, summary)
+    with open(os.path.join(run_dir, "shards.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    logging.info(f"{items} items on {workers} workers in {wall_s:.1f}s ({summary['items_per_min']} items/min); "
+                 f"makespan predicted {summary['predicted_makespan_s']}s, actual {summary['actual_makespan_s']}s")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the role flows sharded per content item on a Selenium Grid")
+    parser.add_argument("--grid-url", default=os.environ.get("ZPS_GRID_URL", f"http://127.0.0.1:{HUB_PORT}"))
+    parser.add_argument("--items", type=int, default=4, help="Content items, one shard each")
+    parser.add_argument("--workers", type=int, help="Concurrent shards (default: nodes registered with the hub)")
+    parser.add_argument("--start-grid", action="store_true", help="Start a hub and nodes on this machine first")
+    parser.add_argument("--jar", help="Selenium server jar, for --start-grid")
+    parser.add_argument("--nodes", type=int, default=2, help="Nodes to start with --start-grid")
+    parser.add_argument("--run-dir")
+    parser.add_argument("--flows", default=",".join(FLOWS), help="Test modules to run per shard, in order")
+    parser.add_argument("--history", default=",".join(HISTORY_DIRS),
+                        help="Allure results directories (globs) to estimate chain durations from")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    flows = args.flows.split(",")
+    history = args.history.split(",")
+    if args.start_grid:
+        if not args.jar:
+            parser.error("--start-grid needs --jar")
+        with LocalGrid(args.jar, args.nodes) as grid:
+            summary = run_sharded(grid.url, args.items, args.workers, args.run_dir, flows, history)
+    else:
+        summary = run_sharded(args.grid_url, args.items, args.workers, args.run_dir, flows, history)
+    print(json.dumps({key: value for key, value in summary.items() if key != "shards"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
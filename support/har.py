@@ -0,0 +1,213 @@
+"""
+HAR capture from CDP Network events.
+
+HarRecorder follows Network.* events through the driver's CdpEvents pump
+(no response bodies are fetched, so it stays cheap enough for nightly runs),
+writes one HAR 1.2 file per test or per step and attaches a compact summary
+of the slowest requests, largest payloads, requests per domain and cache
+hits to the Allure report.
+
+    ZPS_HAR=test pytest test_creator_pages.py   # one HAR per test
+    ZPS_HAR=step pytest test_creator_pages.py   # one HAR per allure.step
+"""
+import json
+import logging
+import os
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlparse
+
+import allure
+from allure_commons import hookimpl
+
+from support.cdp import events
+from support.config import HAR_DIR, HAR_MODES
+from support.driver import current_driver
+
+TOP_N = 5
+UNSAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def header_list(headers):
+    return [{"name": name, "value": str(value)} for name, value in (headers or {}).items()]
+
+
+def phase(timing, start, end):
+    """Duration of a ResourceTiming phase in ms, -1 when it did not happen."""
+    if not timing or timing.get(start, -1) < 0 or timing.get(end, -1) < 0:
+        return -1
+    return timing[end] - timing[start]
+
+
+class NetworkRequest:
+    """One request as seen through CDP Network events."""
+
+    def __init__(self, params):
+        self.request = params["request"]
+        self.started = params["timestamp"]
+        self.wall_time = params.get("wallTime")
+        self.response = None
+        self.finished = None
+        self.encoded_length = 0
+        self.from_cache = False
+        self.failed = None
+        self.redirect_url = ""
+
+    def to_har(self):
+        request = self.request
+        response = self.response or {}
+        timing = response.get("timing")
+        total = ((self.finished or self.started) - self.started) * 1000
+        wait = -1
+        if timing:
+            wait = timing["receiveHeadersEnd"] - max(timing.get("sendEnd", 0), 0)
+        send = phase(timing, "sendStart", "sendEnd")
+        dns = phase(timing, "dnsStart", "dnsEnd")
+        connect = phase(timing, "connectStart", "connectEnd")
+        receive = max(total - (timing["receiveHeadersEnd"] if timing else 0), 0)
+        started = datetime.fromtimestamp(self.wall_time or 0, timezone.utc).isoformat()
+        return {
+            "startedDateTime": started,
+            "time": total,
+            "request": {
+                "method": request["method"],
+                "url": request["url"],
+                "httpVersion": response.get("protocol", ""),
+                "headers": header_list(request.get("headers")),
+                "queryString": [{"name": k, "value": v} for k, v in parse_qsl(urlparse(request["url"]).query)],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": len(request.get("postData", "") or ""),
+            },
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", self.failed or ""),
+                "httpVersion": response.get("protocol", ""),
+                "headers": header_list(response.get("headers")),
+                "cookies": [],
+                "content": {"size": self.encoded_length, "mimeType": response.get("mimeType", "")},
+                "redirectURL": self.redirect_url,
+                "headersSize": -1,
+                "bodySize": self.encoded_length,
+            },
+            "cache": {},
+            "timings": {"blocked": -1, "dns": dns, "connect": connect, "send": max(send, 0),
+                        "wait": max(wait, 0), "receive": receive, "ssl": phase(timing, "sslStart", "sslEnd")},
+            "serverIPAddress": response.get("remoteIPAddress", ""),
+            "_fromCache": self.from_cache,
+        }
+
+
+def summarize(entries):
+    """Slowest requests, largest payloads, requests per domain and cache hits."""
+    cached = [entry for entry in entries if entry["_fromCache"] or entry["response"]["status"] == 304]
+    return {
+        "requests": len(entries),
+        "transfer_bytes": sum(entry["response"]["bodySize"] for entry in entries),
+        "slowest": [{"url": entry["request"]["url"], "time_ms": round(entry["time"], 1)}
+                    for entry in sorted(entries, key=lambda entry: entry["time"], reverse=True)[:TOP_N]],
+        "largest": [{"url": entry["request"]["url"], "bytes": entry["response"]["bodySize"]}
+                    for entry in sorted(entries, key=lambda entry: entry["response"]["bodySize"], reverse=True)[:TOP_N]],
+        "per_domain": dict(Counter(urlparse(entry["request"]["url"]).netloc for entry in entries).most_common()),
+        "cache_hits": len(cached),
+        "failed": sum(1 for entry in entries if entry["response"]["status"] == 0),
+    }
+
+
+class HarRecorder:
+    """Network recorder; per test via begin/end, per step as an allure_commons plugin."""
+
+    def __init__(self, mode="test", har_dir=HAR_DIR):
+        if mode not in HAR_MODES:
+            raise ValueError(f"Unknown HAR mode {mode!r}, expected one of {', '.join(HAR_MODES)}")
+        self.mode = mode
+        self.har_dir = har_dir
+        self.requests = {}
+        self.subscribed = set()
+        self.marks = {}
+        self.titles = {}
+        self.current_test = "session"
+
+    def __call__(self, method, params):
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if request_id in self.requests and params.get("redirectResponse"):
+                # The redirect hop gets no loadingFinished of its own: finish it here and keep it as its own entry
+                hop = self.requests.pop(request_id)
+                hop.response = params["redirectResponse"]
+                hop.finished = params["timestamp"]
+                hop.encoded_length = params["redirectResponse"].get("encodedDataLength", 0)
+                hop.redirect_url = params["request"]["url"]
+                self.requests[f"{request_id}:{params['timestamp']}"] = hop
+            self.requests[request_id] = NetworkRequest(params)
+            return
+        request = self.requests.get(request_id)
+        if request is None:
+            return
+        if method == "Network.responseReceived":
+            request.response = params["response"]
+            request.from_cache = request.from_cache or params["response"].get("fromDiskCache", False)
+        elif method == "Network.requestServedFromCache":
+            request.from_cache = True
+        elif method == "Network.loadingFinished":
+            request.finished = params["timestamp"]
+            request.encoded_length = params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed":
+            request.finished = params["timestamp"]
+            request.failed = params.get("errorText", "failed")
+
+    def poll(self):
+        driver = current_driver()
+        pump = events(driver) if driver is not None else None
+        if pump is None:
+            return False
+        # A restarted browser gets a new pump under the same driver object
+        if id(pump) not in self.subscribed:
+            pump.subscribe(self)
+            self.subscribed.add(id(pump))
+        pump.poll()
+        return True
+
+    def begin(self, key):
+        if self.poll():
+            self.marks[key] = set(self.requests)
+
+    def end(self, key, name):
+        """Write requests seen since begin(key) to a HAR file and attach the summary."""
+        seen = self.marks.pop(key, None)
+        if seen is None or not self.poll():
+            return None
+        new_ids = [request_id for request_id in self.requests if request_id not in seen]
+        entries = [self.requests[request_id].to_har() for request_id in new_ids]
+        # Once no enclosing test/step window is open, finished requests are not needed again
+        if not self.marks:
+            for request_id in new_ids:
+                if self.requests[request_id].finished is not None:
+                    del self.requests[request_id]
+        if not entries:
+            return None
+
+        os.makedirs(self.har_dir, exist_ok=True)
+        path = os.path.join(self.har_dir, UNSAFE_NAME_RE.sub("_", name).strip("_")[:150] + ".har")
+        har = {"log": {"version": "1.2", "creator": {"name": "zps-har-recorder", "version": "1.0"},
+                       "pages": [], "entries": sorted(entries, key=lambda entry: entry["startedDateTime"])}}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(har, f)
+
+        summary = {"har": path, **summarize(entries)}
+        allure.attach(json.dumps(summary, indent=2), name="network summary",
+                      attachment_type=allure.attachment_type.JSON)
+        logging.info(f"HAR with {len(entries)} requests written to {path}")
+        return summary
+
+    @hookimpl
+    def start_step(self, uuid, title, params):
+        if self.mode == "step":
+            self.titles[uuid] = title
+            self.begin(uuid)
+
+    @hookimpl(tryfirst=True)
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        if self.mode == "step":
+            self.end(uuid, f"{self.current_test}-{self.titles.pop(uuid, uuid[:8])}")
@@ -0,0 +1,536 @@
+"""
+Load the back office with the role flows as concurrent virtual users.
+
+Each virtual user logs in as the creator, moderator or approver (by --mix)
+and repeats that role's journey with think time between requests: the
+creator saves new menus and pages, the moderator saves Created items from
+the list, and the approver approves Moderated ones. Most users replay the
+journey over plain HTTP. They fetch each form and post back its fields,
+hidden tokens included, with the values the test modules type. Only
+--browser-users of them drive a real browser through the same steps
+(support.batch_moderation / batch_approval), to sample what a user sees.
+
+Concurrency is stepped (--users 5,10,20) with a linear ramp-up in each
+step. Every step reports response-time percentiles, error rate and
+throughput, per request and per journey step:
+
+    python -m support.load --stand-in --users 5,10,20 --duration 30 --ramp-up 5
+    python -m support.load --base-url https://staging.example/back --users 2,4 --browser-users 1
+
+--stand-in starts the local stand-in with a seeded queue, so the mode can
+be developed offline. Results go to perf_history/load.json.
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from html.parser import HTMLParser
+
+from support.backlog import percentile
+from support.config import BASE_URL, PASSWORD, PERF_DIR, USERS
+from support.tables import MENU_COLUMNS, PAGE_COLUMNS, TABLE_ID
+
+LOAD_TITLE = "Load text"
+LOAD_KN_TITLE = "ಉದಾಹರಣೆಯ ಶೀರ್ಷಿಕೆ"
+
+KINDS = {
+    "menu": {"list": "/menu", "columns": MENU_COLUMNS, "submit": "add_menu_submit_button",
+             "fields": ("name", "kn_name"), "open": "/edit/", "saved": "Menu Saved successfully!"},
+    "page": {"list": "/pages", "columns": PAGE_COLUMNS, "submit": "add_edit_page_button",
+             "fields": ("title", "kn_title"), "open": "/view/", "saved": "Data Saved successfully!"},
+}
+
+AJAX_RE = re.compile(r"ajax\s*:\s*['\"]([^'\"]+)['\"]")
+
+
+class LoadError(Exception):
+    """A response that came back but is not what the step expects."""
+
+
+class Page(HTMLParser):
+    """The forms, DataTable rows, links and flash alerts of one HTML response."""
+
+    def __init__(self, url, body):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.body = body
+        self.forms = []
+        self.rows = []
+        self.links = []
+        self.alerts = []
+        self.form = None
+        self.select = None
+        self.textarea = None
+        self.row = None
+        self.cell = None
+        self.table_depth = 0
+        self.alert_depth = 0
+        self.feed(body)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form":
+            self.form = {"action": attrs.get("action") or self.url, "method": (attrs.get("method") or "get").lower(),
+                         "enctype": attrs.get("enctype") or "application/x-www-form-urlencoded", "fields": []}
+            self.forms.append(self.form)
+        elif tag == "input" and self.form is not None and attrs.get("name"):
+            kind = (attrs.get("type") or "text").lower()
+            if kind in ("checkbox", "radio") and "checked" not in attrs:
+                return
+            self.form["fields"].append({"name": attrs["name"], "type": kind, "value": attrs.get("value") or ""})
+        elif tag == "select" and self.form is not None and attrs.get("name"):
+            self.select = {"name": attrs["name"], "type": "select", "value": None}
+            self.form["fields"].append(self.select)
+        elif tag == "option" and self.select is not None:
+            value = attrs.get("value", "")
+            # The first real option, as select_by_index(1) picks past the placeholder
+            if self.select["value"] in (None, "") or "selected" in attrs:
+                self.select["value"] = value
+        elif tag == "textarea" and self.form is not None and attrs.get("name"):
+            self.textarea = {"name": attrs["name"], "type": "textarea", "value": ""}
+            self.form["fields"].append(self.textarea)
+        elif tag == "table" and (attrs.get("id") == TABLE_ID or self.table_depth):
+            self.table_depth += 1
+        elif tag == "tr" and self.table_depth:
+            self.row = {"id": attrs.get("id", ""), "cells": [], "links": []}
+        elif tag == "td" and self.row is not None:
+            self.cell = []
+        elif tag == "br" and self.cell is not None:
+            self.cell.append("\n")
+        elif tag == "a" and attrs.get("href"):
+            href = urllib.parse.urljoin(self.url, attrs["href"])
+            self.links.append(href)
+            if self.row is not None:
+                self.row["links"].append(href)
+        if tag == "div" and ("alert" in (attrs.get("class") or "").split() or self.alert_depth):
+            if not self.alert_depth:
+                self.alerts.append({"class": attrs.get("class"), "text": ""})
+            self.alert_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self.form = None
+        elif tag == "select":
+            self.select = None
+        elif tag == "textarea":
+            self.textarea = None
+        elif tag == "table" and self.table_depth:
+            self.table_depth -= 1
+        elif tag == "td" and self.cell is not None:
+            self.row["cells"].append("".join(self.cell).strip())
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            if self.row["cells"]:
+                self.rows.append(self.row)
+            self.row = None
+        elif tag == "div" and self.alert_depth:
+            self.alert_depth -= 1
+
+    def handle_data(self, data):
+        if self.textarea is not None:
+            self.textarea["value"] += data
+        if self.cell is not None:
+            self.cell.append(data)
+        if self.alert_depth:
+            self.alerts[-1]["text"] += data
+
+    def form_with(self, name):
+        """The form containing a field called name (its submit button, typically)."""
+        for form in self.forms:
+            if any(field["name"] == name for field in form["fields"]):
+                return form
+        raise LoadError(f"No form with '{name}' on {self.url}")
+
+    def success(self, text=None):
+        return any("alert-success" in (alert["class"] or "") and (text is None or text in alert["text"])
+                   for alert in self.alerts)
+
+
+def ajax_rows(payload, url):
+    """Table rows from a DataTables ajax payload, parsed like the DOM rows."""
+    rows = []
+    for data in payload.get("data", payload.get("aaData", [])) if isinstance(payload, dict) else payload:
+        cells = data if isinstance(data, list) else [value for key, value in data.items() if not key.startswith("DT_")]
+        markup = "".join(f"<td>{cell}</td>" for cell in cells)
+        page = Page(url, f"<table id='{TABLE_ID}'><tr id='{data.get('DT_RowId', '') if isinstance(data, dict) else ''}'>"
+                         f"{markup}</tr></table>")
+        rows += page.rows
+    return rows
+
+
+def encode_multipart(fields):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n')
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts).encode("utf-8"), f"multipart/form-data; boundary={boundary}"
+
+
+class Samples:
+    """Timed requests of every user of a load step."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = []
+
+    def add(self, **sample):
+        with self.lock:
+            self.items.append(sample)
+
+
+class HttpUser:
+    """One virtual user replaying its role's requests with its own cookie jar."""
+
+    def __init__(self, index, role, base_url, samples, think_time, stop, timeout=30):
+        self.index = index
+        self.role = role
+        self.base_url = base_url
+        self.samples = samples
+        self.think_time = think_time
+        self.stop = stop
+        self.timeout = timeout
+        self.rng = random.Random(index)
+        self.iteration = 0
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def think(self):
+        self.stop.wait(self.think_time * self.rng.uniform(0.5, 1.5))
+
+    def request(self, step, url, data=None, content_type=None, check=None):
+        """Send one request (following redirects), record it and return the final page."""
+        url = urllib.parse.urljoin(self.base_url + "/", url)
+        headers = {"Content-Type": content_type} if content_type else {}
+        started = time.perf_counter()
+        status, error, page = None, None, None
+        try:
+            with self.opener.open(urllib.request.Request(url, data=data, headers=headers), timeout=self.timeout) as response:
+                status = response.status
+                body = response.read().decode("utf-8", "replace")
+                final_url = response.geturl()
+            page = json.loads(body) if body[:1] in "[{" else Page(final_url, body)
+            if check is not None:
+                check(page)
+        except urllib.error.HTTPError as e:
+            status, error = e.code, f"HTTP {e.code}"
+        except LoadError as e:
+            error = str(e)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            error = type(e).__name__ + ": " + str(getattr(e, "reason", e))
+        self.samples.add(channel="http", role=self.role, step=step, status=status, ok=error is None, error=error,
+                         ms=round((time.perf_counter() - started) * 1000, 1), at=time.time())
+        if error is not None:
+            raise LoadError(f"{step}: {error}")
+        self.think()
+        return page
+
+    def submit(self, step, page, form, values, check=None):
+        fields = []
+        for field in form["fields"]:
+            if field["type"] in ("submit", "button", "image"):
+                continue
+            if field["type"] == "file":
+                continue
+            fields.append((field["name"], values.get(field["name"], field["value"] or "")))
+        submit = next((field for field in form["fields"] if field["type"] == "submit"), None)
+        if submit is not None:
+            fields.append((submit["name"], submit["value"]))
+        if form["enctype"].startswith("multipart/"):
+            data, content_type = encode_multipart(fields)
+        else:
+            data, content_type = urllib.parse.urlencode(fields).encode("utf-8"), "application/x-www-form-urlencoded"
+        return self.request(step, urllib.parse.urljoin(page.url, form["action"]), data, content_type, check)
+
+    def login(self):
+        page = self.request("login_form", "index")
+        form = page.form_with("login_button")
+        values = {}
+        for field in form["fields"]:
+            if field["type"] == "password":
+                values[field["name"]] = PASSWORD
+            elif field["type"] in ("text", "email"):
+                values[field["name"]] = USERS[self.role]
+
+        def logged_in(result):
+            if isinstance(result, Page) and any(f["name"] == "login_button" for form in result.forms
+                                                for f in form["fields"]):
+                raise LoadError("login form shown again")
+        self.submit("login", page, form, values, logged_in)
+
+    def queue(self, kind, status):
+        """Rows of kind's list in status, from the DOM or the table's ajax source."""
+        spec = KINDS[kind]
+        page = self.request(f"{kind}_list", spec["list"].lstrip("/"))
+        rows = page.rows
+        if not rows:
+            source = AJAX_RE.search(page.body)
+            if source:
+                payload = self.request(f"{kind}_list_data", urllib.parse.urljoin(page.url, source.group(1)))
+                rows = ajax_rows(payload, page.url)
+        status_column = spec["columns"][1] - 1
+        return [row for row in rows if len(row["cells"]) > status_column and row["cells"][status_column] == status]
+
+    def flash(self, text):
+        def check(page):
+            if not isinstance(page, Page) or not page.success(text):
+                raise LoadError(f"no success flash{f' {text!r}' if text else ''}")
+        return check
+
+    def creator(self, kind):
+        spec = KINDS[kind]
+        page = self.request(f"{kind}_add_form", f"{spec['list'].lstrip('/')}/add")
+        name, kn_name = spec["fields"]
+        title = f"{LOAD_TITLE} {self.index}-{self.iteration}"
+        self.submit(f"{kind}_save", page, page.form_with(spec["submit"]), {name: title, kn_name: LOAD_KN_TITLE},
+                    self.flash(spec["saved"]))
+
+    def moderator(self, kind):
+        spec = KINDS[kind]
+        rows = self.queue(kind, "Created")
+        links = [link for row in rows[:20] for link in row["links"] if "/edit/" in link]
+        if not links:
+            return
+        page = self.request(f"{kind}_edit_form", self.rng.choice(links))
+        self.submit(f"{kind}_moderate", page, page.form_with(spec["submit"]), {}, self.flash("Data Saved successfully!"))
+
+    def approver(self, kind):
+        spec = KINDS[kind]
+        rows = self.queue(kind, "Moderated")
+        links = [link for row in rows[:20] for link in row["links"] if spec["open"] in link]
+        if not links:
+            return
+        page = self.request(f"{kind}_open", self.rng.choice(links))
+        approve = next((link for link in page.links if "/approve/" in link), None)
+        if approve is None:
+            raise LoadError(f"no approve link on {page.url}")
+        self.request(f"{kind}_approve", approve, check=self.flash(None))
+
+    def run(self):
+        try:
+            self.login()
+        except LoadError:
+            return
+        journey = getattr(self, self.role)
+        while not self.stop.is_set():
+            self.iteration += 1
+            try:
+                journey(self.rng.choice(tuple(KINDS)))
+            except LoadError:
+                # Already recorded against its step; start the journey over
+                self.think()
+
+
+def run_browser_user(index, role, base_url, samples, think_time, stop):
+    """A sampled user driving Chrome through its role's steps, one sample per journey."""
+    from selenium.webdriver.common.by import By
+
+    from support import batch_approval, batch_moderation
+    from support.flash import wait_for_flash
+    from support.locators import find
+    from support.sessions import logged_in_driver
+    from support.tables import read_queue
+
+    rng = random.Random(1000 + index)
+    started = time.perf_counter()
+    driver, _, _ = logged_in_driver(role, base_url)
+    samples.add(channel="browser", role=role, step="login", status=None, ok=True, error=None,
+                ms=round((time.perf_counter() - started) * 1000, 1), at=time.time())
+
+    def create(kind):
+        spec = KINDS[kind]
+        driver.get(f"{base_url}{spec['list']}/add")
+        name, kn_name = spec["fields"]
+        driver.find_element(By.NAME, name).send_keys(f"{LOAD_TITLE} browser {index}")
+        driver.find_element(By.NAME, kn_name).send_keys(LOAD_KN_TITLE)
+        find(driver, batch_moderation.KINDS[kind]["submit"], clickable=True).click()
+        wait_for_flash(driver, spec["saved"])
+
+    def work_on(status, act, links):
+        def journey(kind):
+            driver.get(f"{base_url}{KINDS[kind]['list']}")
+            items = read_queue(driver, status, KINDS[kind]["columns"], links[kind])
+            if items:
+                act(driver, base_url, dict(rng.choice(items[:20]), kind=kind))
+        return journey
+
+    journey = {
+        "creator": create,
+        "moderator": work_on("Created", batch_moderation.moderate_item, {kind: "/edit/" for kind in KINDS}),
+        "approver": work_on("Moderated", batch_approval.approve_item,
+                            {kind: batch_approval.KINDS[kind]["link"] for kind in KINDS}),
+    }[role]
+    try:
+        while not stop.is_set():
+            kind = rng.choice(tuple(KINDS))
+            step_started = time.perf_counter()
+            error = None
+            try:
+                journey(kind)
+            except Exception as e:
+                error = f"{type(e).__name__}: {(str(e).splitlines() or [''])[0]}"
+            samples.add(channel="browser", role=role, step=f"{kind}_journey", status=None, ok=error is None,
+                        error=error, ms=round((time.perf_counter() - step_started) * 1000, 1), at=time.time())
+            stop.wait(think_time * rng.uniform(0.5, 1.5))
+    finally:
+        driver.quit()
+
+
+def parse_mix(spec):
+    """'creator=1,moderator=2' -> {"creator": 1, "moderator": 2}."""
+    mix = {}
+    for part in spec.split(","):
+        role, _, weight = part.partition("=")
+        if role.strip() not in USERS:
+            raise argparse.ArgumentTypeError(f"Unknown role '{role}'")
+        mix[role.strip()] = int(weight or 1)
+    return mix
+
+
+def assign_roles(users, mix):
+    """Roles of users virtual users, interleaved in proportion to mix."""
+    total = sum(mix.values())
+    counts = {role: users * weight // total for role, weight in mix.items()}
+    # Hand out what rounding left over to the most weighted roles
+    for role in sorted(mix, key=mix.get, reverse=True)[:users - sum(counts.values())]:
+        counts[role] += 1
+    roles = []
+    while len(roles) < users:
+        for role in mix:
+            if counts[role]:
+                roles.append(role)
+                counts[role] -= 1
+    return roles
+
+
+def latency_ms(values):
+    if not values:
+        return None
+    return {"p50": percentile(values, 0.5), "p90": percentile(values, 0.9), "p95": percentile(values, 0.95),
+            "p99": percentile(values, 0.99), "max": max(values)}
+
+
+def summarize(samples, users, browser_users, wall_s):
+    """Response times, error rate and throughput of one load step."""
+    summary = {"users": users, "browser_users": browser_users, "wall_s": round(wall_s, 1)}
+    for channel in ("http", "browser"):
+        picked = [sample for sample in samples if sample["channel"] == channel]
+        if not picked:
+            continue
+        errors = [sample for sample in picked if not sample["ok"]]
+        steps = sorted({sample["step"] for sample in picked})
+        summary[channel] = {
+            "requests": len(picked),
+            "errors": len(errors),
+            "error_rate": round(len(errors) / len(picked), 4),
+            "throughput_per_s": round(len(picked) / wall_s, 2),
+            "latency_ms": latency_ms([sample["ms"] for sample in picked if sample["ok"]]),
+            "by_step": {step: {
+                "requests": sum(1 for sample in picked if sample["step"] == step),
+                "errors": sum(1 for sample in errors if sample["step"] == step),
+                "latency_ms": latency_ms([sample["ms"] for sample in picked if sample["step"] == step and sample["ok"]]),
+            } for step in steps},
+            "top_errors": sorted({sample["error"] for sample in errors})[:10],
+        }
+    return summary
+
+
+def run_step(base_url, users, duration, ramp_up, think_time, mix, browser_users):
+    """Run users virtual users for ramp_up + duration seconds; the first browser_users of them in Chrome."""
+    samples = Samples()
+    stop = threading.Event()
+    threads = []
+    for index, role in enumerate(assign_roles(users, mix)):
+        if index < browser_users:
+            target = run_browser_user
+        else:
+            target = lambda *args: HttpUser(*args).run()
+
+        def start(target=target, args=(index, role, base_url, samples, think_time, stop),
+                  delay=ramp_up * index / users):
+            # Ramp up linearly: user i starts i/users of the way through ramp_up
+            if not stop.wait(delay):
+                try:
+                    target(*args)
+                except Exception as e:
+                    logging.warning(f"Virtual user {args[0]} ({args[1]}) stopped: {str(e)}")
+
+        threads.append(threading.Thread(target=start, name=f"vu-{index}", daemon=True))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(ramp_up + duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=60)
+    return summarize(samples.items, users, min(browser_users, users), time.perf_counter() - started)
+
+
+def start_stand_in(seed):
+    """The local stand-in on a free port, with seed Created and seed Moderated items of each kind."""
+    from support import stand_in_cms
+
+    stand_in_cms.STORE.reset()
+    for kind in KINDS:
+        for number in range(seed):
+            stand_in_cms.STORE.add(kind, f"{LOAD_TITLE} seed {number}", LOAD_KN_TITLE, status="Created")
+            stand_in_cms.STORE.add(kind, f"{LOAD_TITLE} seed {number}", LOAD_KN_TITLE, status="Moderated")
+    server = stand_in_cms.start(port=0)
+    return server, stand_in_cms.base_url(server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the role flows as concurrent virtual users")
+    parser.add_argument("--users", default="5,10,20", help="Comma-separated concurrency steps")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per step after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which each step's users start")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between a user's requests")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("creator=1,moderator=1,approver=1"))
+    parser.add_argument("--browser-users", type=int, default=0, help="Users per step driving Chrome instead of HTTP")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--stand-in", action="store_true", help="Start the local stand-in and load that")
+    parser.add_argument("--seed", type=int, default=50, help="Queued items per kind and status, with --stand-in")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server, base_url = start_stand_in(args.seed) if args.stand_in else (None, args.base_url)
+    steps = []
+    try:
+        for users in (int(value) for value in args.users.split(",")):
+            logging.info(f"Step: {users} users ({min(args.browser_users, users)} in Chrome) on {base_url}")
+            step = run_step(base_url, users, args.duration, args.ramp_up, args.think_time, args.mix,
+                            args.browser_users)
+            steps.append(step)
+            http = step.get("http") or {}
+            logging.info(f"{users} users: {http.get('requests', 0)} requests, "
+                         f"error rate {http.get('error_rate', 0):.1%}, p95 {(http.get('latency_ms') or {}).get('p95')} ms")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    report = {"target": "stand-in" if args.stand_in else base_url, "mix": args.mix, "think_time_s": args.think_time,
+              "ramp_up_s": args.ramp_up, "duration_s": args.duration, "steps": steps}
+    os.makedirs(PERF_DIR, exist_ok=True)
+    with open(os.path.join(PERF_DIR, "load.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("users  requests  errors  rps      p50     p95     p99")
+    for step in steps:
+        http = step.get("http")
+        if http:
+            latency = http["latency_ms"] or {}
+            print(f"{step['users']:>5}  {http['requests']:>8}  {http['error_rate']:>6.1%}  {http['throughput_per_s']:>5}"
+                  f"  {latency.get('p50', '-'):>6}  {latency.get('p95', '-'):>6}  {latency.get('p99', '-'):>6}")
+
+
+if __name__ == "__main__":
+    main()
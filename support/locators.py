@@ -0,0 +1,187 @@
+"""
+Locators with ordered fallbacks that remember which variant worked.
+
+A Locator declares the ways an element can be found: XPath, id, name, CSS or
+its visible text. find() tries them all together in one in-page lookup that
+polls until one matches, so markup that drifts away from the first variant
+costs one more loop iteration in the page instead of a 10 s timeout. The
+variant that matched is recorded per page (URL path, numeric ids folded)
+and tried first on that page next time; LocatorHistory keeps that across runs.
+
+    edit_button = find(driver, MenuList.EDIT_BUTTON, clickable=True, root=row)
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+from support import tracing
+from support.config import LOCATOR_HISTORY
+
+# Not a selenium By: an <a>, <button>, submit input or <span> whose text (or value) is exactly this
+TEXT = "text"
+
+# Polls the variants, the one learned for this page first, until one
+# matches. XPaths are evaluated with root as the context node, so row-scoped
+# variants start with '.'.
+FIND_SCRIPT = """
+var variants = arguments[0], learned = arguments[1], root = arguments[2] || document;
+var visible = arguments[3], clickable = arguments[4], timeout = arguments[5];
+var done = arguments[arguments.length - 1], deadline = Date.now() + timeout;
+var page = location.pathname.split('/').map(function (part) {
+  return /^[0-9]+$/.test(part) ? '{id}' : part;
+}).join('/') || '/';
+
+var order = variants.map(function (v, i) { return i; });
+if (page in learned) {
+  order.splice(order.indexOf(learned[page]), 1);
+  order.unshift(learned[page]);
+}
+
+function norm(s) { return (s || '').replace(/\\s+/g, ' ').trim(); }
+
+function locate(by, value) {
+  if (by === 'xpath') {
+    return document.evaluate(value, root, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+  }
+  if (by === 'id' || by === 'name') {
+    return root.querySelector('[' + by + '="' + value.replace(/"/g, '\\\\"') + '"]');
+  }
+  if (by === 'text') {
+    var candidates = root.querySelectorAll('a, button, input[type=submit], input[type=button], span');
+    for (var i = 0; i < candidates.length; i++) {
+      var c = candidates[i];
+      if (norm(c.tagName === 'INPUT' ? c.value : c.textContent) === value) { return c; }
+    }
+    return null;
+  }
+  return root.querySelector(value);
+}
+
+function shown(e) {
+  return !!(e.offsetWidth || e.offsetHeight || e.getClientRects().length) &&
+    window.getComputedStyle(e).visibility !== 'hidden';
+}
+
+(function poll() {
+  for (var n = 0; n < order.length; n++) {
+    var i = order[n], found = null;
+    try { found = locate(variants[i][0], variants[i][1]); } catch (err) { /* invalid for this page */ }
+    if (found && (!(visible || clickable) || shown(found)) && !(clickable && found.disabled)) {
+      done({element: found, index: i, page: page});
+      return;
+    }
+  }
+  if (Date.now() > deadline) { done({element: null, page: page}); return; }
+  setTimeout(poll, 100);
+})();
+"""
+
+
+def variant_key(variant):
+    by, value = variant
+    return f"{by}={value}"
+
+
+class Locator:
+    """An element's ordered variants, as (By, value) tuples.
+
+    Declared as a class attribute, its name is "<Class>.<ATTRIBUTE>".
+    """
+
+    def __init__(self, *variants, name=None):
+        self.variants = list(variants)
+        self.name = name
+
+    def __set_name__(self, owner, name):
+        if self.name is None:
+            self.name = f"{owner.__name__}.{name}"
+
+    def __repr__(self):
+        return f"Locator({self.name})"
+
+
+class LocatorHistory:
+    """Which variant of each locator matched last, per page, in a JSON file.
+
+    {page: {locator name: {"variant": "by=value", "hits": n, "updated": epoch}}}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = None
+        self.changed = set()
+
+    def load(self):
+        if self.entries is None:
+            self.entries = self.read()
+        return self.entries
+
+    def read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def learned(self, locator):
+        """{page: index into locator.variants} of the variant that matched last on each page."""
+        keys = [variant_key(v) for v in locator.variants]
+        with self.lock:
+            return {page: keys.index(names[locator.name]["variant"])
+                    for page, names in self.load().items()
+                    if locator.name in names and names[locator.name]["variant"] in keys}
+
+    def record(self, locator, page, variant):
+        key = variant_key(variant)
+        with self.lock:
+            pages = self.load().setdefault(page, {})
+            learned = pages.get(locator.name)
+            if learned is None or learned["variant"] != key:
+                if variant != locator.variants[0]:
+                    logging.warning(f"Locator {locator.name} fell back to {key} on {page}")
+                learned = pages[locator.name] = {"variant": key, "hits": 0}
+            learned["hits"] += 1
+            learned["updated"] = round(time.time())
+            self.changed.add((page, locator.name))
+
+    def save(self):
+        """Write what this run learned over the file's current content (shard processes share it)."""
+        with self.lock:
+            if not self.changed:
+                return
+            merged = self.read()
+            for page, name in self.changed:
+                merged.setdefault(page, {})[name] = self.entries[page][name]
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+            self.changed.clear()
+
+
+HISTORY = LocatorHistory(LOCATOR_HISTORY)
+
+
+def find(driver, locator, visible=False, clickable=False, root=None, timeout=10):
+    """Wait for the first variant of locator that matches, in one in-page lookup.
+
+    visible and clickable match visibility_of_element_located and
+    element_to_be_clickable. root scopes the lookup to an element's subtree.
+    """
+    with tracing.span(f"find {locator.name}", **{"wait.timeout_s": float(timeout)}):
+        variants = [list(v) for v in locator.variants]
+        # The page gives up half a second before the script timeout, to report which locator failed
+        driver.set_script_timeout(timeout)
+        result = driver.execute_async_script(FIND_SCRIPT, variants, HISTORY.learned(locator), root,
+                                             visible, clickable, timeout * 1000 - 500)
+        if result["element"] is None:
+            tried = ", ".join(variant_key(v) for v in locator.variants)
+            raise TimeoutException(f"{locator.name} not found on {result['page']} within {timeout}s; tried {tried}")
+        HISTORY.record(locator, result["page"], locator.variants[result["index"]])
+        return result["element"]
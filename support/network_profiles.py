@@ -0,0 +1,31 @@
+"""
+Named network conditions for Network.emulateNetworkConditions.
+
+Throughput is in bytes per second and latency in milliseconds, as CDP
+expects. Profiles are listed from mildest to harshest; the comparison run
+mode relies on that order to report which screens break down first.
+"""
+from support.config import NETWORK_PROFILE
+
+KBIT = 1000 / 8
+MBIT = 1000 * KBIT
+
+PROFILES = {
+    # District office on an ADSL line shared by a few desks
+    "office-dsl": {"latency": 50, "downloadThroughput": 2 * MBIT, "uploadThroughput": 512 * KBIT},
+    # Taluk offices falling back to a mobile hotspot
+    "3g": {"latency": 300, "downloadThroughput": 750 * KBIT, "uploadThroughput": 250 * KBIT},
+    # Satellite / VSAT links: bandwidth is fine, round trips are not
+    "high-latency": {"latency": 800, "downloadThroughput": 10 * MBIT, "uploadThroughput": 5 * MBIT},
+}
+
+
+def apply_profile(driver, name=NETWORK_PROFILE):
+    """Throttle driver's network to the named profile; no-op for an empty name."""
+    if not name:
+        return None
+    if name not in PROFILES:
+        raise ValueError(f"Unknown network profile '{name}', expected one of {', '.join(PROFILES)}")
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.emulateNetworkConditions", {"offline": False, **PROFILES[name]})
+    return PROFILES[name]
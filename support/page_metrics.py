@@ -0,0 +1,202 @@
+"""
+Page-load metrics for every Allure step that navigates.
+
+PageMetrics is an allure_commons plugin: at step start it notes the page's
+performance.timeOrigin and URL, and at step stop, if either changed, it
+collects Navigation/Resource/Paint timings plus CDP Performance.getMetrics,
+attaches them to the step as JSON and keeps a compact record per page.
+At session end the records are appended to the run history and a per-page
+summary with the load-time trend is written next to it.
+"""
+import json
+import logging
+import os
+import re
+import statistics
+import time
+from urllib.parse import urlparse
+
+import allure
+from allure_commons import hookimpl
+from selenium.common.exceptions import WebDriverException
+
+from support.config import PERF_DIR, run_variant
+from support.driver import current_driver
+
+STATE_SCRIPT = "return [performance.timeOrigin, location.href, performance.now()];"
+
+TIMINGS_SCRIPT = """
+var since = arguments[0];
+var nav = performance.getEntriesByType('navigation')[0];
+return {
+  url: location.href,
+  navigation: nav ? nav.toJSON() : null,
+  paint: performance.getEntriesByType('paint').map(function (e) { return e.toJSON(); }),
+  resources: performance.getEntriesByType('resource').filter(function (e) {
+    return e.startTime >= since;
+  }).map(function (e) {
+    return {name: e.name, initiatorType: e.initiatorType, startTime: e.startTime,
+            duration: e.duration, responseEnd: e.responseEnd,
+            transferSize: e.transferSize, encodedBodySize: e.encodedBodySize};
+  })
+};
+"""
+
+CDP_METRICS = ("JSHeapUsedSize", "JSHeapTotalSize", "Nodes", "LayoutCount", "LayoutDuration",
+               "RecalcStyleCount", "RecalcStyleDuration", "ScriptDuration", "TaskDuration")
+
+ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+
+def page_key(url):
+    """Group URLs by page: drop the query and replace numeric ids with :id."""
+    return ID_SEGMENT_RE.sub("/:id", urlparse(url).path) or "/"
+
+
+def page_state(driver):
+    try:
+        return driver.execute_script(STATE_SCRIPT)
+    except WebDriverException:
+        # No page yet, an alert is open or the browser is gone
+        return None
+
+
+def collect(driver, since=0):
+    """Timings of the current page (resources from since onwards) plus CDP metrics."""
+    data = driver.execute_script(TIMINGS_SCRIPT, since)
+    if not hasattr(driver, "execute_cdp_cmd"):
+        # Selenium Grid session: page timings only
+        data["cdp_metrics"] = {}
+        return data
+    try:
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        data["cdp_metrics"] = {metric["name"]: metric["value"] for metric in metrics}
+    except WebDriverException as e:
+        logging.debug(f"Performance.getMetrics unavailable: {str(e)}")
+        data["cdp_metrics"] = {}
+    return data
+
+
+def summarize(step, data, soft, since):
+    """Compact record of one navigation for the per-page summary."""
+    nav = data.get("navigation")
+    resources = data.get("resources", [])
+    if nav and not soft:
+        load_ms = nav["loadEventEnd"] - nav["startTime"] if nav["loadEventEnd"] else nav["duration"]
+        dom_ms = nav["domContentLoadedEventEnd"] - nav["startTime"]
+        ttfb_ms = nav["responseStart"] - nav["requestStart"]
+    else:
+        # Soft (ajax/pushState) navigation: time until the last resource finished
+        load_ms = max((r["responseEnd"] for r in resources), default=since) - since
+        dom_ms = ttfb_ms = None
+    paint = {entry["name"]: entry["startTime"] for entry in data.get("paint", [])}
+    metrics = data.get("cdp_metrics", {})
+    return {
+        "step": step,
+        "page": page_key(data["url"]),
+        "url": data["url"],
+        "soft": soft,
+        "load_ms": load_ms,
+        "dom_content_loaded_ms": dom_ms,
+        "ttfb_ms": ttfb_ms,
+        "first_contentful_paint_ms": None if soft else paint.get("first-contentful-paint"),
+        "resources": len(resources),
+        "transfer_bytes": sum(r.get("transferSize") or 0 for r in resources),
+        **{name: metrics.get(name) for name in CDP_METRICS},
+    }
+
+
+class PageMetrics:
+    """allure_commons plugin collecting page metrics for navigating steps."""
+
+    def __init__(self, perf_dir=PERF_DIR, variant=None):
+        self.perf_dir = perf_dir
+        self.variant = variant or run_variant()
+        self.started = {}
+        self.titles = {}
+        self.last_origin = None
+        self.records = []
+
+    @hookimpl
+    def start_step(self, uuid, title, params):
+        self.titles[uuid] = title
+        driver = current_driver()
+        if driver is not None:
+            self.started[uuid] = page_state(driver)
+
+    @hookimpl(tryfirst=True)
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        # tryfirst: attach while the step is still the current Allure step
+        before = self.started.pop(uuid, None)
+        title = self.titles.pop(uuid, "")
+        driver = current_driver()
+        if driver is None:
+            return
+        after = page_state(driver)
+        if after is None:
+            return
+
+        origin, url, _ = after
+        hard = before is None or origin != before[0]
+        soft = not hard and url != before[1]
+        if not (hard or soft) or (hard and origin == self.last_origin):
+            # No navigation, or an inner step already reported this page load
+            return
+        self.last_origin = origin
+
+        since = 0 if hard else before[2]
+        try:
+            data = collect(driver, since)
+        except WebDriverException as e:
+            logging.warning(f"Could not collect page metrics: {str(e)}")
+            return
+        allure.attach(json.dumps(data, indent=2), name="page performance",
+                      attachment_type=allure.attachment_type.JSON)
+        self.records.append({"variant": self.variant, **summarize(title, data, soft, since)})
+
+    def write_summary(self):
+        """Append this run to the history and rewrite the per-page summary."""
+        if not self.records:
+            return None
+        os.makedirs(self.perf_dir, exist_ok=True)
+        run = time.strftime("%Y-%m-%dT%H:%M:%S")
+        history_path = os.path.join(self.perf_dir, "page_timings.jsonl")
+        with open(history_path, "a", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps({"run": run, **record}, ensure_ascii=False) + "\n")
+
+        history = []
+        with open(history_path, encoding="utf-8") as f:
+            for line in f:
+                history.append(json.loads(line))
+
+        summary = {}
+        for page in sorted({record["page"] for record in self.records}):
+            loads = [record["load_ms"] for record in self.records if record["page"] == page]
+            trend = {}
+            for record in history:
+                if record["page"] == page:
+                    trend.setdefault(record["run"], []).append(record["load_ms"])
+            by_variant = {}
+            for record in history:
+                if record["page"] == page:
+                    by_variant.setdefault(record.get("variant", "baseline"), []).append(record["load_ms"])
+            medians = {variant: statistics.median(values) for variant, values in by_variant.items()}
+            summary[page] = {
+                "variant": self.variant,
+                "navigations": len(loads),
+                "median_load_ms": statistics.median(loads),
+                "max_load_ms": max(loads),
+                "trend": [{"run": run_id, "median_load_ms": statistics.median(values)}
+                          for run_id, values in trend.items()],
+                # Historical median per network setup, and this setup's change against baseline
+                "median_load_ms_by_variant": medians,
+                "change_vs_baseline_ms": (medians[self.variant] - medians["baseline"]
+                                          if "baseline" in medians and self.variant != "baseline" else None),
+            }
+
+        summary_path = os.path.join(self.perf_dir, "page_summary.json")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump({"run": run, "pages": summary}, f, indent=2, ensure_ascii=False)
+        logging.info(f"Page performance summary written to {summary_path}")
+        return summary_path
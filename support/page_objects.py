@@ -0,0 +1,73 @@
+"""
+Locators of the back office pages the role flows touch, as fallback chains.
+
+The first variant of each is the one the test modules have always used; the
+rest find the same element by id, name, CSS or text when the markup drifts.
+Generic fallbacks (any submit button, any "Save") are scoped to the form
+they belong to, so a learned fallback cannot settle on another element.
+Row-scoped locators are looked up with find(..., root=row) and their XPath
+variants start with '.'.
+"""
+from selenium.webdriver.common.by import By
+
+from support.locators import TEXT, Locator
+
+# The forms, told apart by a field only they have
+LOGIN_FORM = "//form[.//input[@type='password']]"
+MENU_FORM = "//form[.//*[@name='menu_category']]"
+PAGE_FORM = "//form[.//*[@name='data_page_category_id']]"
+
+
+def submit_in(form, label):
+    """XPath variants for a form's submit control: by type, then by its label."""
+    return ((By.XPATH, f"{form}//*[@type='submit']"),
+            (By.XPATH, f"{form}//*[(self::input and @value='{label}') or (self::button and normalize-space()='{label}')]"))
+
+
+class Login:
+    USERNAME = Locator((By.XPATH, "//input[@placeholder='Username']"), (By.ID, "username"), (By.NAME, "username"),
+                       (By.XPATH, f"{LOGIN_FORM}//input[@type='text' or @type='email']"))
+    PASSWORD = Locator((By.XPATH, "//input[@placeholder='Password']"), (By.ID, "password"), (By.NAME, "password"),
+                       (By.CSS_SELECTOR, "form input[type='password']"))
+    SUBMIT = Locator((By.XPATH, "//input[@name='login_button']"), (By.ID, "login_button"), (By.NAME, "login_button"),
+                     *submit_in(LOGIN_FORM, "Login"))
+
+
+class Sidebar:
+    MAIN_MENU = Locator((By.XPATH, "//span[normalize-space()='Main Menu']"), (By.CSS_SELECTOR, "a[href$='/menu']"),
+                        (TEXT, "Main Menu"))
+    PAGES = Locator((By.XPATH, "//span[normalize-space()='Pages']"), (By.CSS_SELECTOR, "a[href$='/pages']"),
+                    (TEXT, "Pages"))
+
+
+class MenuList:
+    EDIT_BUTTON = Locator((By.XPATH, ".//a[@class='btn btn-primary btn-sm edit_menu_button']"),
+                          (By.CSS_SELECTOR, "a.edit_menu_button"),
+                          (By.XPATH, ".//a[.//i[contains(@class, 'glyphicon-pencil')]]"),
+                          (By.CSS_SELECTOR, "a[href*='/menu/edit/']"))
+
+
+class MenuForm:
+    SUBMIT = Locator((By.XPATH, "//input[@name='add_menu_submit_button']"), (By.ID, "add_menu_submit_button"),
+                     (By.NAME, "add_menu_submit_button"), *submit_in(MENU_FORM, "Save"))
+    APPROVE = Locator((By.XPATH, "//a[@class='btn btn-success menu_approve_btn']"),
+                      (By.CSS_SELECTOR, "a.menu_approve_btn"), (By.CSS_SELECTOR, "a[href*='/menu/approve/']"),
+                      (By.XPATH, "//div[@id='content']//a[normalize-space()='Approve']"))
+
+
+class PageList:
+    # Every variant returns the <a>, so the element is the same whichever one matched
+    EDIT_BUTTON = Locator((By.XPATH, ".//a[@class='btn btn-primary btn-sm'][.//i[@class='glyphicon glyphicon-pencil']]"),
+                          (By.CSS_SELECTOR, "a[href*='/pages/edit/']"),
+                          (By.XPATH, ".//a[.//i[contains(@class, 'glyphicon-pencil')]]"))
+    VIEW_BUTTON = Locator((By.XPATH, ".//a[@class='btn btn-primary btn-sm'][.//i[@class='glyphicon glyphicon-eye-open']]"),
+                          (By.CSS_SELECTOR, "a[href*='/pages/view/']"),
+                          (By.XPATH, ".//a[.//i[contains(@class, 'glyphicon-eye-open')]]"))
+
+
+class PageForm:
+    SUBMIT = Locator((By.XPATH, "//input[@name='add_edit_page_button']"), (By.ID, "add_edit_page_button"),
+                     (By.NAME, "add_edit_page_button"), *submit_in(PAGE_FORM, "Save"))
+    APPROVE = Locator((By.XPATH, "//a[@class='btn btn-sm btn-success']"),
+                      (By.CSS_SELECTOR, "a[href*='/pages/approve/']"),
+                      (By.XPATH, "//div[@id='content']//a[normalize-space()='Approve']"))
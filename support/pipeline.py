@@ -0,0 +1,157 @@
+"""
+Follow each content item from the creator's save to its approval.
+
+When the creator's save is confirmed the item gets a correlation ID. The
+moderator's and approver's confirmed steps are recorded against the open
+item with the same kind and title. Stage times are the times of the
+success flashes the steps ended with, taken from the flash watcher, so
+they are when the CMS confirmed the step rather than when a test got to
+check it.
+
+Events are appended to perf_history/pipeline_events.jsonl, so the role
+modules add to one record even when they run in different sessions. The
+run summary has time-to-moderate, time-to-approve and items per minute
+through the whole pipeline, with percentiles. It is written to
+perf_history/pipeline.json. Every recorded step labels its test with the
+correlation ID and attaches the item's timeline so far.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import allure
+
+from support.backlog import latency_summary
+from support.config import ITEM_TITLE, PERF_DIR, SHARD
+from support.flash import flash_messages
+
+EVENTS_FILE = "pipeline_events.jsonl"
+STAGES = ("created", "moderated", "approved")
+
+RUN_ID = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+LOCK = threading.Lock()
+
+
+def events_path(perf_dir=PERF_DIR):
+    return os.path.join(perf_dir, EVENTS_FILE)
+
+
+def read_events(path=None):
+    path = path or events_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def open_item(events, kind, title, stage):
+    """Correlation ID of the latest item of kind and title that has not reached stage yet."""
+    reached = {event["correlation_id"] for event in events if event["stage"] == stage}
+    for event in reversed(events):
+        if (event["stage"] == "created" and event["kind"] == kind and event["title"] == title
+                and event["correlation_id"] not in reached):
+            return event["correlation_id"]
+    return None
+
+
+def completed_at(driver, message=None):
+    """Epoch seconds of the step's success flash; the latest one on the page when message is None."""
+    if message is None:
+        try:
+            successes = [m for m in flash_messages(driver) if m["kind"] == "success"]
+        except Exception:
+            successes = []
+        message = successes[-1] if successes else None
+    return message["time"] / 1000 if message else time.time()
+
+
+def timeline(events, correlation_id):
+    """The item's stages in order, with seconds since creation."""
+    stages = sorted((event for event in events if event["correlation_id"] == correlation_id),
+                    key=lambda event: event["time"])
+    created = next((event["time"] for event in stages if event["stage"] == "created"), None)
+    return [{"stage": event["stage"], "time": event["time"], "run": event["run"], "shard": event["shard"],
+             "since_created_s": round(event["time"] - created, 2) if created is not None else None}
+            for event in stages]
+
+
+def record(driver, kind, stage, message=None, title=ITEM_TITLE):
+    """Record that stage of the kind item titled title completed; returns its correlation ID.
+
+    message is the flash wait_for_flash returned for the step, if the test
+    has it. A moderated or approved step with no created item to attach to
+    (it was created outside these runs) is logged and not recorded.
+    """
+    at = completed_at(driver, message)
+    with LOCK:
+        events = read_events()
+        if stage == "created":
+            correlation_id = uuid.uuid4().hex[:12]
+        else:
+            correlation_id = open_item(events, kind, title, stage)
+            if correlation_id is None:
+                logging.info(f"No created {kind} '{title}' on record, not tracking its {stage} step")
+                return None
+        event = {"correlation_id": correlation_id, "kind": kind, "title": title, "stage": stage,
+                 "time": round(at, 3), "run": RUN_ID, "shard": SHARD or None}
+        os.makedirs(PERF_DIR, exist_ok=True)
+        with open(events_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        events.append(event)
+
+    allure.dynamic.label("correlation_id", correlation_id)
+    allure.attach(json.dumps(timeline(events, correlation_id), indent=2),
+                  name=f"pipeline timeline {kind} {correlation_id}", attachment_type=allure.attachment_type.JSON)
+    return correlation_id
+
+
+def last_stage(item):
+    return [stage for stage in STAGES if stage in item][-1]
+
+
+def summarize(events, run_ids=None):
+    """Pipeline throughput and stage latencies of the items with an event in run_ids (all items when None)."""
+    ids = {event["correlation_id"] for event in events if run_ids is None or event["run"] in run_ids}
+    items = {}
+    for event in events:
+        if event["correlation_id"] in ids:
+            item = items.setdefault(event["correlation_id"], {"kind": event["kind"], "title": event["title"]})
+            item[event["stage"]] = event["time"]
+
+    tracked = [item for item in items.values() if "created" in item]
+    to_moderate = [item["moderated"] - item["created"] for item in tracked if "moderated" in item]
+    to_approve = [item["approved"] - item["created"] for item in tracked if "approved" in item]
+    approval_stage = [item["approved"] - item["moderated"] for item in tracked
+                      if "approved" in item and "moderated" in item]
+
+    approved = [item for item in tracked if "approved" in item]
+    span_s = (max(item["approved"] for item in approved) - min(item["created"] for item in approved)
+              if approved else 0)
+    return {
+        "items": len(tracked),
+        "approved": len(approved),
+        # Items whose furthest stage is created or moderated
+        "in_flight": {stage: sum(1 for item in tracked if last_stage(item) == stage) for stage in STAGES[:-1]},
+        "pipeline_span_s": round(span_s, 2),
+        "items_per_minute": round(len(approved) / span_s * 60, 2) if span_s else None,
+        "time_to_moderate_s": latency_summary(to_moderate),
+        "time_to_approve_s": latency_summary(to_approve),
+        "moderated_to_approved_s": latency_summary(approval_stage),
+        "timelines": {correlation_id: timeline(events, correlation_id) for correlation_id in sorted(ids)},
+    }
+
+
+def write_summary(path=None):
+    """Summarize this run's items into perf_history/pipeline.json; nothing when no step was recorded."""
+    events = read_events()
+    if not any(event["run"] == RUN_ID for event in events):
+        return None
+    summary = summarize(events, {RUN_ID})
+    with open(path or os.path.join(PERF_DIR, "pipeline.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
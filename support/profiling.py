@@ -0,0 +1,183 @@
+"""
+Python-side profile of each test, with WebDriver waits kept apart.
+
+pytest --profile-tests runs every test under a sampling profiler. It reads
+the test thread's stack every PROFILE_INTERVAL seconds.
+--profile-tests=cprofile uses cProfile instead, which is deterministic
+and slower. Files go to perf_history/profiles/:
+
+- <test>.folded (sample) or <test>.prof (cprofile) for each test
+- tests.folded: every test's stacks under a module;test root frame, one
+  "frame;frame;... count" line per stack, ready for flamegraph.pl or
+  speedscope. In cprofile mode the merged file is merged.prof.
+- summary.json: each test's wall time split into time waiting on WebDriver
+  round trips, local CPU time outside them and the rest (sleeps between
+  polls, disk). webdriver_client_cpu_s is the test thread's CPU spent inside
+  the round trips, already part of webdriver_wait_s
+
+A sample taken while the test is inside Selenium's HTTP request gets a
+"[webdriver wait]" leaf frame, so the flame graph separates it from local
+work.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from support.config import PERF_DIR
+from support.driver import ACTIVE_DRIVERS
+
+PROFILE_INTERVAL = 0.005
+MODES = ("sample", "cprofile")
+
+# Frames of Selenium's HTTP client; a sample inside one is the test waiting on the driver
+WEBDRIVER_HTTP = os.path.join("selenium", "webdriver", "remote", "remote_connection.py")
+WAIT_FRAME = "[webdriver wait]"
+
+
+def safe_name(nodeid):
+    return re.sub(r"[^\w.-]+", "_", nodeid).strip("_")
+
+
+def driver_wait_s():
+    """WebDriver round-trip seconds so far, over the running drivers."""
+    return sum(getattr(driver, "driver_wait_s", 0.0) for driver in list(ACTIVE_DRIVERS))
+
+
+def driver_cpu_s(thread_id):
+    """CPU seconds thread_id has spent inside WebDriver round trips so far, over the running drivers."""
+    return sum(getattr(driver, "driver_cpu_s", {}).get(thread_id, 0.0) for driver in list(ACTIVE_DRIVERS))
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread into folded-stack counts."""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="test-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def run(self):
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                labels, waiting = [], False
+                while frame is not None:
+                    labels.append(frame_label(frame))
+                    waiting = waiting or frame.f_code.co_filename.endswith(WEBDRIVER_HTTP)
+                    frame = frame.f_back
+                labels.reverse()
+                if waiting:
+                    labels.append(WAIT_FRAME)
+                self.stacks[";".join(labels)] += 1
+            time.sleep(self.interval)
+
+
+class PerTestProfiler:
+    """Profiles each pytest test call; begin() and end() wrap it in conftest's pytest_runtest_call."""
+
+    def __init__(self, mode="sample", directory=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.directory = directory or os.path.join(PERF_DIR, "profiles")
+        self.summary = {}
+        self.merged = None
+        self.current = None
+        os.makedirs(self.directory, exist_ok=True)
+        if mode == "sample":
+            # tests.folded is appended to test by test; start it afresh for this session
+            open(os.path.join(self.directory, "tests.folded"), "w").close()
+
+    def begin(self):
+        if self.mode == "sample":
+            profiler = StackSampler(threading.get_ident())
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        # begin() and end() run on the test's thread, so thread_time() is that thread's CPU alone
+        thread_id = threading.get_ident()
+        self.current = (profiler, time.perf_counter(), time.thread_time(), driver_wait_s(),
+                        thread_id, driver_cpu_s(thread_id))
+
+    def end(self, nodeid):
+        profiler, wall_started, cpu_started, wait_started, thread_id, client_cpu_started = self.current
+        self.current = None
+        if self.mode == "sample":
+            profiler.stop()
+        else:
+            profiler.disable()
+        wall = time.perf_counter() - wall_started
+        webdriver_wait = driver_wait_s() - wait_started
+        # CPU inside ManagedBrowser.execute is already counted in webdriver_wait
+        client_cpu = driver_cpu_s(thread_id) - client_cpu_started
+        cpu = max(time.thread_time() - cpu_started - client_cpu, 0.0)
+
+        name = safe_name(nodeid)
+        result = {
+            "wall_s": round(wall, 3),
+            "webdriver_wait_s": round(webdriver_wait, 3),
+            # The test thread's CPU; background threads (the sampler, CDP listeners) are not counted
+            "cpu_s": round(cpu, 3),
+            "webdriver_client_cpu_s": round(client_cpu, 3),
+            "other_s": round(max(wall - webdriver_wait - cpu, 0.0), 3),
+        }
+        if self.mode == "sample":
+            stacks = profiler.stacks
+            result["samples"] = sum(stacks.values())
+            result["webdriver_wait_samples"] = sum(count for stack, count in stacks.items()
+                                                  if stack.endswith(WAIT_FRAME))
+            write_folded(os.path.join(self.directory, f"{name}.folded"), stacks)
+            with open(os.path.join(self.directory, "tests.folded"), "a", encoding="utf-8") as f:
+                root = nodeid.replace("::", ";")
+                for stack, count in stacks.items():
+                    f.write(f"{root};{stack} {count}\n")
+        else:
+            profiler.dump_stats(os.path.join(self.directory, f"{name}.prof"))
+            stats = pstats.Stats(profiler)
+            if self.merged is None:
+                self.merged = stats
+            else:
+                self.merged.add(stats)
+        self.summary[nodeid] = result
+        return result
+
+    def write_summary(self):
+        if not self.summary:
+            return None
+        if self.merged is not None:
+            self.merged.dump_stats(os.path.join(self.directory, "merged.prof"))
+        totals = {key: round(sum(result[key] for result in self.summary.values()), 3)
+                  for key in ("wall_s", "webdriver_wait_s", "cpu_s", "webdriver_client_cpu_s", "other_s")}
+        path = os.path.join(self.directory, "summary.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"mode": self.mode, "totals": totals, "tests": self.summary}, f, indent=2)
+        return path
+
+
+def write_folded(path, stacks):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
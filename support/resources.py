@@ -0,0 +1,180 @@
+"""
+CPU and memory of the browser under test, and a recycle policy built on it.
+
+ResourceSampler polls chromedriver and every process below it (Chrome's
+browser, renderer and GPU processes) on a background thread and keeps a
+timeline of their summed CPU% and RSS for each test window.
+
+RecyclePolicy counts the Allure steps run on the current browser; between
+tests, once the count or the sampled RSS passes its limit, the browser is
+swapped for a fresh one with the session restored (SharedChrome.restart).
+A recycle is put off while the page holds unsaved form or editor input, or
+shows a flash message that the next test may still be waiting to verify.
+
+    ZPS_RESOURCE_SAMPLER=1 ZPS_RECYCLE_AFTER_STEPS=200 ZPS_RECYCLE_RSS_MB=1500 pytest
+"""
+import logging
+import threading
+import time
+
+from allure_commons import hookimpl
+from selenium.common.exceptions import WebDriverException
+
+from support.config import RECYCLE_AFTER_STEPS, RECYCLE_RSS_MB, RESOURCE_SAMPLE_INTERVAL
+from support.driver import current_driver
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 1024 * 1024
+
+
+def driver_pid(driver):
+    """Pid of the chromedriver process behind driver, or None."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return process.pid if process is not None else None
+
+
+def process_tree(pid):
+    try:
+        root = psutil.Process(pid)
+        return [root] + root.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+class ResourceSampler:
+    """Background sampler of CPU% and RSS for the process tree of the current driver."""
+
+    def __init__(self, driver_source, interval=RESOURCE_SAMPLE_INTERVAL):
+        self.driver_source = driver_source
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.samples = []
+        self.processes = {}
+        self.last_rss = 0
+        self.thread = None
+        self.running = False
+
+    @staticmethod
+    def available():
+        if psutil is None:
+            logging.warning("psutil is not installed; resource sampling is disabled")
+            return False
+        return True
+
+    def sample(self):
+        driver = self.driver_source()
+        pid = driver_pid(driver) if driver is not None else None
+        if pid is None:
+            return None
+        cpu = rss = 0
+        alive = {}
+        for process in process_tree(pid):
+            # Reuse Process objects so cpu_percent() measures since the previous sample
+            process = self.processes.get(process.pid, process)
+            try:
+                cpu += process.cpu_percent(None)
+                rss += process.memory_info().rss
+            except psutil.Error:
+                continue
+            alive[process.pid] = process
+        self.processes = alive
+        self.last_rss = rss
+        return {"t": time.time(), "cpu_percent": round(cpu, 1), "rss_mb": round(rss / MB, 1),
+                "processes": len(alive)}
+
+    def run(self):
+        while self.running:
+            point = self.sample()
+            if point is not None:
+                with self.lock:
+                    self.samples.append(point)
+            time.sleep(self.interval)
+
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, name="resource-sampler", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(self.interval * 2)
+            self.thread = None
+
+    def mark(self):
+        with self.lock:
+            return len(self.samples)
+
+    def timeline(self, mark):
+        """Samples taken since mark, with times relative to the first of them."""
+        with self.lock:
+            samples = self.samples[mark:]
+        if not samples:
+            return None
+        start = samples[0]["t"]
+        return {
+            "interval_s": self.interval,
+            "peak_cpu_percent": max(sample["cpu_percent"] for sample in samples),
+            "peak_rss_mb": max(sample["rss_mb"] for sample in samples),
+            "samples": [{**sample, "t": round(sample["t"] - start, 2)} for sample in samples],
+        }
+
+
+class RecyclePolicy:
+    """allure_commons plugin counting steps, and the recycle decision taken between tests."""
+
+    def __init__(self, after_steps=RECYCLE_AFTER_STEPS, rss_mb=RECYCLE_RSS_MB, sampler=None):
+        self.after_steps = after_steps
+        self.rss_mb = rss_mb
+        self.sampler = sampler
+        self.steps = 0
+        self.driver = None
+        self.recycles = []
+
+    @hookimpl
+    def start_step(self, uuid, title, params):
+        driver = current_driver()
+        if driver is not self.driver:
+            # A module started (or was handed) another browser: its steps count from zero
+            self.driver = driver
+            self.steps = 0
+        self.steps += 1
+
+    def reason(self):
+        if self.after_steps and self.steps >= self.after_steps:
+            return f"{self.steps} steps since the browser started"
+        if self.rss_mb and self.sampler is not None and self.sampler.last_rss >= self.rss_mb * MB:
+            return f"RSS {self.sampler.last_rss / MB:.0f} MB"
+        return None
+
+    def maybe_recycle(self, driver):
+        """Restart driver's browser if the policy says so; returns the reason or None."""
+        reason = self.reason()
+        if reason is None or driver is None:
+            return None
+        try:
+            if driver.has_unsaved_input():
+                logging.info(f"Browser recycle ({reason}) deferred: the page has unsaved input")
+                return None
+            if driver.shows_flash():
+                # A save's alert, e.g. between test_submit_form and test_verify_success_message
+                logging.info(f"Browser recycle ({reason}) deferred: the page shows a flash message")
+                return None
+            driver.restart()
+        except WebDriverException as e:
+            if not driver.alive:
+                # The old browser was quit and the new one never started; the tests cannot go on with it
+                raise
+            logging.warning(f"Browser recycle ({reason}) failed: {str(e)}")
+            return None
+        logging.info(f"Browser recycled: {reason}")
+        self.recycles.append({"at": time.strftime("%Y-%m-%dT%H:%M:%S"), "reason": reason})
+        self.steps = 0
+        if self.sampler is not None:
+            self.sampler.last_rss = 0
+        return reason
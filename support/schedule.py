@@ -0,0 +1,94 @@
+"""
+Duration-aware assignment of test chains to Grid workers.
+
+A chain is the run of modules that must stay together and in order: the
+menu flows (creator → moderator → approver) or the page flows for one
+content item. Chain lengths are estimated from the start/stop times in past
+Allure results, then chains are handed out longest-processing-time first,
+each to the worker with the least predicted work so far.
+
+    python -m support.schedule --items 4 --workers 3
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+import statistics
+from collections import defaultdict
+
+from support.allure_results import duration_s, iter_results, module_name
+from support.config import FLOW_CHAINS
+
+HISTORY_DIRS = ("allure-results", "allure_results", "allure-resultspytest", "grid_runs/*/allure-results")
+
+# Used for a module that has never been run
+DEFAULT_MODULE_S = 60.0
+
+
+def module_durations(directories=HISTORY_DIRS):
+    """Median historical run time per test module, in seconds.
+
+    Each test's median over all its recorded runs is taken first and the
+    module's time is the sum over its tests, so modules recorded more often
+    do not weigh more.
+    """
+    per_test = defaultdict(list)
+    for pattern in directories:
+        for directory in sorted(glob.glob(pattern)):
+            for result in iter_results(directory):
+                duration = duration_s(result)
+                if duration is not None:
+                    per_test[(module_name(result), result.get("fullName", result["name"]))].append(duration)
+
+    modules = defaultdict(float)
+    for (module, _), durations in per_test.items():
+        modules[module] += statistics.median(durations)
+    return {module: round(total, 2) for module, total in modules.items()}
+
+
+def chain_duration(modules, durations):
+    known = list(durations.values())
+    fallback = statistics.median(known) if known else DEFAULT_MODULE_S
+    return sum(durations.get(os.path.splitext(module)[0], fallback) for module in modules)
+
+
+def chain_jobs(items, durations, chains=FLOW_CHAINS):
+    """One job per (item, chain) with its predicted duration."""
+    jobs = []
+    for shard, title in items:
+        for chain, modules in chains.items():
+            jobs.append({"shard": f"{shard}-{chain}", "item": title, "chain": chain, "flows": list(modules),
+                         "predicted_s": round(chain_duration(modules, durations), 2)})
+    return jobs
+
+
+def lpt(jobs, workers):
+    """Longest-processing-time-first assignment; returns (queues, predicted makespan)."""
+    queues = [[] for _ in range(workers)]
+    loads = [(0.0, index) for index in range(workers)]
+    heapq.heapify(loads)
+    for job in sorted(jobs, key=lambda job: job["predicted_s"], reverse=True):
+        load, index = heapq.heappop(loads)
+        queues[index].append(job)
+        heapq.heappush(loads, (load + job["predicted_s"], index))
+    return queues, max(load for load, _ in loads)
+
+
+def main():
+    from support.grid import shard_items
+
+    parser = argparse.ArgumentParser(description="Show how chains would be assigned to Grid workers")
+    parser.add_argument("--items", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--history", default=",".join(HISTORY_DIRS), help="Allure results directories (globs)")
+    args = parser.parse_args()
+
+    durations = module_durations(args.history.split(","))
+    queues, makespan = lpt(chain_jobs(shard_items(args.items), durations), args.workers)
+    print(json.dumps({"module_durations_s": durations, "predicted_makespan_s": round(makespan, 2),
+                      "workers": [[job["shard"] for job in queue] for queue in queues]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Concurrent login of every role at session start.
+
+With ZPS_PARALLEL_LOGIN=1 the session bootstrapper launches one browser per
+role needed by the collected modules and logs them all in at the same time
+from a thread pool, so session setup costs the slowest single login rather
+than the sum. The first module of a role gets that authenticated driver;
+later modules of the same role get a fresh browser primed with the role's
+cookie jar. Drivers handed out this way carry logged_in_as, and the login
+tests of the modules skip themselves for them.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from support.config import BASE_URL, PERF_DIR, USERS
+from support.driver import create_driver, login, make_current
+
+
+def role_of(module_name):
+    """Role whose account a test module logs in with ('test_moderator_pages' -> 'moderator')."""
+    for role in USERS:
+        if module_name.startswith(f"test_{role}_"):
+            return role
+    return None
+
+
+def logged_in_driver(role, base_url=BASE_URL):
+    """Launch a browser and log it in as role; returns (driver, launch seconds, login seconds)."""
+    started = time.perf_counter()
+    driver = create_driver()
+    launched = time.perf_counter()
+    try:
+        login(driver, role, base_url)
+        WebDriverWait(driver, 10).until(EC.invisibility_of_element_located((By.NAME, "login_button")))
+    except Exception:
+        driver.quit()
+        raise
+    driver.logged_in_as = role
+    return driver, launched - started, time.perf_counter() - launched
+
+
+class SessionPool:
+    """Authenticated drivers and cookie jars per role, handed out to the module fixtures."""
+
+    def __init__(self, base_url=BASE_URL):
+        self.base_url = base_url
+        self.lock = threading.Lock()
+        self.drivers = {}
+        self.cookies = {}
+        self.timings = {}
+
+    def bootstrap(self, roles):
+        """Log in every role concurrently; a role whose login fails falls back to the normal flow."""
+        roles = sorted(set(roles))
+        if not roles:
+            return None
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(roles), thread_name_prefix="login") as pool:
+            futures = {role: pool.submit(logged_in_driver, role, self.base_url) for role in roles}
+            for role, future in futures.items():
+                try:
+                    driver, launch_s, login_s = future.result()
+                except Exception as e:
+                    logging.warning(f"Concurrent login as {role} failed, its modules will log in themselves: {str(e)}")
+                    continue
+                self.drivers[role] = driver
+                self.cookies[role] = driver.get_cookies()
+                self.timings[role] = {"launch_s": round(launch_s, 2), "login_s": round(login_s, 2),
+                                      "total_s": round(launch_s + login_s, 2)}
+        wall_s = time.perf_counter() - started
+
+        report = {
+            "roles": self.timings,
+            "wall_s": round(wall_s, 2),
+            "slowest_role_s": max((timing["total_s"] for timing in self.timings.values()), default=None),
+            "sequential_s": round(sum(timing["total_s"] for timing in self.timings.values()), 2),
+        }
+        os.makedirs(PERF_DIR, exist_ok=True)
+        with open(os.path.join(PERF_DIR, "session_bootstrap.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"Logged in {', '.join(self.timings)} in {wall_s:.1f}s "
+                     f"(one after another would take {report['sequential_s']}s)")
+        return report
+
+    def take(self, role):
+        """Driver for a module of role: the bootstrapped one, a cookie-primed one, or a plain new one."""
+        with self.lock:
+            driver = self.drivers.pop(role, None)
+            cookies = self.cookies.get(role)
+        if driver is not None:
+            # Report plugins follow the most recent driver; the idle logged-in ones were started later
+            make_current(driver)
+            return driver
+
+        driver = create_driver()
+        if cookies:
+            driver.get(f"{self.base_url}/index")
+            driver.delete_all_cookies()
+            for cookie in cookies:
+                driver.add_cookie(cookie)
+            driver.logged_in_as = role
+        return driver
+
+    def close(self):
+        """Quit drivers that no module took."""
+        with self.lock:
+            drivers, self.drivers = list(self.drivers.values()), {}
+        for driver in drivers:
+            driver.quit()
@@ -0,0 +1,138 @@
+"""
+Latency budgets for Allure steps, checked against a rolling percentile.
+
+budget_step wraps allure.step with a budget such as "save_page <= 2s p95".
+The step's duration is appended to perf_history/step_latency.jsonl and
+the percentile over the budget's last ZPS_SLO_WINDOW runs is compared
+with the limit. The result is labelled on the test ("slo" =
+"save_page:met" or "save_page:breached") with the numbers attached. A
+breach warns, or fails the test with ZPS_SLO_MODE=fail once the window
+holds ZPS_SLO_MIN_SAMPLES runs; ZPS_SLO_MODE=off only records.
+
+    with budget_step("Click on the 'Save' button", "save_page <= 2s p95"):
+        save_button.click()
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+
+import allure
+
+from support.backlog import percentile
+from support.config import PERF_DIR, SLO_MIN_SAMPLES, SLO_MODE, SLO_WINDOW
+
+SPEC_RE = re.compile(r"^\s*(\w+)\s*<=\s*([\d.]+)\s*(ms|s)\s*p(\d+(?:\.\d+)?)\s*$")
+
+RUN = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class SloWarning(UserWarning):
+    """A step's rolling percentile is over its latency budget."""
+
+
+class Budget:
+    def __init__(self, spec):
+        match = SPEC_RE.match(spec)
+        if match is None:
+            raise ValueError(f"Latency budget '{spec}' is not like 'save_page <= 2s p95'")
+        name, limit, unit, rank = match.groups()
+        self.spec = spec.strip()
+        self.name = name
+        self.limit_s = float(limit) / (1000 if unit == "ms" else 1)
+        self.fraction = float(rank) / 100
+
+
+class LatencyHistory:
+    """Step durations per budget name, from this and earlier runs."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.durations = None
+        self.results = {}
+
+    def load(self):
+        if self.durations is None:
+            self.durations = {}
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        record = json.loads(line)
+                        self.durations.setdefault(record["budget"], []).append(record["duration_s"])
+            except (OSError, ValueError):
+                pass
+        return self.durations
+
+    def add(self, name, duration, test):
+        """Record a duration; returns the budget's window of recent durations, this one included."""
+        with self.lock:
+            durations = self.load().setdefault(name, [])
+            durations.append(duration)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"run": RUN, "budget": name, "test": test, "duration_s": round(duration, 3)}) + "\n")
+            return durations[-SLO_WINDOW:]
+
+
+HISTORY = LatencyHistory(os.path.join(PERF_DIR, "step_latency.jsonl"))
+
+
+def evaluate(budget, duration, test=None):
+    """Record duration against budget, label the test and warn or fail on a breach."""
+    window = HISTORY.add(budget.name, duration, test)
+    rolling = percentile(window, budget.fraction)
+    met = rolling <= budget.limit_s
+    result = {
+        "budget": budget.spec,
+        "duration_s": round(duration, 3),
+        f"rolling_p{budget.fraction * 100:g}_s": round(rolling, 3),
+        "window": len(window),
+        "status": "met" if met else "breached",
+    }
+    HISTORY.results[budget.name] = result
+
+    allure.dynamic.label("slo", f"{budget.name}:{result['status']}")
+    allure.attach(json.dumps(result, indent=2), name=f"latency budget {budget.name}",
+                  attachment_type=allure.attachment_type.JSON)
+    if met or SLO_MODE == "off":
+        return result
+
+    message = (f"{budget.name}: p{budget.fraction * 100:g} of the last {len(window)} runs is {rolling:.2f}s, "
+               f"over the {budget.limit_s:g}s budget (this run {duration:.2f}s)")
+    if SLO_MODE == "fail" and len(window) >= SLO_MIN_SAMPLES:
+        raise AssertionError(message)
+    logging.warning(message)
+    warnings.warn(message, SloWarning)
+    return result
+
+
+@contextmanager
+def budget_step(title, spec):
+    """allure.step(title) whose duration is held to the budget spec ("<name> <= <n>s|ms p<rank>").
+
+    The body should end on what the user waits for (the flash message, the
+    list on screen) and leave screenshots and other reporting to after it.
+    """
+    budget = Budget(spec)
+    with allure.step(title):
+        started = time.perf_counter()
+        yield
+        duration = time.perf_counter() - started
+    # A step that raised has no duration worth keeping; it only gets here when it passed
+    evaluate(budget, duration, os.environ.get("PYTEST_CURRENT_TEST", "").split(" ")[0] or None)
+
+
+def write_summary(path=None):
+    """Every budget checked this session with its last result, to perf_history/slo_summary.json."""
+    if not HISTORY.results:
+        return None
+    os.makedirs(PERF_DIR, exist_ok=True)
+    path = path or os.path.join(PERF_DIR, "slo_summary.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"run": RUN, "mode": SLO_MODE, "window": SLO_WINDOW, "budgets": HISTORY.results}, f, indent=2)
+    return path
@@ -0,0 +1,483 @@
+"""
+Local stand-in for the ZP Shivamogga back office.
+
+Serves just enough of the real markup (login form, Main Menu and Pages
+DataTables, add/edit forms, approve and trash actions, flash messages) for
+the test modules, plus a small JSON API used by support.generate_data to seed
+thousands of rows.
+
+jQuery, DataTables and TinyMCE come from their CDNs unless they have been
+fetched into ZPS_STAND_IN_ASSETS once; only then does the stand-in work offline.
+
+    python -m support.stand_in_cms --fetch-assets
+    python -m support.stand_in_cms --port 8000
+    ZPS_BASE_URL=http://127.0.0.1:8000 pytest test_approver_main_menu.py
+"""
+import argparse
+import html
+import io
+import itertools
+import json
+import logging
+import mimetypes
+import os
+import secrets
+import tarfile
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from support.config import PASSWORD, STAND_IN_ASSETS, USERS
+
+STATES = ("Created", "Moderated", "Approved", "Trashed")
+
+# Local file name under ZPS_STAND_IN_ASSETS -> CDN fallback
+ASSETS = {
+    "jquery.dataTables.min.css": "https://cdn.datatables.net/1.13.8/css/jquery.dataTables.min.css",
+    "jquery.min.js": "https://code.jquery.com/jquery-3.7.1.min.js",
+    "jquery.dataTables.min.js": "https://cdn.datatables.net/1.13.8/js/jquery.dataTables.min.js",
+    "tinymce/tinymce.min.js": "https://cdn.jsdelivr.net/npm/tinymce@6.8.5/tinymce.min.js",
+}
+# TinyMCE loads its theme, icons and skins relative to tinymce.min.js, so the whole package is unpacked
+TINYMCE_PACKAGE = "https://registry.npmjs.org/tinymce/-/tinymce-6.8.5.tgz"
+
+
+def asset_url(name):
+    if os.path.isfile(os.path.join(STAND_IN_ASSETS, name)):
+        return f"/assets/{name}"
+    return ASSETS[name]
+
+
+def datatables_assets():
+    return f"""
+<link rel="stylesheet" href="{asset_url('jquery.dataTables.min.css')}">
+<script src="{asset_url('jquery.min.js')}"></script>
+<script src="{asset_url('jquery.dataTables.min.js')}"></script>
+"""
+
+
+def tinymce_assets():
+    return f"""
+<script src="{asset_url('tinymce/tinymce.min.js')}"></script>
+<script>if (window.tinymce) {{ tinymce.init({{selector: 'textarea.tinymce'}}); }}</script>
+"""
+
+
+def fetch_assets(directory=STAND_IN_ASSETS):
+    """Download jQuery, DataTables and TinyMCE into directory so the stand-in can run offline."""
+    os.makedirs(directory, exist_ok=True)
+    for name, url in ASSETS.items():
+        if not name.startswith("tinymce/"):
+            urllib.request.urlretrieve(url, os.path.join(directory, name))
+    with urllib.request.urlopen(TINYMCE_PACKAGE) as response:
+        package = io.BytesIO(response.read())
+    root = os.path.realpath(os.path.join(directory, "tinymce"))
+    with tarfile.open(fileobj=package, mode="r:gz") as archive:
+        for member in archive.getmembers():
+            # npm tarballs keep everything under package/
+            path = os.path.realpath(os.path.join(root, member.name.split("/", 1)[-1]))
+            if not member.isfile() or not path.startswith(root + os.sep):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with archive.extractfile(member) as source, open(path, "wb") as target:
+                target.write(source.read())
+    logging.info(f"Stand-in assets fetched into {directory}")
+
+
+ROLES = {email: role for role, email in USERS.items()}
+
+
+class Store:
+    """In-memory menus and pages, shared by every request thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = {}
+        self.ids = itertools.count(1)
+        self.sessions = {}
+
+    def add(self, kind, name, kn_name, status="Created", **extra):
+        with self.lock:
+            item_id = next(self.ids)
+            item = {"id": item_id, "kind": kind, "name": name, "kn_name": kn_name, "status": status,
+                    "trashed_from": extra.get("trashed_from", "Created")}
+            self.items[item_id] = item
+            return item
+
+    def list(self, kind, trashed=False):
+        with self.lock:
+            return [item for item in self.items.values()
+                    if item["kind"] == kind and (item["status"] == "Trashed") == trashed]
+
+    def get(self, item_id):
+        with self.lock:
+            return self.items.get(item_id)
+
+    def set_status(self, item_id, status):
+        with self.lock:
+            item = self.items[item_id]
+            if status == "Trashed":
+                item["trashed_from"] = item["status"]
+            item["status"] = status
+            return item
+
+    def reset(self):
+        with self.lock:
+            self.items.clear()
+            self.ids = itertools.count(1)
+
+
+STORE = Store()
+
+
+def layout(body, flash=None, title="Zilla Panchayat Shivamogga"):
+    flash_html = f"<div class='alert alert-success'>{html.escape(flash)}</div>" if flash else ""
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>{datatables_assets()}</head>
+<body><div class="ch-container"><div class="row">
+<div id="content">{flash_html}{body}</div>
+<div id="sidebar" class="col-sm-2">
+<a class="ajax-link" href="/menu"><span>Main Menu</span></a>
+<a class="ajax-link" href="/pages"><span>Pages</span></a>
+</div>
+</div></div></body></html>"""
+
+
+def login_page():
+    return """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Zilla Panchayat Shivamogga</title></head>
+<body><form method="post" action="/login">
+<input type="text" name="username" placeholder="Username">
+<input type="password" name="password" placeholder="Password">
+<input type="submit" name="login_button" value="Login">
+</form></body></html>"""
+
+
+def title_cell(item):
+    return f"{html.escape(item['name'])}<br>{html.escape(item['kn_name'])}"
+
+
+def menu_actions(item, trashed):
+    if trashed:
+        return f"<a class='btn btn-success btn-sm' href='/menu/restore/{item['id']}'><i class='glyphicon glyphicon-refresh'></i></a>"
+    return (f"<a class='btn btn-primary btn-sm edit_menu_button' href='/menu/edit/{item['id']}'><i class='glyphicon glyphicon-pencil'></i></a> "
+            f"<a class='btn btn-danger btn-sm' href='/menu/trash/{item['id']}'><i class='glyphicon glyphicon-trash'></i></a>")
+
+
+def page_actions(item, trashed):
+    if trashed:
+        return f"<a class='btn btn-success btn-sm' href='/pages/restore/{item['id']}'><i class='glyphicon glyphicon-refresh'></i></a>"
+    return (f"<a class='btn btn-primary btn-sm' href='/pages/edit/{item['id']}'><i class='glyphicon glyphicon-pencil'></i></a> "
+            f"<a class='btn btn-primary btn-sm' href='/pages/view/{item['id']}'><i class='glyphicon glyphicon-eye-open'></i></a> "
+            f"<a class='btn btn-danger btn-sm' href='/pages/trash/{item['id']}'><i class='glyphicon glyphicon-trash'></i></a>")
+
+
+def table_row(item, cells):
+    return f"<tr id='item-{item['id']}'>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>"
+
+
+def menu_row(index, item, trashed):
+    return table_row(item, menu_cells(index, item, trashed))
+
+
+def page_row(index, item, trashed):
+    return table_row(item, page_cells(index, item, trashed))
+
+
+def menu_cells(index, item, trashed):
+    return [index, title_cell(item), "#", "Main Menu", "Link", "-", item["status"], menu_actions(item, trashed)]
+
+
+def page_cells(index, item, trashed):
+    return [index, title_cell(item), "Horizontal Tabs", item["status"], page_actions(item, trashed)]
+
+
+def list_data(kind, trashed):
+    """DataTables ajax payload: one object per row, keys in column order."""
+    cells = menu_cells if kind == "menu" else page_cells
+    data = []
+    for index, item in enumerate(STORE.list(kind, trashed), 1):
+        row = {"DT_RowId": f"item-{item['id']}"}
+        row.update((str(column), value) for column, value in enumerate(cells(index, item, trashed)))
+        data.append(row)
+    return {"data": data}
+
+
+def list_page(kind, trashed, ajax=False):
+    items = [] if ajax else STORE.list(kind, trashed)
+    if kind == "menu":
+        head = "<th>#</th><th>Name</th><th>Link</th><th>Category</th><th>Page</th><th>Created</th><th>Status</th><th>Action</th>"
+        rows = "".join(menu_row(i, item, trashed) for i, item in enumerate(items, 1))
+        add = "<a class='btn btn-sm btn-primary add_menu_button' href='/menu/add'>Add Menu</a>"
+    else:
+        head = "<th>#</th><th>Title</th><th>Category</th><th>Status</th><th>Action</th>"
+        rows = "".join(page_row(i, item, trashed) for i, item in enumerate(items, 1))
+        add = "<a class='btn btn-sm btn-primary' href='/pages/add'>Add Page</a>"
+    base = "/menu" if kind == "menu" else "/pages"
+    if trashed:
+        links = f"<a class='btn btn-sm btn-default' href='{base}'>Go Back to Live Items</a>"
+    else:
+        links = f"{add} <a class='btn btn-sm btn-default' href='{base}?trash=1'>View Trash</a>"
+    options = ""
+    if ajax:
+        columns = ",".join(f"{{data: '{column}'}}" for column in range(head.count("<th>")))
+        options = f"{{ajax: '{base}/data{'?trash=1' if trashed else ''}', columns: [{columns}]}}"
+    return f"""{links}
+<table id="DataTables_Table_0" class="table datatable"><thead><tr>{head}</tr></thead>
+<tbody>{rows}</tbody></table>
+<script>if (window.jQuery && jQuery.fn.DataTable) {{ jQuery('#DataTables_Table_0').DataTable({options}); }}</script>"""
+
+
+def menu_form(role, item=None):
+    action = f"/menu/edit/{item['id']}" if item else "/menu/add"
+    name = html.escape(item["name"]) if item else ""
+    kn_name = html.escape(item["kn_name"]) if item else ""
+    approve = ""
+    if item and role == "approver":
+        approve = f"<a class='btn btn-success menu_approve_btn' href='/menu/approve/{item['id']}'>Approve</a>"
+    return f"""<form method="post" action="{action}" enctype="multipart/form-data">
+<input type="text" name="name" value="{name}">
+<input type="text" name="kn_name" value="{kn_name}">
+<input type="file" name="media_to_upload">
+<select name="page"><option value="">Select</option><option value="#"># Link</option></select>
+<select name="menu_category"><option value="">Select</option><option value="1">Main Menu</option></select>
+<input type="submit" name="add_menu_submit_button" value="Save">
+</form>{approve}"""
+
+
+def page_form(role, item=None, view=False):
+    action = f"/pages/edit/{item['id']}" if item else "/pages/add"
+    title = html.escape(item["name"]) if item else ""
+    kn_title = html.escape(item["kn_name"]) if item else ""
+    approve = ""
+    if item and view and role == "approver":
+        approve = f"<a class='btn btn-sm btn-success' href='/pages/approve/{item['id']}'>Approve</a>"
+    return f"""<form method="post" action="{action}">
+<select name="data_page_category_id"><option value="1">Horizontal Tabs</option><option value="2">Vertical Tabs</option></select>
+<input type="text" name="title" placeholder="Title" value="{title}">
+<input type="text" name="kn_title" placeholder="Kannada Title" value="{kn_title}">
+<textarea class="tinymce" name="content"></textarea>
+<textarea class="tinymce" name="kn_content"></textarea>
+<input type="submit" name="add_edit_page_button" value="Save">
+</form>{approve}{tinymce_assets()}"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "ZpsStandIn/1.0"
+
+    def log_message(self, format, *args):
+        logging.debug("stand-in: " + format, *args)
+
+    # -- helpers -----------------------------------------------------------
+
+    def session(self):
+        cookies = self.headers.get("Cookie", "")
+        for part in cookies.split(";"):
+            key, _, value = part.strip().partition("=")
+            if key == "zps_session":
+                return STORE.sessions.get(value)
+        return None
+
+    def send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        payload = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_json(self, data, status=200):
+        self.send(status, json.dumps(data, ensure_ascii=False), "application/json; charset=utf-8")
+
+    def send_asset(self, name):
+        root = os.path.realpath(STAND_IN_ASSETS)
+        path = os.path.realpath(os.path.join(root, name))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return self.send(404, "Not found", "text/plain; charset=utf-8")
+        with open(path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.send(200, body, content_type, {"Cache-Control": "max-age=3600"})
+
+    def redirect(self, location, flash=None, headers=None):
+        session = self.session()
+        if session is not None and flash:
+            session["flash"] = flash
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def render(self, body):
+        session = self.session()
+        flash = session.pop("flash", None) if session else None
+        self.send(200, layout(body, flash))
+
+    def form(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/json"):
+            return json.loads(raw or b"null")
+        if content_type.startswith("multipart/form-data"):
+            return parse_multipart(raw, content_type)
+        return {key: values[0] for key, values in parse_qs(raw.decode("utf-8")).items()}
+
+    # -- routing -----------------------------------------------------------
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts[:2] == ["api", "items"]:
+            return self.send_json(list(STORE.items.values()))
+        if parts[:1] == ["assets"]:
+            return self.send_asset("/".join(parts[1:]))
+
+        session = self.session()
+        if not parts or parts == ["index"]:
+            return self.render("<h3>Dashboard</h3>") if session else self.send(200, login_page())
+        if session is None:
+            return self.redirect("/index")
+
+        role = session["role"]
+        kind = {"menu": "menu", "pages": "page"}.get(parts[0])
+        if kind is None:
+            return self.send(404, layout("<h3>Not found</h3>"))
+        base = "/" + parts[0]
+        if len(parts) == 1:
+            return self.render(list_page(kind, "trash" in query, self.server.ajax))
+        if parts[1] == "data":
+            return self.send_json(list_data(kind, "trash" in query))
+
+        action = parts[1]
+        if action == "add":
+            return self.render(menu_form(role) if kind == "menu" else page_form(role))
+
+        item = STORE.get(int(parts[2])) if len(parts) > 2 and parts[2].isdigit() else None
+        if item is None:
+            return self.send(404, layout("<h3>Not found</h3>"))
+        if action in ("edit", "view"):
+            form = menu_form(role, item) if kind == "menu" else page_form(role, item, view=action == "view")
+            return self.render(form)
+        if action == "approve" and role == "approver":
+            STORE.set_status(item["id"], "Approved")
+            return self.redirect(base, "Data Approved successfully!")
+        if action == "trash":
+            STORE.set_status(item["id"], "Trashed")
+            return self.redirect(base, "Data Trashed successfully!")
+        if action == "restore":
+            STORE.set_status(item["id"], item["trashed_from"])
+            return self.redirect(f"{base}?trash=1", "Data Restored successfully!")
+        return self.send(403, layout("<h3>Forbidden</h3>"))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        data = self.form()
+
+        if parts[:2] == ["api", "items"]:
+            created = [STORE.add(**entry) for entry in data]
+            return self.send_json({"created": len(created)}, 201)
+
+        if parts == ["login"]:
+            role = ROLES.get(data.get("username", ""))
+            if role is None or data.get("password") != PASSWORD:
+                return self.send(200, login_page())
+            token = secrets.token_hex(16)
+            STORE.sessions[token] = {"role": role}
+            return self.redirect("/index", headers={"Set-Cookie": f"zps_session={token}; Path=/"})
+
+        session = self.session()
+        if session is None:
+            return self.redirect("/index")
+        role = session["role"]
+        kind = {"menu": "menu", "pages": "page"}.get(parts[0]) if parts else None
+        if kind is None or len(parts) < 2:
+            return self.send(404, layout("<h3>Not found</h3>"))
+        base = "/" + parts[0]
+        name = data.get("name") or data.get("title") or ""
+        kn_name = data.get("kn_name") or data.get("kn_title") or ""
+
+        if parts[1] == "add":
+            STORE.add(kind, name, kn_name)
+            return self.redirect(base, "Menu Saved successfully!" if kind == "menu" else "Data Saved successfully!")
+        if parts[1] == "edit" and len(parts) > 2:
+            item = STORE.get(int(parts[2]))
+            if item is None:
+                return self.send(404, layout("<h3>Not found</h3>"))
+            item["name"], item["kn_name"] = name or item["name"], kn_name or item["kn_name"]
+            if role == "moderator":
+                STORE.set_status(item["id"], "Moderated")
+            return self.redirect(base, "Data Saved successfully!")
+        return self.send(404, layout("<h3>Not found</h3>"))
+
+    def do_DELETE(self):
+        if urlparse(self.path).path.rstrip("/") == "/api/items":
+            STORE.reset()
+            return self.send_json({"deleted": True})
+        return self.send(404, layout("<h3>Not found</h3>"))
+
+
+def parse_multipart(raw, content_type):
+    # Only plain text fields are kept; uploaded media is discarded
+    boundary = content_type.split("boundary=", 1)[1].encode("latin-1")
+    fields = {}
+    for part in raw.split(b"--" + boundary):
+        header, _, value = part.partition(b"\r\n\r\n")
+        marker = b'name="'
+        if marker not in header or b"filename=" in header:
+            continue
+        name = header.split(marker, 1)[1].split(b'"', 1)[0].decode("utf-8")
+        fields[name] = value.rstrip(b"\r\n").decode("utf-8", "replace")
+    return fields
+
+
+def make_server(host="127.0.0.1", port=0, ajax=False):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    # In ajax mode list pages ship an empty table that DataTables fills from {kind}/data
+    server.ajax = ajax
+    return server
+
+
+def start(host="127.0.0.1", port=0, ajax=False):
+    """Start the stand-in on a background thread and return the server."""
+    server = make_server(host, port, ajax)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local stand-in back office")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ajax", action="store_true", help="Load DataTables rows over ajax")
+    parser.add_argument("--fetch-assets", action="store_true",
+                        help=f"Download jQuery, DataTables and TinyMCE into {STAND_IN_ASSETS} and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.fetch_assets:
+        return fetch_assets()
+    server = make_server(args.host, args.port, args.ajax)
+    logging.info(f"Stand-in back office listening on http://{args.host}:{args.port}/index")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+DataTables ajax responses captured off the wire.
+
+When DataTables_Table_0 loads its rows over ajax, the JSON is available
+before the DOM is built. TableCapture listens to CDP network events on the
+shared driver and keeps the latest list response so lookups can be answered
+from the parsed rows and cross-checked against the DOM.
+"""
+import html
+import json
+import logging
+import re
+from urllib.parse import parse_qsl, urlparse
+
+from support.cdp import events
+
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def cell_text(value):
+    """Plain text of a DataTables cell, which may hold markup."""
+    if value is None:
+        return ""
+    text = TAG_RE.sub(" ", str(value))
+    return " ".join(html.unescape(text).split())
+
+
+def normalize_rows(payload):
+    """Turn a DataTables ajax payload into a list of rows of cell texts.
+
+    Rows may be arrays or objects; object rows are read in key order
+    (skipping DataTables' own DT_* keys), matching the column order.
+    """
+    if isinstance(payload, dict):
+        payload = payload.get("data", payload.get("aaData"))
+    if not isinstance(payload, list):
+        return None
+
+    rows = []
+    for row in payload:
+        if isinstance(row, dict):
+            row = [value for key, value in row.items() if not key.startswith("DT_")]
+        rows.append([cell_text(value) for value in row])
+    return rows
+
+
+def from_source(url, source):
+    """True when url is a request to the table's ajax source (its path, with at least the source's query)."""
+    url, source = urlparse(url), urlparse(source)
+    return url.path == source.path and set(parse_qsl(source.query)) <= set(parse_qsl(url.query))
+
+
+class TableCapture:
+    """Collect JSON list responses whose URL matches url_pattern."""
+
+    # A whole path segment, so '/update' or '/metadata' responses are not taken for table data
+    def __init__(self, driver, url_pattern=r"/(data|list|ajax)(/|\?|$)"):
+        self.driver = driver
+        self.url_re = re.compile(url_pattern)
+        self.pending = {}
+        self.responses = []
+
+    def __call__(self, method, params):
+        if method == "Network.responseReceived":
+            response = params["response"]
+            if "json" in response.get("mimeType", "") and self.url_re.search(response["url"]):
+                self.pending[params["requestId"]] = response["url"]
+        elif method == "Network.loadingFinished" and params["requestId"] in self.pending:
+            url = self.pending.pop(params["requestId"])
+            body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            try:
+                rows = normalize_rows(json.loads(body["body"]))
+            except ValueError:
+                logging.warning(f"Ignoring non-JSON table response from {url}")
+                return
+            if rows is not None:
+                self.responses.append((url, rows))
+
+    def latest_rows(self, source=None):
+        """Rows of the most recent list response (from the ajax source when given), or None if none was captured."""
+        pump = events(self.driver)
+        if pump is not None:
+            pump.poll()
+        for url, rows in reversed(self.responses):
+            if source is None or from_source(url, source):
+                return rows
+        return None
+
+
+def attach(driver):
+    """Start capturing table responses on driver (requires the CDP event pump)."""
+    pump = events(driver)
+    if pump is None:
+        raise RuntimeError("Driver was created without the CDP performance log")
+    driver.table_capture = pump.subscribe(TableCapture(driver))
+    return driver.table_capture
+
+
+def captured_rows(driver, source=None):
+    """Latest captured DataTables rows for driver, or None when capture is off or empty."""
+    capture = getattr(driver, "table_capture", None)
+    return capture.latest_rows(source) if capture is not None else None
+
+
+def find_json_index(rows, text, status=None, columns=None):
+    """Index of the first row containing text (and status), using 1-based DOM columns, or None."""
+    for index, row in enumerate(rows):
+        if columns is None:
+            found = any(text in cell for cell in row) and (status is None or status in row)
+        else:
+            text_column, status_column = columns
+            found = (len(row) >= max(columns) and text in row[text_column - 1]
+                     and (status is None or row[status_column - 1] == status))
+        if found:
+            return index
+    return None
+
+
+def find_json_row(rows, text, status=None, columns=None):
+    """Return the first row containing text (and status), using 1-based DOM columns."""
+    index = find_json_index(rows, text, status, columns)
+    return rows[index] if index is not None else None
+
+
+def cross_check(driver, text, status, columns, dom_found, source=None):
+    """Fail when the captured JSON and the DOM disagree about a row being present."""
+    rows = captured_rows(driver, source)
+    if rows is None:
+        return None
+    json_found = find_json_row(rows, text, status, columns) is not None
+    assert json_found == dom_found, (
+        f"DataTables JSON and DOM disagree for '{text}'"
+        f"{f' with status {status!r}' if status else ''}: JSON found={json_found}, DOM found={dom_found}"
+    )
+    return json_found
+
+
+def check_row_cells(json_row, dom_cells, columns):
+    """Fail when the DOM row's text and status cells differ from the JSON row's."""
+    for column in columns:
+        # cell_text turns <br> into a space, textContent drops it; compare without whitespace
+        json_cell = "".join(json_row[column - 1].split())
+        dom_cell = "".join(dom_cells[column - 1].split()) if column <= len(dom_cells or []) else None
+        assert json_cell == dom_cell, (
+            f"DataTables JSON and DOM disagree in column {column}: JSON {json_row[column - 1]!r}, "
+            f"DOM {None if dom_cell is None else dom_cells[column - 1]!r}"
+        )
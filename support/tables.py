@@ -0,0 +1,252 @@
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from support.table_json import captured_rows, check_row_cells, cross_check, find_json_index
+
+TABLE_ID = "DataTables_Table_0"
+
+# Main Menu rows: name in td 2, status in td 7. Pages rows: title in td 2, status in td 4.
+MENU_COLUMNS = (2, 7)
+PAGE_COLUMNS = (2, 4)
+
+# Filter through the DataTables API when the table is initialised and resolve
+# on the next 'draw' event, so ajax/server-side tables are waited for as well.
+SEARCH_SCRIPT = """
+var selector = arguments[0], key = arguments[1], done = arguments[arguments.length - 1];
+var $ = window.jQuery;
+if (!$ || !$.fn.dataTable || !$.fn.dataTable.isDataTable(selector)) { done(false); return; }
+var api = $(selector).DataTable();
+if (api.search() === key) { done(true); return; }
+api.one('draw', function () { done(true); });
+api.search(key).draw();
+"""
+
+NEXT_PAGE_SCRIPT = """
+var selector = arguments[0], done = arguments[arguments.length - 1];
+var $ = window.jQuery;
+if (!$ || !$.fn.dataTable || !$.fn.dataTable.isDataTable(selector)) { done(null); return; }
+var api = $(selector).DataTable(), info = api.page.info();
+if (info.page + 1 >= info.pages) { done(false); return; }
+api.one('draw', function () { done(true); });
+api.page('next').draw('page');
+"""
+
+# The table's ajax source and, given a DataTables row index, that row's node
+# and cell texts. A client-side table is first moved to the page that shows
+# the row, and the node is read once that draw has finished. A server-side
+# table only holds the rows on screen, so there is no page to move to.
+ROW_SCRIPT = """
+var selector = arguments[0], index = arguments[1], done = arguments[arguments.length - 1];
+var $ = window.jQuery;
+if (!$ || !$.fn.dataTable || !$.fn.dataTable.isDataTable(selector)) { done(null); return; }
+var api = $(selector).DataTable(), source = api.ajax.url(), info = api.page.info();
+var table = {source: source ? new URL(source, location.href).href : null, serverSide: info.serverSide,
+             row: null, cells: null};
+if (index === null) { done(table); return; }
+var position = api.rows({order: 'applied', search: 'applied'}).indexes().toArray().indexOf(index);
+if (position < 0) { done(table); return; }
+
+function finish() {
+  var node = api.row(index).node();
+  table.row = node;
+  table.cells = node ? Array.prototype.map.call(node.cells, function (td) { return td.textContent; }) : null;
+  done(table);
+}
+
+var length = api.page.len();
+if (!info.serverSide && length > 0 && Math.floor(position / length) !== api.page()) {
+  api.one('draw', finish);
+  api.page(Math.floor(position / length)).draw('page');
+} else {
+  finish();
+}
+"""
+
+# Every row in one status, from the DataTables data when the API is there
+# (all pages at once), else from the rows in the DOM. The text column holds
+# "English<br>Kannada"; only the English part is returned as the title.
+QUEUE_SCRIPT = """
+var selector = arguments[0], textColumn = arguments[1] - 1, statusColumn = arguments[2] - 1;
+var status = arguments[3], link = arguments[4];
+var $ = window.jQuery;
+var api = $ && $.fn.dataTable && $.fn.dataTable.isDataTable(selector) ? $(selector).DataTable() : null;
+
+function fragment(html) { var d = document.createElement('div'); d.innerHTML = html; return d; }
+function plain(html) { return fragment(html).textContent.replace(/\\s+/g, ' ').trim(); }
+
+function entry(id, cells) {
+  if (plain(cells[statusColumn]) !== status) { return null; }
+  var href = null;
+  for (var i = 0; i < cells.length && !href; i++) {
+    var a = fragment(cells[i]).querySelector('a[href*="' + link + '"]');
+    if (a) { href = new URL(a.getAttribute('href'), location.href).href; }
+  }
+  return {id: id, title: plain(String(cells[textColumn]).split(/<br\\s*\\/?>/i)[0]), href: href};
+}
+
+var items = [];
+if (api) {
+  api.rows().every(function () {
+    var data = this.data(), node = this.node();
+    var cells = Array.isArray(data) ? data : Object.keys(data).filter(function (key) {
+      return key.indexOf('DT_') !== 0;
+    }).map(function (key) { return data[key]; });
+    var found = entry((node && node.id) || data.DT_RowId || '', cells);
+    if (found) { items.push(found); }
+  });
+} else {
+  Array.prototype.forEach.call(document.querySelectorAll(selector + ' tbody tr'), function (row) {
+    var found = entry(row.id, Array.prototype.map.call(row.cells, function (td) { return td.innerHTML; }));
+    if (found) { items.push(found); }
+  });
+}
+// Server-side tables only hold the page on screen
+return {items: items, paged: !api || api.page.info().serverSide};
+"""
+
+
+def row_xpath(text, status, columns):
+    """XPath of the table row whose text column contains text and whose status column matches."""
+    text_column, status_column = columns
+    return (f"//table[@id='{TABLE_ID}']/tbody/tr[td[{text_column}][contains(text(),'{text}')]"
+            f" and td[{status_column}][normalize-space()='{status}']]")
+
+
+def search_table(driver, key):
+    """Narrow the DataTable to rows matching key and wait for the redraw.
+
+    Returns False when the table is not a DataTable (every row is already in
+    the DOM then), True otherwise.
+    """
+    driver.set_script_timeout(10)
+    if driver.execute_async_script(SEARCH_SCRIPT, f"#{TABLE_ID}", key):
+        return True
+
+    # No DataTables API on window: fall back to typing into the filter input
+    inputs = driver.find_elements(By.CSS_SELECTOR, f"#{TABLE_ID}_filter input")
+    if not inputs:
+        return False
+    first_rows = driver.find_elements(By.XPATH, f"//table[@id='{TABLE_ID}']/tbody/tr[1]")
+    inputs[0].clear()
+    inputs[0].send_keys(key)
+    if first_rows:
+        try:
+            WebDriverWait(driver, 2).until(EC.staleness_of(first_rows[0]))
+        except TimeoutException:
+            # The first row already matched the filter and was kept
+            pass
+    return True
+
+
+def next_page(driver):
+    """Move the DataTable to its next page. Returns False on the last page."""
+    moved = driver.execute_async_script(NEXT_PAGE_SCRIPT, f"#{TABLE_ID}")
+    if moved is not None:
+        return moved
+
+    buttons = driver.find_elements(By.ID, f"{TABLE_ID}_next")
+    if not buttons or "disabled" in (buttons[0].get_attribute("class") or ""):
+        return False
+    first_row = driver.find_element(By.XPATH, f"//table[@id='{TABLE_ID}']/tbody/tr[1]")
+    buttons[0].click()
+    WebDriverWait(driver, 10).until(EC.staleness_of(first_row))
+    return True
+
+
+def find_json_row_node(driver, text, status, columns):
+    """(row, source) from the captured DataTables JSON of the table's ajax source.
+
+    row is None when there is no capture or the JSON has no such row. A row
+    found in the JSON is checked against the cells of the node DataTables
+    hands back for it.
+    """
+    driver.set_script_timeout(10)
+    table = driver.execute_async_script(ROW_SCRIPT, f"#{TABLE_ID}", None)
+    source = table and table["source"]
+    rows = captured_rows(driver, source) if source else None
+    if rows is None:
+        return None, source
+    index = find_json_index(rows, text, status, columns)
+    if index is None:
+        return None, source
+    found = driver.execute_async_script(ROW_SCRIPT, f"#{TABLE_ID}", index)
+    if found is None or found["row"] is None:
+        return None, source
+    check_row_cells(rows[index], found["cells"], columns)
+    return found["row"], source
+
+
+def find_row(driver, text, status, columns):
+    """Return the row with text and status, or None.
+
+    With CDP table capture on, the row is read from the captured ajax JSON,
+    its node taken from the DataTables API and its cells compared with the
+    JSON row. Otherwise, and whenever the JSON has no such row, the
+    DataTables filter narrows the table first so the lookup is a single
+    XPath query regardless of table size; pages are only walked when the
+    filtered result does not contain the row.
+    """
+    wait_for_table(driver)
+    source = None
+    if getattr(driver, "table_capture", None) is not None:
+        row, source = find_json_row_node(driver, text, status, columns)
+        if row is not None:
+            return row
+    xpath = row_xpath(text, status, columns)
+
+    searchable = search_table(driver, text)
+    rows = driver.find_elements(By.XPATH, xpath)
+    while not rows and searchable and next_page(driver):
+        rows = driver.find_elements(By.XPATH, xpath)
+
+    # With CDP capture on, the ajax JSON behind the last draw must agree with the DOM
+    cross_check(driver, text, status, columns, bool(rows), source)
+    return rows[0] if rows else None
+
+
+def find_menu_row(driver, name, status):
+    """Return the Main Menu row whose name contains name and whose status matches, or None."""
+    return find_row(driver, name, status, MENU_COLUMNS)
+
+
+def page_row_xpath(title, status):
+    """XPath of the Pages row whose title contains title and whose status matches."""
+    return row_xpath(title, status, PAGE_COLUMNS)
+
+
+def find_page_row(driver, title, status):
+    """Return the Pages row whose title contains title and whose status matches, or None."""
+    return find_row(driver, title, status, PAGE_COLUMNS)
+
+
+def wait_for_table(driver, timeout=10):
+    """The list page's table, once it is visible."""
+    return WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((By.ID, TABLE_ID)))
+
+
+def queue_key(item):
+    # Rows without an id attribute (or DT_RowId) come back with id ''; tell them apart by title and link
+    return item["id"] or (item["title"], item["href"])
+
+
+def read_queue(driver, status, columns, link="/edit/"):
+    """Every row of the table in status, as {"id", "title", "href"} dicts.
+
+    href is the row's link containing link ("/edit/", "/view/"), or None.
+    With client-side DataTables this is one script call whatever the number
+    of pages; otherwise the pages are walked once.
+    """
+    wait_for_table(driver)
+    text_column, status_column = columns
+    result = driver.execute_script(QUEUE_SCRIPT, f"#{TABLE_ID}", text_column, status_column, status, link)
+    items = result["items"]
+    if result["paged"]:
+        driver.set_script_timeout(10)
+        seen = {queue_key(item) for item in items}
+        while next_page(driver):
+            page = driver.execute_script(QUEUE_SCRIPT, f"#{TABLE_ID}", text_column, status_column, status, link)
+            items += [item for item in page["items"] if queue_key(item) not in seen]
+            seen.update(queue_key(item) for item in page["items"])
+    return items
@@ -0,0 +1,233 @@
+"""
+Trace tests, Allure steps, waits and WebDriver commands as nested spans.
+
+With ZPS_TRACE_FILE=<path> every test becomes a trace. Its root span covers
+setup, call and teardown. Inside it are the Allure steps, the
+WebDriverWait and find() waits, and every WebDriver command
+(ManagedBrowser.execute), each a child of whatever was open when it
+started. Attachments such as screenshots are events on the open span.
+Each finished trace is appended to the file as one OTLP/JSON
+ExportTraceServiceRequest per line, the format of the OpenTelemetry
+Collector's file exporter, which trace viewers can import:
+
+    ZPS_TRACE_FILE=traces/run.otlp.jsonl pytest test_creator_menu.py
+
+Work outside a test, such as the concurrent logins at session start, gets
+its own traces.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from allure_commons import hookimpl
+from selenium.webdriver.support.wait import WebDriverWait
+
+SERVICE_NAME = "zps-e2e"
+
+# OTLP span kinds and status codes
+INTERNAL = 1
+CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+TRACER = None
+
+UNTIL = WebDriverWait.until
+UNTIL_NOT = WebDriverWait.until_not
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_attributes(attributes):
+    return [{"key": key, "value": otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id, kind, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.status = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": otlp_attributes(self.attributes),
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.events:
+            span["events"] = [{"timeUnixNano": str(at), "name": name, "attributes": otlp_attributes(attributes)}
+                              for at, name, attributes in self.events]
+        if self.status:
+            span["status"] = {"code": self.status[0], "message": self.status[1]}
+        return span
+
+
+class Tracer:
+    """Span stacks per thread, fed by the Allure step hooks and support.tracing.span."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.finished = {}
+        self.steps = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "w", encoding="utf-8")
+
+    def stack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def current(self):
+        stack = self.stack()
+        return stack[-1] if stack else None
+
+    def start(self, name, kind=INTERNAL, attributes=None):
+        parent = self.current()
+        span = Span(name, parent.trace_id if parent else os.urandom(16).hex(), parent.span_id if parent else None,
+                    kind, attributes)
+        self.stack().append(span)
+        return span
+
+    def end(self, span, error=None):
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status = (STATUS_ERROR, f"{type(error).__name__}: {error}"[:500])
+        stack = self.stack()
+        if span in stack:
+            # Normally the innermost; a step left open by a failure is closed with its parent
+            stack.remove(span)
+        with self.lock:
+            self.finished.setdefault(span.trace_id, []).append(span)
+        if span.parent_id is None:
+            self.flush(span.trace_id)
+
+    def event(self, event, **attributes):
+        span = self.current()
+        if span is not None:
+            span.events.append((time.time_ns(), event, attributes))
+
+    def flush(self, trace_id=None):
+        with self.lock:
+            trace_ids = [trace_id] if trace_id else list(self.finished)
+            for key in trace_ids:
+                spans = self.finished.pop(key, [])
+                if spans and not self.file.closed:
+                    request = {"resourceSpans": [{
+                        "resource": {"attributes": otlp_attributes({"service.name": SERVICE_NAME})},
+                        "scopeSpans": [{"scope": {"name": __name__},
+                                        "spans": [span.to_otlp() for span in spans]}],
+                    }]}
+                    self.file.write(json.dumps(request, ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.file.close()
+
+    @hookimpl
+    def start_step(self, uuid, title, params):
+        self.steps[uuid] = self.start(title, attributes={"allure.step": title})
+
+    @hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        span = self.steps.pop(uuid, None)
+        if span is not None:
+            self.end(span, exc_val)
+
+    @hookimpl
+    def attach_data(self, body, name, attachment_type, extension):
+        self.event("attachment", **{"attachment.name": name, "attachment.type": str(attachment_type)})
+
+    @hookimpl
+    def attach_file(self, source, name, attachment_type, extension):
+        self.event("attachment", **{"attachment.name": name, "attachment.type": str(attachment_type),
+                                    "attachment.source": str(source)})
+
+
+@contextmanager
+def span(name, kind=INTERNAL, **attributes):
+    """A child span of the current one while tracing is on; nothing otherwise."""
+    tracer = TRACER
+    if tracer is None:
+        yield None
+        return
+    opened = tracer.start(name, kind, attributes)
+    try:
+        yield opened
+    except BaseException as e:
+        tracer.end(opened, e)
+        raise
+    tracer.end(opened)
+
+
+def command_attributes(command, params):
+    """The parts of a WebDriver command's parameters worth reading in a trace."""
+    params = params or {}
+    attributes = {"webdriver.command": command}
+    if "url" in params:
+        attributes["url.full"] = params["url"]
+    if "using" in params:
+        attributes["webdriver.locator"] = f"{params['using']}={params.get('value')}"
+    if "script" in params:
+        attributes["webdriver.script"] = params["script"][:200]
+    return attributes
+
+
+def condition_name(method):
+    # expected_conditions build closures: visibility_of_element_located.<locals>._predicate
+    name = getattr(method, "__qualname__", None) or type(method).__name__
+    return name.split(".<locals>")[0]
+
+
+def traced_until(self, method, message=""):
+    with span(f"wait {condition_name(method)}", **{"wait.timeout_s": float(self._timeout)}):
+        return UNTIL(self, method, message)
+
+
+def traced_until_not(self, method, message=""):
+    with span(f"wait not {condition_name(method)}", **{"wait.timeout_s": float(self._timeout)}):
+        return UNTIL_NOT(self, method, message)
+
+
+def install(path):
+    """Start tracing into path; returns the Tracer to register as an Allure plugin."""
+    global TRACER
+    TRACER = Tracer(path)
+    WebDriverWait.until = traced_until
+    WebDriverWait.until_not = traced_until_not
+    return TRACER
+
+
+def uninstall():
+    global TRACER
+    if TRACER is not None:
+        WebDriverWait.until = UNTIL
+        WebDriverWait.until_not = UNTIL_NOT
+        TRACER.close()
+        TRACER = None
@@ -0,0 +1,234 @@
+"""
+Record a run's WebDriver traffic and replay it without a browser.
+
+With ZPS_WEBDRIVER_RECORD=<dir> every browser the suite starts writes its
+command stream to <dir>/browser-NN.jsonl. That covers each command sent
+to the driver from the new-session command on, with its parameters, the
+driver's response and how long the round trip took:
+
+    ZPS_WEBDRIVER_RECORD=recordings/creator pytest test_creator_menu.py
+
+With ZPS_WEBDRIVER_REPLAY=<dir> create_driver hands out ReplayBrowsers
+instead, one per recording in start order, and no Chrome or site is needed.
+Each command is answered with its recorded response. ZPS_REPLAY_TIMING
+sets the delay: "original" keeps the recorded latency, "zero" answers at
+once, and a number scales the latency. What is left is the suite's own
+time (waits, logging, Allure, screenshots), so it can be profiled and
+benchmarked the same way every time:
+
+    ZPS_WEBDRIVER_REPLAY=recordings/creator ZPS_REPLAY_TIMING=zero pytest test_creator_menu.py
+
+Replay with the same ZPS_* switches the run was recorded with, so the suite
+sends the same commands. Polling waits can repeat a command a different
+number of times than they did while recording, so a command is matched to the
+first recording of it within the next LOOKAHEAD commands that has the same key
+parameters (URL, locator, script). When only the command name matches, that
+recording answers and the mismatch is counted in the replay report. Record
+ZPS_PARALLEL_LOGIN runs with care: the browsers start in whatever order the
+login threads reach them.
+"""
+import copy
+import glob
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from support.config import REPLAY_TIMING, WEBDRIVER_REPLAY
+
+FORMAT = 1
+
+# How far ahead of the recorded order a replayed command may be found
+LOOKAHEAD = 50
+
+# Parameters a recorded command must share with the one sent to be its answer
+KEY_PARAMS = ("url", "using", "value", "script")
+
+LOCK = threading.Lock()
+COUNTER = itertools.count(1)
+CLEARED = set()
+
+
+class ReplayMismatch(WebDriverException):
+    """The suite sent a command the recording has no answer for."""
+
+
+class Recorder:
+    """One browser's recording: a header line, then a line per command."""
+
+    def __init__(self, path, browser, cdp):
+        self.path = path
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "w", encoding="utf-8")
+        self.write({"format": FORMAT, "browser": browser, "cdp": cdp,
+                    "recorded": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def write(self, record):
+        with self.lock:
+            if not self.file.closed:
+                self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def new_recorder(directory, driver):
+    """Recorder for the next browser started; the first one of a run clears the directory's old recordings."""
+    with LOCK:
+        if directory not in CLEARED:
+            for path in glob.glob(os.path.join(directory, "browser-*.jsonl")):
+                os.remove(path)
+            CLEARED.add(directory)
+        index = next(COUNTER)
+    return Recorder(os.path.join(directory, f"browser-{index:02d}.jsonl"), type(driver).__name__,
+                    hasattr(driver, "execute_cdp_cmd"))
+
+
+class RecordingConnection:
+    """Passes commands on to the driver's own connection and records each round trip."""
+
+    def __init__(self, inner, recorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def execute(self, command, params):
+        started = time.perf_counter()
+        record = {"command": command, "params": params, "at_s": round(started - self.recorder.started, 4)}
+        try:
+            response = self.inner.execute(command, params)
+        except Exception as e:
+            # The driver could not be reached at all; WebDriver errors come back as responses
+            record.update(elapsed_s=round(time.perf_counter() - started, 4), error=f"{type(e).__name__}: {e}")
+            self.recorder.write(record)
+            raise
+        record.update(elapsed_s=round(time.perf_counter() - started, 4), response=response)
+        self.recorder.write(record)
+        return response
+
+
+def read_recording(path):
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("format") != FORMAT:
+        raise ValueError(f"{path} is not a WebDriver recording")
+    return lines[0], lines[1:]
+
+
+def key_params(params):
+    """The parameters that tell one command from another of the same name, as they read back from JSON."""
+    params = params or {}
+    keys = {name: params[name] for name in KEY_PARAMS if name in params}
+    if "using" not in params:
+        # value is the locator with using, and typed text without it
+        keys.pop("value", None)
+    return json.loads(json.dumps(keys))
+
+
+def timing_scale(timing):
+    """Multiplier of the recorded latency for a ZPS_REPLAY_TIMING value."""
+    if timing == "original":
+        return 1.0
+    if timing == "zero":
+        return 0.0
+    return float(timing)
+
+
+class ReplayConnection:
+    """Answers commands from a recording instead of a driver."""
+
+    def __init__(self, path, timing="original"):
+        self.path = path
+        header, self.pending = read_recording(path)
+        self.browser = header["browser"]
+        self.cdp = header["cdp"]
+        self.scale = timing_scale(timing)
+        self.lock = threading.Lock()
+        self.replayed = 0
+        self.skipped = 0
+        self.mismatched = []
+
+    def take(self, command, params=None):
+        keys = key_params(params)
+        with self.lock:
+            candidates = [index for index, record in enumerate(self.pending[:LOOKAHEAD]) if record["command"] == command]
+            for index in candidates:
+                if key_params(self.pending[index]["params"]) == keys:
+                    break
+            else:
+                index = candidates[0] if candidates else None
+                if index is not None:
+                    self.mismatched.append({"command": command, "sent": keys,
+                                            "recorded": key_params(self.pending[index]["params"])})
+            if index is not None:
+                self.replayed += 1
+                self.skipped += index > 0
+                return self.pending.pop(index)
+            upcoming = [record["command"] for record in self.pending[:5]]
+        name = os.path.basename(self.path)
+        if not upcoming:
+            raise ReplayMismatch(f"{name} has no more commands, the suite sent '{command}'")
+        raise ReplayMismatch(f"{name} has no '{command}' in the next {LOOKAHEAD} commands (next: {', '.join(upcoming)})")
+
+    def execute(self, command, params):
+        record = self.take(command, params)
+        delay = record["elapsed_s"] * self.scale
+        if delay:
+            time.sleep(delay)
+        if "error" in record:
+            raise WebDriverException(f"Recorded connection failure: {record['error']}")
+        return copy.deepcopy(record["response"])
+
+    def close(self):
+        # Called by quit() and by restarts alike; the recording stays open for the next session
+        pass
+
+    def report(self):
+        name = os.path.basename(self.path)
+        if self.pending or self.skipped:
+            logging.info(f"{name}: replayed {self.replayed} commands, {self.skipped} of them "
+                         f"out of recorded order; {len(self.pending)} recorded commands were not sent")
+        if self.mismatched:
+            first = self.mismatched[0]
+            logging.warning(f"{name}: {len(self.mismatched)} commands were answered by a recording with other "
+                            f"parameters, first {first['command']} sent {first['sent']}, recorded {first['recorded']}")
+
+
+class Replay:
+    """The recordings of a directory, handed out in the order their browsers were started."""
+
+    def __init__(self, directory, timing="original"):
+        self.paths = sorted(glob.glob(os.path.join(directory, "browser-*.jsonl")))
+        if not self.paths:
+            raise ValueError(f"No WebDriver recordings in {directory}")
+        self.timing = timing
+        self.lock = threading.Lock()
+
+    def next_connection(self):
+        with self.lock:
+            if not self.paths:
+                raise ReplayMismatch("The suite started more browsers than were recorded")
+            path = self.paths.pop(0)
+        return ReplayConnection(path, self.timing)
+
+
+REPLAY = None
+
+
+def next_connection():
+    """Connection for the next browser of the ZPS_WEBDRIVER_REPLAY run."""
+    global REPLAY
+    with LOCK:
+        if REPLAY is None:
+            REPLAY = Replay(WEBDRIVER_REPLAY, REPLAY_TIMING)
+    return REPLAY.next_connection()
@@ -1,26 +1,25 @@
-import time
 import pytest
 import allure
-from selenium import webdriver
-from selenium.common.exceptions import ElementNotInteractableException, TimeoutException, NoSuchElementException
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.select import Select
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import os
 import logging
-from selenium.webdriver.support.ui import Select
-import allure
+from support.config import BASE_URL, ITEM_TITLE, SCREENSHOT_DIR
+from support.flash import wait_for_flash
+from support.locators import find
+from support.page_objects import Login, MenuForm, MenuList, Sidebar
+from support.pipeline import record
+from support.slo import budget_step
+from support.tables import find_menu_row, wait_for_table
 
 
 @pytest.fixture(scope="module")
-def setup():
-    # Initialize the WebDriver and maximize the window
-    driver = webdriver.Chrome()
-    driver.maximize_window()
+def setup(role_sessions):
+    # Initialize the WebDriver (already logged in when the session bootstrapper ran)
+    driver = role_sessions.take("approver")
 
     # Create screenshots directory if it doesn't exist
-    screenshot_dir = "screenshots"
+    screenshot_dir = SCREENSHOT_DIR
     if not os.path.exists(screenshot_dir):
         os.makedirs(screenshot_dir)
 
@@ -49,7 +48,7 @@ def test_open_application(setup):
     driver, screenshot_dir, logger = setup
 
     with allure.step("Open the application"):
-        driver.get("https://demo.karnataka.gov.in/zpshivamogga.karnataka.gov.in/public/back/index")
+        driver.get(f"{BASE_URL}/index")
         take_screenshot(driver, screenshot_dir, "open_application")
 
 
@@ -68,14 +67,13 @@ def test_verify_page_title(setup):
 @allure.story("Fill in login credentials")
 def test_fill_login_credentials(setup):
     driver, screenshot_dir, logger = setup
+    if driver.logged_in_as:
+        pytest.skip("Logged in by the session bootstrapper")
 
     with allure.step("Fill in login credentials"):
-        username_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Username']"))
-        )
+        username_field = find(driver, Login.USERNAME)
         username_field.send_keys("approver@site.com")
-        driver.find_element(By.XPATH, "//input[@placeholder='Password']").send_keys(
-            "01123")  # //input[@placeholder='Password']
+        find(driver, Login.PASSWORD).send_keys("01123")
         take_screenshot(driver, screenshot_dir, "fill_login_credentials")
 
 
@@ -83,11 +81,11 @@ def test_fill_login_credentials(setup):
 @allure.story("Submit login form")
 def test_submit_login_form(setup):
     driver, screenshot_dir, logger = setup
+    if driver.logged_in_as:
+        pytest.skip("Logged in by the session bootstrapper")
 
     with allure.step("Submit login form"):
-        submit_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@name='login_button']"))  # //input[@name='login_button']
-        )
+        submit_button = find(driver, Login.SUBMIT, clickable=True)
         submit_button.click()
         take_screenshot(driver, screenshot_dir, "submit_login_form")
 
@@ -98,15 +96,15 @@ def test_click_main_menu(setup):
     driver, screenshot_dir, logger = setup
 
     try:
-        with allure.step("Click the active ajax link"):
+        with budget_step("Click the active ajax link", "open_menu_list <= 3s p95"):
             # Wait for the element to be visible and then click it
-            ajax_link = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, "//span[normalize-space()='Main Menu']"))
-            )
+            ajax_link = find(driver, Sidebar.MAIN_MENU, visible=True)
             logger.info("Active ajax link is visible")
             ajax_link.click()
-            take_screenshot(driver, screenshot_dir, "click_main_menu")
+            # The step is done once the list is on screen
+            wait_for_table(driver)
             logger.info("Active Main menu clicked successfully")
+        take_screenshot(driver, screenshot_dir, "click_main_menu")
 
     except Exception as e:
         take_screenshot(driver, screenshot_dir, "active_main_menu_error")
@@ -120,33 +118,21 @@ def test_search_and_edit(setup):
 
     with allure.step("Search for 'Automation text' with status 'Moderated' and click edit"):
         try:
-            # Wait until the table is visible
-            table = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.ID, "DataTables_Table_0"))
-            )
-
-            # Find all rows in the table body
-            rows = driver.find_elements(By.XPATH, "//table[@id='DataTables_Table_0']/tbody/tr")
-
-            # Loop through each row to find the matching name and status
-            for row in rows:
-                name = row.find_element(By.XPATH, ".//td[2]").text
-                status = row.find_element(By.XPATH, ".//td[7]").text
-
-                if "Automation text" in name and status == "Moderated":
-                    # Take a screenshot of the row
-                    take_screenshot(driver, screenshot_dir, "matching_row_found")
-
-                    # Click the 'Edit' button
-                    edit_button = row.find_element(By.XPATH, ".//td[8]/a[@class='btn btn-primary btn-sm edit_menu_button']")
-                    edit_button.click()
-
-                    logger.info(f"Clicked the edit button for the row with name '{name}' and status '{status}'.")
-                    break
-            else:
-                logger.error("No matching row found with name 'Automation text' and status 'Moderated'.")
+            # Search the table for the matching name and status, walking pages only if the filter misses it
+            row = find_menu_row(driver, ITEM_TITLE, "Moderated")
+            if row is None:
+                logger.error(f"No matching row found with name '{ITEM_TITLE}' and status 'Moderated'.")
                 raise Exception("Matching row not found")
 
+            # Take a screenshot of the row
+            take_screenshot(driver, screenshot_dir, "matching_row_found")
+
+            # Click the 'Edit' button
+            edit_button = find(driver, MenuList.EDIT_BUTTON, clickable=True, root=row)
+            edit_button.click()
+
+            logger.info(f"Clicked the edit button for the row with name '{ITEM_TITLE}' and status 'Moderated'.")
+
         except Exception as e:
             logger.error(f"Error during search and edit: {str(e)}")
             take_screenshot(driver, screenshot_dir, "search_and_edit_error")
@@ -159,12 +145,12 @@ def test_search_and_edit(setup):
 def test_approve_request(setup):
     driver, screenshot_dir, logger = setup
 
-    with allure.step("approve the request"):
-        save_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//a[@class='btn btn-success menu_approve_btn']"))
-        )
+    with budget_step("approve the request", "approve_menu <= 2s p95"):
+        save_button = find(driver, MenuForm.APPROVE, clickable=True)
         save_button.click()
-        take_screenshot(driver, screenshot_dir, "request_approved")
+        # The step is done when the back office confirms it
+        wait_for_flash(driver)
+    take_screenshot(driver, screenshot_dir, "request_approved")
 
 
 @allure.feature("Form Submission")
@@ -177,20 +163,15 @@ def test_verify_success_message(setup):
             # Submit the form (you might need to locate and click the submit button)
             # Example: driver.find_element(By.ID, 'submit_button_id').click()
 
-            # Define XPath for the success alert message
-            success_message_xpath = "//body/div[@class='ch-container']/div[@class='row']/div[@id='content']/div[1]"
-
-            # Wait for the success message to be visible
-            success_message = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, success_message_xpath))
-            )
+            # The flash watcher recorded every alert this page showed, even one that has faded out
+            success_message = wait_for_flash(driver)
 
             # Take a screenshot when the success message appears
             take_screenshot(driver, screenshot_dir, "success_message_visible")
-            logger.info("Success message 'Data Saved successfully!' is visible.")
+            logger.info(f"Success message '{success_message['text']}' is visible.")
 
-            # Additional verification, if needed
-            assert success_message.is_displayed(), "Success message not displayed"
+            # Time this step against the item's correlation ID
+            record(driver, "menu", "approved", success_message)
 
         except Exception as e:
             logger.error(f"Error while verifying the success message: {str(e)}")
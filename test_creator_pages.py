@@ -1,23 +1,28 @@
 import time
 import pytest
 import allure
-from selenium import webdriver
-from selenium.common.exceptions import ElementNotInteractableException, TimeoutException, NoSuchElementException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import os
 import logging
+from support.config import BASE_URL, ITEM_TITLE, SCREENSHOT_DIR
+from support.flash import wait_for_flash
+from support.locators import find
+from support.page_objects import Login, PageForm, Sidebar
+from support.pipeline import record
+from support.slo import budget_step
+from support.table_json import cross_check
+from support.tables import wait_for_table
 
 
 @pytest.fixture(scope="module")
-def setup():
-    # Initialize the WebDriver and maximize the window
-    driver = webdriver.Chrome()
-    driver.maximize_window()
+def setup(role_sessions):
+    # Initialize the WebDriver (already logged in when the session bootstrapper ran)
+    driver = role_sessions.take("creator")
 
     # Create screenshots directory if it doesn't exist
-    screenshot_dir = "screenshots"
+    screenshot_dir = SCREENSHOT_DIR
     if not os.path.exists(screenshot_dir):
         os.makedirs(screenshot_dir)
 
@@ -46,7 +51,7 @@ def test_open_application(setup):
     driver, screenshot_dir, logger = setup
 
     with allure.step("Open the application"):
-        driver.get("https://demo.karnataka.gov.in/zpshivamogga.karnataka.gov.in/public/back/index")
+        driver.get(f"{BASE_URL}/index")
         take_screenshot(driver, screenshot_dir, "open_application")
 
 
@@ -65,14 +70,13 @@ def test_verify_page_title(setup):
 @allure.story("Fill in login credentials")
 def test_fill_login_credentials(setup):
     driver, screenshot_dir, logger = setup
+    if driver.logged_in_as:
+        pytest.skip("Logged in by the session bootstrapper")
 
     with allure.step("Fill in login credentials"):
-        username_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Username']"))
-        )
+        username_field = find(driver, Login.USERNAME)
         username_field.send_keys("creator@site.com")
-        driver.find_element(By.XPATH, "//input[@placeholder='Password']").send_keys(
-            "01123")  # //input[@placeholder='Password']
+        find(driver, Login.PASSWORD).send_keys("01123")
         take_screenshot(driver, screenshot_dir, "fill_login_credentials")
 
 
@@ -80,11 +84,11 @@ def test_fill_login_credentials(setup):
 @allure.story("Submit login form")
 def test_submit_login_form(setup):
     driver, screenshot_dir, logger = setup
+    if driver.logged_in_as:
+        pytest.skip("Logged in by the session bootstrapper")
 
     with allure.step("Submit login form"):
-        submit_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@name='login_button']"))  # //input[@name='login_button']
-        )
+        submit_button = find(driver, Login.SUBMIT, clickable=True)
         submit_button.click()
         take_screenshot(driver, screenshot_dir, "submit_login_form")
 
@@ -95,15 +99,15 @@ def test_click_pages_link(setup):
     driver, screenshot_dir, logger = setup
 
     try:
-        with allure.step("Click the Pages"):
+        with budget_step("Click the Pages", "open_pages_list <= 3s p95"):
             # Wait for the element to be visible and then click it
-            ajax_link = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, "//span[normalize-space()='Pages']"))
-            )
+            ajax_link = find(driver, Sidebar.PAGES, visible=True)
             logger.info("pages link is visible")
             ajax_link.click()
-            take_screenshot(driver, screenshot_dir, "click_pages_link")
+            # The step is done once the list is on screen
+            wait_for_table(driver)
             logger.info("Active page link clicked successfully")
+        take_screenshot(driver, screenshot_dir, "click_pages_link")
 
     except Exception as e:
         take_screenshot(driver, screenshot_dir, "active_pages_error")
@@ -190,7 +194,7 @@ def test_enter_text_in_title_field(setup):
             )
 
             # Define the text to enter
-            text_to_enter = "Automation text"
+            text_to_enter = ITEM_TITLE
 
             # Enter text into the input field
             title_field.send_keys(text_to_enter)
@@ -312,22 +316,23 @@ def test_type_content_in_tinymce_editor(setup):
 def test_click_save_button(setup):
     driver, screenshot_dir, logger = setup
 
-    with allure.step("Click on the 'Save' button"):
+    with budget_step("Click on the 'Save' button", "save_page <= 2s p95"):
         try:
             # Locate the "Save" button by its class and name attributes
-            save_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//input[@name='add_edit_page_button']"))
-            )
+            save_button = find(driver, PageForm.SUBMIT, clickable=True)
 
             # Click the "Save" button
             save_button.click()
             logger.info("Clicked on the 'Save' button.")
-            take_screenshot(driver, screenshot_dir, "clicked_save_button")
+
+            # The step is done when the back office confirms it
+            wait_for_flash(driver, "Data Saved successfully!")
 
         except Exception as e:
             logger.error(f"Error while clicking on the 'Save' button: {str(e)}")
             take_screenshot(driver, screenshot_dir, "save_button_click_error")
             raise
+    take_screenshot(driver, screenshot_dir, "clicked_save_button")
 
 
 @allure.feature("Login and Form Submission")
@@ -337,14 +342,11 @@ def test_verify_success_message(setup):
 
     with allure.step("Verify the success message after saving the form"):
         try:
-            # Wait for the success message to become visible
-            success_message = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH,
-                                                  "//div[@id='content']//div[@class='alert alert-success'][normalize-space()='Data Saved successfully!']"))
-            )
+            # Read the alert from the flash watcher's buffer instead of waiting on the DOM
+            success_message = wait_for_flash(driver, "Data Saved successfully!")
 
             # Extract the text from the success message
-            success_message_text = success_message.text
+            success_message_text = success_message["text"]
             assert success_message_text == "Data Saved successfully!", \
                 f"Expected 'Data Saved successfully!', but got '{success_message_text}'."
 
@@ -366,7 +368,7 @@ def test_verify_success_message(setup):
         try:
             # Wait for the form table row where the saved text should be visible
             saved_text_element = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, "//td[contains(text(),'Automation text')]"))
+                EC.visibility_of_element_located((By.XPATH, f"//td[contains(text(),'{ITEM_TITLE}')]"))
             )
 
             # Get the full content of the cell
@@ -374,9 +376,16 @@ def test_verify_success_message(setup):
             logger.info(f"Saved text found in the table cell: {saved_text}")
 
             # Verify that both English and Kannada text are present in the cell
-            assert "Automation text" in saved_text, "The English text 'Automation text' is not found."
+            assert ITEM_TITLE in saved_text, f"The English text '{ITEM_TITLE}' is not found."
             assert "ಉದಾಹರಣೆಯ ಶೀರ್ಷಿಕೆ" in saved_text, "The Kannada text 'ಉದಾಹರಣೆಯ ಶೀರ್ಷಿಕೆ' is not found."
 
+            # When the table loads over ajax, the captured JSON must list the row too
+            cross_check(driver, ITEM_TITLE, None, None, True)
+
+            # Tag the new item so the moderator's and approver's steps are timed against it
+            correlation_id = record(driver, "page", "created")
+            logger.info(f"Page '{ITEM_TITLE}' created with correlation ID {correlation_id}.")
+
             take_screenshot(driver, screenshot_dir, "form_submission_verified")
             logger.info("Form submission verified successfully with the correct text.")
 
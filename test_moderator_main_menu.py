@@ -1,26 +1,27 @@
 import time
 import pytest
 import allure
-from selenium import webdriver
-from selenium.common.exceptions import ElementNotInteractableException, TimeoutException, NoSuchElementException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.select import Select
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import os
 import logging
-from selenium.webdriver.support.ui import Select
-import allure
+from support.config import BASE_URL, ITEM_TITLE, SCREENSHOT_DIR, SHARD
+from support.flash import wait_for_flash
+from support.locators import find
+from support.page_objects import Login, MenuForm, MenuList, Sidebar
+from support.pipeline import record
+from support.slo import budget_step
+from support.tables import find_menu_row, wait_for_table
 
 
 @pytest.fixture(scope="module")
-def setup():
-    # Initialize the WebDriver and maximize the window
-    driver = webdriver.Chrome()
-    driver.maximize_window()
+def setup(role_sessions):
+    # Initialize the WebDriver (already logged in when the session bootstrapper ran)
+    driver = role_sessions.take("moderator")
 
     # Create screenshots directory if it doesn't exist
-    screenshot_dir = "screenshots"
+    screenshot_dir = SCREENSHOT_DIR
     if not os.path.exists(screenshot_dir):
         os.makedirs(screenshot_dir)
 
@@ -49,7 +50,7 @@ def test_open_application(setup):
     driver, screenshot_dir, logger = setup
 
     with allure.step("Open the application"):
-        driver.get("https://demo.karnataka.gov.in/zpshivamogga.karnataka.gov.in/public/back/index")
+        driver.get(f"{BASE_URL}/index")
         take_screenshot(driver, screenshot_dir, "open_application")
 
 
@@ -68,14 +69,13 @@ def test_verify_page_title(setup):
 @allure.story("Fill in login credentials")
 def test_fill_login_credentials(setup):
     driver, screenshot_dir, logger = setup
+    if driver.logged_in_as:
+        pytest.skip("Logged in by the session bootstrapper")
 
     with allure.step("Fill in login credentials"):
-        username_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Username']"))
-        )
+        username_field = find(driver, Login.USERNAME)
         username_field.send_keys("moderator@site.com")
-        driver.find_element(By.XPATH, "//input[@placeholder='Password']").send_keys(
-            "01123")  # //input[@placeholder='Password']
+        find(driver, Login.PASSWORD).send_keys("01123")
         take_screenshot(driver, screenshot_dir, "fill_login_credentials")
 
 
@@ -83,11 +83,11 @@ def test_fill_login_credentials(setup):
 @allure.story("Submit login form")
 def test_submit_login_form(setup):
     driver, screenshot_dir, logger = setup
+    if driver.logged_in_as:
+        pytest.skip("Logged in by the session bootstrapper")
 
     with allure.step("Submit login form"):
-        submit_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@name='login_button']"))  # //input[@name='login_button']
-        )
+        submit_button = find(driver, Login.SUBMIT, clickable=True)
         submit_button.click()
         take_screenshot(driver, screenshot_dir, "submit_login_form")
 
@@ -98,15 +98,15 @@ def test_click_main_menu_link(setup):
     driver, screenshot_dir, logger = setup
 
     try:
-        with allure.step("Click the main menu link"):
+        with budget_step("Click the main menu link", "open_menu_list <= 3s p95"):
             # Wait for the element to be visible and then click it
-            ajax_link = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, "//span[normalize-space()='Main Menu']"))
-            )
+            ajax_link = find(driver, Sidebar.MAIN_MENU, visible=True)
             logger.info("main menu link is visible")
             ajax_link.click()
-            take_screenshot(driver, screenshot_dir, "click_main_menu")
+            # The step is done once the list is on screen
+            wait_for_table(driver)
             logger.info("Main menu clicked successfully")
+        take_screenshot(driver, screenshot_dir, "click_main_menu")
 
     except Exception as e:
         take_screenshot(driver, screenshot_dir, "main_menu_error")
@@ -123,20 +123,21 @@ def test_click_edit_button(setup):
             # Dynamically find the row where the Edit button exists
             # Replace the logic below with one that works for your case, e.g., finding by specific text or unique identifier in the row
             # Example: Find the row by matching text content
-            row = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, "//tr[contains(@id, 'item-')]"))
-            )
+            if SHARD:
+                # Grid shards share the table, so only edit this shard's own item
+                row = find_menu_row(driver, ITEM_TITLE, "Created")
+                if row is None:
+                    raise Exception("Matching row not found")
+            else:
+                row = WebDriverWait(driver, 10).until(
+                    EC.visibility_of_element_located((By.XPATH, "//tr[contains(@id, 'item-')]"))
+                )
             item_id = row.get_attribute('id')  # Get the dynamic item id
 
             logger.info(f"Located row with dynamic item id: {item_id}")
 
-            # Use the dynamic ID to locate the Edit button
-            edit_button_xpath = f"//tr[@id='{item_id}']//i[@class='glyphicon glyphicon-pencil']"
-
-            # Wait until the Edit button is clickable
-            edit_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, edit_button_xpath))
-            )
+            # Wait until the Edit button in that row is clickable
+            edit_button = find(driver, MenuList.EDIT_BUTTON, clickable=True, root=row)
 
             # Take a screenshot before clicking the Edit button
             take_screenshot(driver, screenshot_dir, "edit_button_visible")
@@ -160,12 +161,12 @@ def test_click_edit_button(setup):
 def test_submit_form(setup):
     driver, screenshot_dir, logger = setup
 
-    with allure.step("Save the form"):
-        save_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@name='add_menu_submit_button']"))
-        )
+    with budget_step("Save the form", "moderate_menu <= 2s p95"):
+        save_button = find(driver, MenuForm.SUBMIT, clickable=True)
         save_button.click()
-        take_screenshot(driver, screenshot_dir, "form_saved")
+        # The step is done when the back office confirms it
+        wait_for_flash(driver)
+    take_screenshot(driver, screenshot_dir, "form_saved")
 
 
 @allure.feature("Form Submission")
@@ -178,20 +179,15 @@ def test_verify_success_message(setup):
             # Submit the form (you might need to locate and click the submit button)
             # Example: driver.find_element(By.ID, 'submit_button_id').click()
 
-            # Define XPath for the success alert message
-            success_message_xpath = "//body/div[@class='ch-container']/div[@class='row']/div[@id='content']/div[1]"
-
-            # Wait for the success message to be visible
-            success_message = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, success_message_xpath))
-            )
+            # The flash watcher recorded every alert this page showed, even one that has faded out
+            success_message = wait_for_flash(driver)
 
             # Take a screenshot when the success message appears
             take_screenshot(driver, screenshot_dir, "success_message_visible")
-            logger.info("Success message 'Data Saved successfully!' is visible.")
+            logger.info(f"Success message '{success_message['text']}' is visible.")
 
-            # Additional verification, if needed
-            assert success_message.is_displayed(), "Success message not displayed"
+            # Time this step against the item's correlation ID
+            record(driver, "menu", "moderated", success_message)
 
         except Exception as e:
             logger.error(f"Error while verifying the success message: {str(e)}")
@@ -1,23 +1,26 @@
 import time
 import pytest
 import allure
-from selenium import webdriver
-from selenium.common.exceptions import ElementNotInteractableException, TimeoutException, NoSuchElementException
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import os
 import logging
+from support.config import BASE_URL, ITEM_TITLE, SCREENSHOT_DIR, SHARD
+from support.flash import wait_for_flash
+from support.locators import find
+from support.page_objects import Login, PageForm, PageList, Sidebar
+from support.pipeline import record
+from support.slo import budget_step
+from support.tables import find_page_row, wait_for_table
 
 
 @pytest.fixture(scope="module")
-def setup():
-    # Initialize the WebDriver and maximize the window
-    driver = webdriver.Chrome()
-    driver.maximize_window()
+def setup(role_sessions):
+    # Initialize the WebDriver (already logged in when the session bootstrapper ran)
+    driver = role_sessions.take("moderator")
 
     # Create screenshots directory if it doesn't exist
-    screenshot_dir = "screenshots"
+    screenshot_dir = SCREENSHOT_DIR
     if not os.path.exists(screenshot_dir):
         os.makedirs(screenshot_dir)
 
@@ -46,7 +49,7 @@ def test_open_application(setup):
     driver, screenshot_dir, logger = setup
 
     with allure.step("Open the application"):
-        driver.get("https://demo.karnataka.gov.in/zpshivamogga.karnataka.gov.in/public/back/index")
+        driver.get(f"{BASE_URL}/index")
         take_screenshot(driver, screenshot_dir, "open_application")
 
 
@@ -65,14 +68,13 @@ def test_verify_page_title(setup):
 @allure.story("Fill in login credentials")
 def test_fill_login_credentials(setup):
     driver, screenshot_dir, logger = setup
+    if driver.logged_in_as:
+        pytest.skip("Logged in by the session bootstrapper")
 
     with allure.step("Fill in login credentials"):
-        username_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Username']"))
-        )
+        username_field = find(driver, Login.USERNAME)
         username_field.send_keys("moderator@site.com")
-        driver.find_element(By.XPATH, "//input[@placeholder='Password']").send_keys(
-            "01123")  # //input[@placeholder='Password']
+        find(driver, Login.PASSWORD).send_keys("01123")
         take_screenshot(driver, screenshot_dir, "fill_login_credentials")
 
 
@@ -80,11 +82,11 @@ def test_fill_login_credentials(setup):
 @allure.story("Submit login form")
 def test_submit_login_form(setup):
     driver, screenshot_dir, logger = setup
+    if driver.logged_in_as:
+        pytest.skip("Logged in by the session bootstrapper")
 
     with allure.step("Submit login form"):
-        submit_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@name='login_button']"))  # //input[@name='login_button']
-        )
+        submit_button = find(driver, Login.SUBMIT, clickable=True)
         submit_button.click()
         take_screenshot(driver, screenshot_dir, "submit_login_form")
 
@@ -95,15 +97,15 @@ def test_click_pages_link(setup):
     driver, screenshot_dir, logger = setup
 
     try:
-        with allure.step("Click the Pages"):
+        with budget_step("Click the Pages", "open_pages_list <= 3s p95"):
             # Wait for the element to be visible and then click it
-            ajax_link = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, "//span[normalize-space()='Pages']"))
-            )
+            ajax_link = find(driver, Sidebar.PAGES, visible=True)
             logger.info("pages link is visible")
             ajax_link.click()
-            take_screenshot(driver, screenshot_dir, "click_pages_link")
+            # The step is done once the list is on screen
+            wait_for_table(driver)
             logger.info("Active page link clicked successfully")
+        take_screenshot(driver, screenshot_dir, "click_pages_link")
 
     except Exception as e:
         take_screenshot(driver, screenshot_dir, "active_pages_error")
@@ -118,13 +120,15 @@ def test_click_edit_button(setup):
 
     with allure.step("Locate and click on the 'Edit' button"):
         try:
-            # Define the XPath for the Edit button
-            edit_button_xpath = "//a[@class='btn btn-primary btn-sm']//i[@class='glyphicon glyphicon-pencil']"
-
-            # Use WebDriverWait to wait until the Edit button is clickable
-            edit_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, edit_button_xpath))
-            )
+            if SHARD:
+                # Grid shards share the table, so only edit this shard's own item
+                row = find_page_row(driver, ITEM_TITLE, "Created")
+                if row is None:
+                    raise Exception("Matching row not found")
+                edit_button = find(driver, PageList.EDIT_BUTTON, clickable=True, root=row)
+            else:
+                # Wait until the first Edit button is clickable
+                edit_button = find(driver, PageList.EDIT_BUTTON, clickable=True)
 
             # Take a screenshot before clicking the Edit button
             take_screenshot(driver, screenshot_dir, "edit_button_visible")
@@ -153,12 +157,12 @@ def take_screenshot(driver, screenshot_dir, screenshot_name):
 def test_submit_form(setup):
     driver, screenshot_dir, logger = setup
 
-    with allure.step("Save the form"):
-        save_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@name='add_edit_page_button']"))
-        )
+    with budget_step("Save the form", "moderate_page <= 2s p95"):
+        save_button = find(driver, PageForm.SUBMIT, clickable=True)
         save_button.click()
-        take_screenshot(driver, screenshot_dir, "form_saved")
+        # The step is done when the back office confirms it
+        wait_for_flash(driver, "Data Saved successfully!")
+    take_screenshot(driver, screenshot_dir, "form_saved")
 
 
 @allure.feature("Form Submission")
@@ -171,20 +175,15 @@ def test_verify_success_message(setup):
             # Submit the form (you might need to locate and click the submit button)
             # Example: driver.find_element(By.ID, 'submit_button_id').click()
 
-            # Define XPath for the success alert message
-            success_message_xpath = "//div[@class='alert alert-success' and contains(text(),'Data Saved successfully!')]"
-
-            # Wait for the success message to be visible
-            success_message = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, success_message_xpath))
-            )
+            # The flash watcher recorded every alert this page showed, even one that has faded out
+            success_message = wait_for_flash(driver, "Data Saved successfully!")
 
             # Take a screenshot when the success message appears
             take_screenshot(driver, screenshot_dir, "success_message_visible")
-            logger.info("Success message 'Data Saved successfully!' is visible.")
+            logger.info(f"Success message '{success_message['text']}' is visible.")
 
-            # Additional verification, if needed
-            assert success_message.is_displayed(), "Success message not displayed"
+            # Time this step against the item's correlation ID
+            record(driver, "page", "moderated", success_message)
 
         except Exception as e:
             logger.error(f"Error while verifying the success message: {str(e)}")